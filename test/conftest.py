@@ -0,0 +1,18 @@
+"""Shared fixtures - the webapp modules are imported from webapp/ directly."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+WEBAPP_DIR = Path(__file__).resolve().parent.parent / "webapp"
+sys.path.insert(0, str(WEBAPP_DIR))
+
+@pytest.fixture
+def app_client(tmp_path, monkeypatch):
+    """Flask test client of the dashboard, with the layout stored in a temp file"""
+    main = pytest.importorskip("main")  # Needs flask, flask-socketio and bleak
+    from layout_store import LayoutStore
+    store = LayoutStore(tmp_path / "layout.json")
+    monkeypatch.setattr(main, "layout_store", store)
+    return main.app.test_client(), store
@@ -0,0 +1,94 @@
+"""Microphone ingest: ring buffer and per-block levels from a fake PCM source."""
+
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from audio_ingest import AudioIngest, FakePcmSource, PcmRing, BLOCK_SAMPLES, SAMPLE_RATE
+
+def ingest_fake(ingest, **source):
+    """Run a non-realtime fake source through ingest until it ends"""
+    ingest.start(lambda: FakePcmSource(realtime=False, **source))
+    expected = int(source["duration"] * SAMPLE_RATE)
+    deadline = time.monotonic() + 5
+    while ingest.ring.total < expected and time.monotonic() < deadline:
+        time.sleep(0.01)
+    ingest.stop()
+    return expected
+
+def test_ring_wraps_and_refuses_overwritten_samples():
+    ring = PcmRing(seconds=1, rate=100)
+    ring.write(np.arange(150, dtype=np.int16))
+    assert ring.oldest() == 50
+    assert ring.read(40, 10) is None
+    assert list(ring.read(95, 10)) == list(range(95, 105))  # Across the wrap
+    assert ring.read(145, 10) is None  # Not arrived yet
+
+def test_fake_source_levels_and_listeners():
+    ingest = AudioIngest()
+    batches = []
+    ingest.add_listener(lambda first, start, rms, peak, floor: batches.append((first, start, len(rms))))
+    expected = ingest_fake(ingest, duration=1.0, clicks=(0.5,))
+
+    assert ingest.ring.total == expected
+    assert ingest.blocks == expected // BLOCK_SAMPLES
+    # Listeners see every block exactly once, in order
+    assert sum(n for _, _, n in batches) == ingest.blocks
+    assert all(start == first * BLOCK_SAMPLES for first, start, _ in batches)
+
+    click_block = int(0.5 * SAMPLE_RATE) // BLOCK_SAMPLES
+    peaks = ingest.recent(ingest.block_peak, ingest.blocks)
+    assert peaks[click_block] > 0.3
+    # The floor tracks the tone + noise, well below the click
+    assert 0.01 < ingest.noise_floor < 0.1
+    stats = ingest.stats()
+    assert stats["listener_errors"] == 0 and stats["last_error"] is None
+
+def test_listener_errors_are_counted_not_raised():
+    ingest = AudioIngest()
+    ingest.add_listener(lambda *args: 1 / 0)
+    ingest_fake(ingest, duration=0.2)
+    assert ingest.listener_errors > 0
+    assert ingest.blocks == int(0.2 * SAMPLE_RATE) // BLOCK_SAMPLES
+
+class ChunkSource:
+    """Plays fixed byte chunks, then ends the stream"""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def open(self):
+        pass
+
+    def readinto(self, buffer):
+        if not self.chunks:
+            return 0
+        chunk = self.chunks.pop(0)
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+    def close(self):
+        pass
+
+    def describe(self):
+        return "chunks"
+
+def test_reconnect_after_odd_byte_count_realigns(monkeypatch):
+    import audio_ingest
+    monkeypatch.setattr(audio_ingest, "RECONNECT_SECONDS", 0.01)
+    good = np.arange(1, 1001, dtype=np.int16)
+    sources = [
+        ChunkSource([np.arange(-10, 0, dtype=np.int16).tobytes()[:-1]]),  # Drops mid-sample
+        ChunkSource([good.tobytes()]),
+    ]
+    ingest = AudioIngest()
+    ingest.start(lambda: sources.pop(0) if sources else ChunkSource([]))
+    deadline = time.monotonic() + 2
+    while ingest.ring.total < 1009 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    ingest.stop()
+    # 9 whole samples from the first stream, then the second one intact
+    assert ingest.ring.total == 1009
+    assert list(ingest.ring.read(9, 1000)) == list(good)
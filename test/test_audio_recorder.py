@@ -0,0 +1,44 @@
+"""Triggered recordings finish even when the stream stops before the post-roll."""
+
+import time
+import wave
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from audio_ingest import AudioIngest, FakePcmSource, SAMPLE_RATE
+from audio_recorder import AudioRecorder
+
+@pytest.fixture
+def stopped_ingest():
+    """An ingest that has taken in one second of fake audio and then stopped"""
+    ingest = AudioIngest()
+    ingest.start(lambda: FakePcmSource(realtime=False, duration=1.0))
+    deadline = time.monotonic() + 5
+    while ingest.ring.total < SAMPLE_RATE and time.monotonic() < deadline:
+        time.sleep(0.01)
+    ingest.stop()
+    return ingest
+
+def wait_finished(recording, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not recording.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return recording.finished
+
+def test_pre_roll_only(stopped_ingest, tmp_path):
+    recorder = AudioRecorder(stopped_ingest, tmp_path)
+    recording = recorder.trigger("test", pre_roll=0.5, post_roll=0)
+    assert wait_finished(recording)
+    assert recording.dropped_samples == 0
+    with wave.open(str(recording.files[0])) as wav:
+        assert wav.getnframes() == SAMPLE_RATE // 2
+
+def test_missing_post_roll_is_dropped_when_ingest_stops(stopped_ingest, tmp_path):
+    recorder = AudioRecorder(stopped_ingest, tmp_path)
+    recording = recorder.trigger("test", pre_roll=0.5, post_roll=2.0)
+    assert wait_finished(recording)
+    assert recording.dropped_samples == 2 * SAMPLE_RATE
+    assert recording.info()["written_seconds"] == 0.5
+    assert recorder.stats()["active"] is None
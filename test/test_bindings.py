@@ -0,0 +1,44 @@
+"""Module bindings with per-slot arguments, and how PATCH validates them."""
+
+import pytest
+
+from layout_store import binding_label, is_module_binding, split_binding
+
+SOUND = {"module": "play_sound", "args": {"file": "bruh.mp3"}, "name": "Bruh"}
+
+def test_split_binding():
+    assert split_binding("music") == ("music", {})
+    assert split_binding(SOUND) == ("play_sound", {"file": "bruh.mp3"})
+    assert split_binding({"module": "play_sound"}) == ("play_sound", {})
+    # The args are a copy - callers can't change the stored binding
+    split_binding(SOUND)[1]["file"] = "boom.mp3"
+    assert SOUND["args"] == {"file": "bruh.mp3"}
+
+def test_is_module_binding_and_label():
+    assert is_module_binding(SOUND)
+    assert not is_module_binding({"tap": "music"})  # A gesture map
+    assert not is_module_binding("music")
+    assert binding_label("music") == "music"
+    assert binding_label({"module": "m", "args": {"b": 2, "a": 1}}) == "m(a=1, b=2)"
+
+def patch(client, store, module):
+    etag = f'"{store.snapshot()[1]}"'
+    return client.patch("/api/layout/000", json={"module": module}, headers={"If-Match": etag})
+
+def test_patch_accepts_declared_args(app_client):
+    client, store = app_client
+    assert patch(client, store, SOUND).status_code == 200
+    assert store.get_slot("000") == SOUND
+    # Bindings inside a gesture map are checked the same way
+    assert patch(client, store, {"tap": SOUND, "hold": "music"}).status_code == 200
+
+@pytest.mark.parametrize("module", [
+    {"module": "play_sound", "args": {"volume": 3}},
+    {"module": "play_sound", "args": ["bruh.mp3"]},
+    {"tap": {"module": "play_sound", "args": {"volume": 3}}},
+])
+def test_patch_rejects_bad_args(app_client, module):
+    client, store = app_client
+    response = patch(client, store, module)
+    assert response.status_code == 400
+    assert store.get_slot("000") is None
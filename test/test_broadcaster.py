@@ -0,0 +1,63 @@
+"""Per-client outboxes: publishing only enqueues, reliable events keep their order."""
+
+import threading
+import time
+
+from broadcaster import SocketBroadcaster
+
+class FakeSocketIO:
+    """Records emits; each emit blocks until the gate opens, like a stalled client"""
+
+    def __init__(self):
+        self.sent = []
+        self.gate = threading.Event()
+
+    def start_background_task(self, target, *args):
+        threading.Thread(target=target, args=args, daemon=True).start()
+
+    def emit(self, event, payload, to=None):
+        self.gate.wait()
+        self.sent.append((event, payload))
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+def test_publish_never_blocks_and_keeps_order():
+    socketio = FakeSocketIO()
+    broadcaster = SocketBroadcaster(socketio, max_queue=3)
+    broadcaster.add_client("a", ["logs", "buttons"])
+    broadcaster.publish("ble_log", {"seq": 1}, "logs", droppable=True)
+    time.sleep(0.05)  # The sender is now stuck emitting seq 1
+
+    started = time.monotonic()
+    for seq in range(2, 8):
+        broadcaster.publish("ble_log", {"seq": seq}, "logs", droppable=True)
+    broadcaster.publish("button_press", {"seq": 8}, "buttons")
+    broadcaster.publish("ble_log", {"seq": 9}, "logs", droppable=True)
+    assert time.monotonic() - started < 0.05
+    stats = broadcaster.stats()["clients"]["a"]
+    assert (stats["queued_logs"], stats["queued_reliable"], stats["dropped"]) == (3, 1, 4)
+
+    socketio.gate.set()
+    assert wait_for(lambda: len(socketio.sent) == 4)
+    assert socketio.sent == [
+        ("ble_log", {"seq": 1}),
+        # Dropped entries are reported as a gap; the button event stays after the logs before it
+        ("ble_logs", {"logs": [{"seq": 6}, {"seq": 7}], "seq": 7, "resync": False, "gap": {"since": 1, "until": 6}}),
+        ("button_press", {"seq": 8}),
+        ("ble_log", {"seq": 9}),
+    ]
+
+def test_reliable_events_are_never_dropped():
+    socketio = FakeSocketIO()
+    broadcaster = SocketBroadcaster(socketio, max_queue=2)
+    broadcaster.add_client("a", ["buttons", "status"])
+    broadcaster.publish("ble_log", {"seq": 1}, "logs", droppable=True)  # Not subscribed
+    for n in range(10):
+        broadcaster.publish("button_press", {"n": n}, ("buttons", "status"))
+    socketio.gate.set()
+    assert wait_for(lambda: len(socketio.sent) == 10)
+    assert [p["n"] for _, p in socketio.sent] == list(range(10))
@@ -0,0 +1,49 @@
+"""Activation executor: resources are taken before a worker runs a job."""
+
+import threading
+import time
+
+from executor import ActivationExecutor
+from resources import ResourceLocks
+
+def test_busy_resource_does_not_hold_up_other_jobs():
+    locks = ResourceLocks({"camera": 1})
+    executor = ActivationExecutor(workers=2, critical_reserved=0, resource_locks=locks)
+    release_first = threading.Event()
+    ran = []
+    done = threading.Event()
+
+    executor.submit("interactive", lambda: (ran.append("first"), release_first.wait(2)), resources=["camera"])
+    time.sleep(0.05)
+    # The second camera job waits in the queue, not on a worker, so the free
+    # worker still picks up the unrelated job
+    executor.submit("interactive", lambda: ran.append("second"), resources=["camera"])
+    executor.submit("interactive", lambda: (ran.append("other"), done.set()))
+    assert done.wait(1)
+    assert ran == ["first", "other"]
+    assert executor.stats()["classes"]["interactive"]["waiting_for_resources"] == 1
+
+    release_first.set()
+    deadline = time.monotonic() + 1
+    while "second" not in ran and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert ran == ["first", "other", "second"]
+    assert locks.stats()["camera"]["holders"] == 0
+
+def test_job_expires_while_its_resource_is_busy():
+    locks = ResourceLocks({"input": 1})
+    executor = ActivationExecutor(workers=2, critical_reserved=0, resource_locks=locks)
+    held = locks.try_acquire(["input"])
+    expired = threading.Event()
+    reasons = []
+
+    executor.submit(
+        "interactive", lambda: reasons.append("ran"),
+        resources=["input"], deadline=time.monotonic() + 0.05,
+        on_expire=lambda blocked: (reasons.append(blocked), expired.set())
+    )
+    assert expired.wait(1)
+    locks.release(held)
+    assert reasons == [True]
+    assert locks.stats()["input"]["timeouts"] == 1
+    assert executor.stats()["classes"]["interactive"]["expired"] == 1
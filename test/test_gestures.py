@@ -0,0 +1,89 @@
+"""Gesture recognition on a virtual clock."""
+
+import pytest
+
+from gestures import GestureRecognizer, run_benchmark
+from scheduler import ManualScheduler
+
+@pytest.fixture
+def rig():
+    """Recognizer on a ManualScheduler; returns (edge, seen, bindings, chords)"""
+    scheduler = ManualScheduler()
+    seen = []
+    bindings = {}
+    chords = {}
+    recognizer = GestureRecognizer(
+        scheduler,
+        lambda positions, gesture, target, latency: seen.append((positions, gesture, target, round(latency, 6))),
+        lambda position: bindings.get(position, {}),
+        lambda: chords
+    )
+
+    def edge(position, pressed, t):
+        scheduler.advance_to(t)
+        recognizer.feed(position, pressed, t)
+
+    edge.advance = scheduler.advance_to
+    return edge, seen, bindings, chords
+
+def test_short_press_fires_on_release_without_waiting(rig):
+    edge, seen, bindings, _ = rig
+    bindings[0] = {"short_press": "a"}
+    edge(0, True, 1.0)
+    edge(0, False, 1.1)
+    assert seen == [((0,), "short_press", "a", 0.0)]
+
+def test_short_press_waits_for_tap_window_when_double_tap_is_bound(rig):
+    edge, seen, bindings, _ = rig
+    bindings[0] = {"short_press": "a", "double_tap": "b"}
+    edge(0, True, 1.0)
+    edge(0, False, 1.1)
+    assert seen == []
+    edge.advance(2.0)
+    assert seen == [((0,), "short_press", "a", 0.25)]
+
+def test_double_and_triple_tap(rig):
+    edge, seen, bindings, _ = rig
+    bindings[0] = {"double_tap": "b", "triple_tap": "c"}
+    for t in (1.0, 1.2):
+        edge(0, True, t)
+        edge(0, False, t + 0.05)
+    edge.advance(2.0)
+    for t in (3.0, 3.2, 3.4):
+        edge(0, True, t)
+        edge(0, False, t + 0.05)
+    assert [g for _, g, _, _ in seen] == ["double_tap", "triple_tap"]
+    assert seen[-1][3] == 0.0  # Triple tap never waits
+
+def test_long_press_and_hold_fire_while_held(rig):
+    edge, seen, bindings, _ = rig
+    bindings[0] = {"long_press": "l", "hold:1": "h", "short_press": "s"}
+    edge(0, True, 1.0)
+    edge.advance(2.5)
+    edge(0, False, 2.5)
+    assert [(g, lat) for _, g, _, lat in seen] == [("long_press", 0.0), ("hold:1", 0.0)]
+
+def test_chord_and_lone_chord_member(rig):
+    edge, seen, bindings, chords = rig
+    bindings[2] = {"press": "p"}
+    chords[frozenset((2, 3))] = "both"
+    edge(2, True, 1.0)
+    edge(3, True, 1.02)
+    edge(2, False, 1.3)
+    edge(3, False, 1.3)
+    assert seen == [((2, 3), "chord", "both", 0.0)]
+
+    seen.clear()
+    edge(2, True, 2.0)
+    edge.advance(2.1)
+    assert seen == [((2,), "press", "p", 0.05)]  # Held back for the chord window only
+
+def test_repeat_ends_on_release(rig):
+    edge, seen, bindings, _ = rig
+    bindings[0] = {"repeat:50": "r"}
+    edge(0, True, 1.0)
+    edge(0, False, 1.5)
+    assert [g for _, g, _, _ in seen] == ["repeat:50", "repeat_end"]
+
+def test_benchmark_latency_bounds():
+    assert run_benchmark(rounds=50)
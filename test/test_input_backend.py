@@ -0,0 +1,100 @@
+"""Input service on the null injector: combos, event order and timing."""
+
+import pytest
+
+from input_backend import InputService, NullInjector, parse_combo
+
+@pytest.fixture
+def service():
+    service = InputService(preference=("null",))
+    service.open()
+    yield service
+    service.close()
+
+def recorded(service):
+    return [(kind, args) for _, kind, args in service.injector.events]
+
+def test_parse_combo():
+    assert parse_combo("Ctrl + Shift + s") == ["ctrl", "shift", "s"]
+    assert parse_combo("media_play_pause") == ["media_play_pause"]
+    with pytest.raises(ValueError):
+        parse_combo("ctrl+hyper")
+    with pytest.raises(ValueError):
+        parse_combo(" + ")
+
+def test_click_and_combo_order(service):
+    service.click("right", count=2, interval=0.001)
+    service.press_combo("ctrl+c")
+    assert recorded(service) == [
+        ("button", ("right", True)), ("button", ("right", False)),
+        ("button", ("right", True)), ("button", ("right", False)),
+        ("key", ("ctrl", True)), ("key", ("c", True)),
+        ("key", ("c", False)), ("key", ("ctrl", False)),
+    ]
+    assert service.stats()["injector"] == "null"
+    assert service.stats()["events"] == 8
+
+def test_timed_sequence_keeps_to_schedule(service):
+    # A busy test machine can deschedule the player once - the bounds must hold on one of three plays
+    for _ in range(3):
+        service.injector.events.clear()
+        timing = service.play([(n * 0.002, "move", (0, 1)) for n in range(100)])
+        if timing["max_us"] < 5000 and timing["mean_us"] < 500:
+            break
+    times = [t for t, _, _ in service.injector.events]
+    assert timing["events"] == 100
+    # Deadlines are absolute, so lateness doesn't accumulate along the sequence
+    assert times[-1] - times[0] == pytest.approx(0.198, abs=0.005)
+    assert timing["max_us"] < 5000
+    assert timing["mean_us"] < 500
+
+def test_no_injector_raises():
+    service = InputService(preference=())
+    with pytest.raises(RuntimeError):
+        service.move(1, 1)
+
+class FailingInjector(NullInjector):
+    """Raises on the nth event it is given"""
+
+    def __init__(self, fail_at):
+        super().__init__()
+        self.fail_at = fail_at
+
+    def _record(self, kind, args):
+        if len(self.events) == self.fail_at:
+            self.fail_at = None
+            raise OSError("device gone")
+        self.events.append((0.0, kind, args))
+
+    def button(self, button, down):
+        self._record("button", (button, down))
+
+    def key(self, key, down):
+        self._record("key", (key, down))
+
+def test_held_keys_are_released_when_play_fails():
+    service = InputService(preference=())
+    service.injector = FailingInjector(fail_at=3)
+    with pytest.raises(OSError):
+        service.play([(0.0, "key", ("ctrl", True)), (0.0, "button", ("left", True)),
+                      (0.0, "key", ("a", True)), (0.0, "key", ("x", True))])
+    assert recorded(service) == [
+        ("key", ("ctrl", True)), ("button", ("left", True)), ("key", ("a", True)),
+        ("key", ("a", False)), ("button", ("left", False)), ("key", ("ctrl", False)),
+    ]
+
+def test_unplayable_events_are_rejected_before_injection(service):
+    with pytest.raises(ValueError):
+        service.play([(0.0, "key", ("ctrl", True)), (0.0, "key", ("hyper", True))])
+    with pytest.raises(ValueError):
+        service.play([(0.0, "button", ("thumb", True))])
+    assert recorded(service) == []
+
+def test_uinput_punctuation_has_key_codes():
+    pytest.importorskip("evdev")
+    from input_backend import UinputInjector
+    injector = UinputInjector.__new__(UinputInjector)  # Key lookup only - no /dev/uinput needed
+    for char in ". / - ; ' [ ] = ` \\ ? ! A".split() + [" "]:
+        injector.check_key(char)
+    with pytest.raises(ValueError):
+        injector.check_key("§")
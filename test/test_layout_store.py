@@ -0,0 +1,76 @@
+"""Layout ETag preconditions, atomic writes and per-slot PATCH conflicts."""
+
+import json
+
+import pytest
+
+from layout_store import LayoutStore, LayoutConflict, SLOT_IDS
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "layout.json"
+    path.write_text(json.dumps({slot: None for slot in SLOT_IDS}))
+    return LayoutStore(path)
+
+def test_set_slot_with_current_etag_writes_and_diffs(store):
+    _, etag, version = store.snapshot()
+    diffs, new_etag, new_version = store.set_slot("000", "music", etag)
+    assert diffs == [("default", 0, {"000": "music"})]
+    assert new_etag != etag and new_version == version + 1
+    assert json.loads(store.path.read_text())["000"] == "music"
+    assert store.get_slot("000") == "music"
+
+def test_set_slot_with_stale_etag_conflicts(store):
+    _, etag, _ = store.snapshot()
+    store.set_slot("000", "music", etag)
+    with pytest.raises(LayoutConflict) as conflict:
+        store.set_slot("001", "camera", etag)
+    assert conflict.value.current_etag == store.snapshot()[1]
+    assert store.get_slot("001") is None
+
+def test_unchanged_write_keeps_version(store):
+    _, etag, version = store.snapshot()
+    diffs, same_etag, same_version = store.set_slot("000", None, etag)
+    assert diffs == [] and same_etag == etag and same_version == version
+
+def test_hand_edit_is_picked_up(store):
+    _, etag, _ = store.snapshot()
+    store.path.write_text(json.dumps({"000": "screenshot"}))
+    store.mtime = None  # Same-second edits can share an mtime on coarse filesystems
+    assert store.get_slot("000") == "screenshot"
+    assert store.snapshot()[1] != etag
+
+def test_patch_requires_and_checks_if_match(app_client):
+    client, store = app_client
+    _, etag, _ = store.snapshot()
+    assert client.patch("/api/layout/000", json={"module": "music"}).status_code == 428
+
+    response = client.patch("/api/layout/000", json={"module": "music"}, headers={"If-Match": f'"{etag}"'})
+    assert response.status_code == 200
+    assert store.get_slot("000") == "music"
+
+    stale = client.patch("/api/layout/001", json={"module": "music"}, headers={"If-Match": f'"{etag}"'})
+    assert stale.status_code == 412
+    assert stale.get_json()["etag"] == response.get_json()["etag"]
+
+def test_patch_rejects_unknown_slots_and_scripts(app_client):
+    client, store = app_client
+    etag = f'"{store.snapshot()[1]}"'
+    assert client.patch("/api/layout/999", json={"module": "music"}, headers={"If-Match": etag}).status_code == 404
+    assert client.patch("/api/layout/000", json={"module": "no_such_script"}, headers={"If-Match": etag}).status_code == 404
+
+def test_renamed_modules_are_migrated_on_load(tmp_path):
+    path = tmp_path / "layout.json"
+    path.write_text(json.dumps({"000": "bruh", "001": {"tap": "vine_boom", "hold": "music"}, "010": "rl"}))
+    store = LayoutStore(path)
+    assert store.get_slot("000") == {"module": "play_sound", "args": {"file": "bruh.mp3"},
+                                     "name": "Bruh", "icon": "🤦‍♂️", "color": "#FFFF33"}
+    assert store.get_slot("001")["tap"]["args"] == {"file": "boom.mp3"}
+    assert store.get_slot("001")["hold"] == "music"
+    assert store.get_slot("010")["args"] == {"file": "rl.mp3"}
+
+    # The next write saves the migrated bindings
+    _, etag, _ = store.snapshot()
+    store.set_slot("111", "music", etag)
+    saved = json.loads(path.read_text())
+    assert saved["000"]["module"] == "play_sound"
@@ -0,0 +1,71 @@
+"""MPRIS control against a fake player on a private session bus."""
+
+import asyncio
+import shutil
+import subprocess
+import threading
+import time
+
+import pytest
+
+import media_control
+from media_control import MediaControl, MPRIS_PATH, MPRIS_PREFIX
+
+pytestmark = pytest.mark.skipif(
+    not media_control.MessageBus or not shutil.which("dbus-daemon"),
+    reason="needs dbus-fast and dbus-daemon"
+)
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+@pytest.fixture
+def bus():
+    """A private dbus-daemon with one fake player - yields (address, player, quit)"""
+    daemon = subprocess.Popen(["dbus-daemon", "--session", "--nofork", "--print-address"],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    address = daemon.stdout.readline().strip()
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    player = media_control.FakeMprisPlayer()
+
+    async def serve():
+        connection = await media_control.MessageBus(bus_address=address).connect()
+        connection.export(MPRIS_PATH, player)
+        await connection.request_name(MPRIS_PREFIX + "fake")
+        return connection
+
+    connection = asyncio.run_coroutine_threadsafe(serve(), loop).result(5)
+    quit_player = lambda: loop.call_soon_threadsafe(connection.disconnect)
+    try:
+        yield address, player, quit_player
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        daemon.terminate()
+        daemon.wait()
+
+def test_commands_reach_the_active_player(bus):
+    address, player, _ = bus
+    control = MediaControl(address)
+    assert control.start()
+    assert control.stats()["players"] == {MPRIS_PREFIX + "fake": "Paused"}
+
+    assert control.play_pause() == MPRIS_PREFIX + "fake"
+    # The new status arrives by PropertiesChanged, not by polling
+    assert wait_for(lambda: control.stats()["players"][MPRIS_PREFIX + "fake"] == "Playing")
+    assert control.next() == MPRIS_PREFIX + "fake"
+    assert control.change_volume(0.2) == pytest.approx(0.7)
+    assert player.calls == ["PlayPause", "Next"]
+    assert player.volume == pytest.approx(0.7)
+
+def test_player_that_quits_is_forgotten(bus):
+    address, _, quit_player = bus
+    control = MediaControl(address)
+    assert control.start()
+    assert control.active_player() == MPRIS_PREFIX + "fake"
+    quit_player()
+    assert wait_for(lambda: not control.stats()["players"])
+    assert control.play_pause() is None
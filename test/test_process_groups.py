@@ -0,0 +1,22 @@
+"""Script runs in their own process group, with rlimits set after spawn."""
+
+import subprocess
+import sys
+
+import pytest
+
+import process_groups
+from process_groups import run_in_group
+
+@pytest.mark.skipif(not hasattr(process_groups.resource, "prlimit"), reason="prlimit is Linux only")
+def test_limits_apply_to_the_child():
+    code = "import resource; print(resource.getrlimit(resource.RLIMIT_NOFILE)[1])"
+    returncode, stdout, _, _ = run_in_group([sys.executable, "-c", code], 10, {"open_files": 64})
+    assert returncode == 0
+    assert stdout.strip() == "64"
+
+@pytest.mark.skipif(process_groups.IS_WINDOWS, reason="POSIX process groups")
+def test_timeout_kills_the_whole_group():
+    code = "import subprocess, time; subprocess.Popen(['sleep', '30']); time.sleep(30)"
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_in_group([sys.executable, "-c", code], 0.5)
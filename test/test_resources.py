@@ -0,0 +1,47 @@
+"""Resource capacity, all-or-nothing acquisition and in-place resizing."""
+
+import threading
+import time
+
+from resources import ResourceLocks
+
+def test_try_acquire_is_all_or_nothing():
+    locks = ResourceLocks({"camera": 1, "audio": 1})
+    assert locks.try_acquire(["camera"]) == ["camera"]
+    assert locks.try_acquire(["audio", "camera"]) is None
+    assert locks.stats()["audio"]["holders"] == 0
+    locks.release(["camera"])
+    assert locks.try_acquire(["audio", "camera", "unmanaged"]) == ["audio", "camera"]
+
+def test_acquire_times_out_at_deadline():
+    locks = ResourceLocks({"input": 1})
+    held = locks.acquire(["input"])
+    assert locks.acquire(["input"], time.monotonic() + 0.05) is None
+    locks.release(held)
+    assert locks.stats()["input"]["timeouts"] == 1
+
+def test_resize_while_a_waiter_is_blocked():
+    locks = ResourceLocks({})
+    locks.ensure("module:x", 1)
+    first = locks.acquire(["module:x"])
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(locks.acquire(["module:x"], time.monotonic() + 2)))
+    waiter.start()
+    time.sleep(0.05)
+    locks.ensure("module:x", 2)  # The blocked waiter is admitted against the same counter
+    waiter.join(1)
+    assert got == [["module:x"]]
+    assert locks.try_acquire(["module:x"]) is None  # Bound is 2, not doubled
+    locks.release(first)
+    locks.release(got[0])
+    assert locks.stats()["module:x"]["holders"] == 0
+
+def test_shrinking_admits_nobody_until_holders_drain():
+    locks = ResourceLocks({"audio": 2})
+    a = locks.try_acquire(["audio"])
+    b = locks.try_acquire(["audio"])
+    locks.ensure("audio", 1)
+    locks.release(a)
+    assert locks.try_acquire(["audio"]) is None
+    locks.release(b)
+    assert locks.try_acquire(["audio"]) == ["audio"]
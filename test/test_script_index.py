@@ -0,0 +1,57 @@
+"""Script metadata defaults and editing the display keys in place."""
+
+import pytest
+
+from conftest import WEBAPP_DIR
+from script_index import ScriptInfo, build_script, split_docstring
+
+SOURCE = '''"""
+Name: Camera
+Description: Takes a photo
+Icon: 📸
+Color: #FF6347
+Timeout: 20s
+Runner: warm pool
+Resources: camera
+"""
+
+def action():
+    return "ok"
+'''
+
+def test_runner_defaults_to_subprocess_even_with_action():
+    info = ScriptInfo("x", '"""\nName: X\n"""\n\ndef action():\n    pass\n')
+    assert info.has_action
+    assert info.runner == "subprocess"
+
+def test_build_script_keeps_policy_keys():
+    docstring, code = split_docstring(SOURCE)
+    source = build_script(code, {"Name": "Cam", "Description": "Photo", "Icon": "📷", "Color": None}, docstring)
+    info = ScriptInfo("camera", source)
+    assert (info.name, info.icon, info.color) == ("Cam", "📷", None)
+    assert (info.timeout, info.runner, info.resources) == (20.0, "warm pool", ["camera"])
+    assert source.endswith("def action():\n    return \"ok\"\n")
+
+def test_build_script_adds_missing_display_keys_first():
+    source = build_script('"""\nTimeout: 5s\n"""\nprint(1)', {"Name": "A", "Description": "B", "Icon": "C", "Color": "#fff"})
+    assert split_docstring(source)[0] == "Name: A\nDescription: B\nIcon: C\nColor: #fff\nTimeout: 5s"
+
+def test_editor_save_keeps_other_keys(app_client, tmp_path, monkeypatch):
+    import main
+    client, _ = app_client
+    monkeypatch.setattr(main, "SCRIPTS_DIR", tmp_path)
+    (tmp_path / "camera.py").write_text(SOURCE, encoding="utf-8")
+    response = client.put("/api/scripts/camera", json={
+        "name": "Cam", "description": "Photo", "icon": "📷", "color": None, "code": "def action():\n    return 1"
+    })
+    assert response.status_code == 200
+    info = ScriptInfo("camera", (tmp_path / "camera.py").read_text(encoding="utf-8"))
+    assert response.get_json()["content"] == (tmp_path / "camera.py").read_text(encoding="utf-8")
+    assert (info.name, info.timeout, info.runner, info.resources) == ("Cam", 20.0, "warm pool", ["camera"])
+
+@pytest.mark.parametrize("module_id", ["calculator", "minecraft", "linkedin", "RLCS"])
+def test_launcher_modules_run_in_the_server(module_id):
+    # A worker process would have its own launcher registry, blind to earlier launches
+    source = (WEBAPP_DIR / "scripts" / f"{module_id}.py").read_text(encoding="utf-8")
+    assert "import launcher" in source
+    assert ScriptInfo(module_id, source).runner == "in-process"
@@ -0,0 +1,57 @@
+"""sys.exit() in warm runs maps to the same return codes as a subprocess run."""
+
+import sys
+import threading
+
+import pytest
+
+from conftest import WEBAPP_DIR
+from process_groups import exit_status
+from warm_workers import RepeatWorker, WarmProcessPool
+
+@pytest.mark.parametrize("code, status", [(None, 0), (0, 0), (3, 3), ("bye", 1)])
+def test_exit_status(code, status):
+    assert exit_status(code) == status
+
+@pytest.fixture
+def pool():
+    pool = WarmProcessPool(WEBAPP_DIR / "warm_pool_host.py", lambda: sys.executable)
+    yield pool
+    pool.stop_all()
+
+@pytest.mark.parametrize("call, status", [("sys.exit()", 0), ("sys.exit(None)", 0), ("sys.exit(4)", 4),
+                                          ("sys.exit('failed')", 1)])
+def test_pool_run_exit_codes(pool, tmp_path, call, status):
+    script = tmp_path / "exits.py"
+    script.write_text(f"import sys\n\ndef action():\n    print('ran')\n    {call}\n")
+    return_code, stdout, stderr = pool.run("exits", script, timeout=10)
+    assert return_code == status
+    assert stdout == "ran\n"
+    assert ("failed" in stderr) == (call == "sys.exit('failed')")
+
+@pytest.mark.parametrize("code, errors", [(None, 0), (2, 1)])
+def test_repeat_ends_on_exit(code, errors):
+    finished = threading.Event()
+    worker = RepeatWorker("exits", lambda: sys.exit(code), interval_ms=5, on_finish=lambda w: finished.set())
+    worker.start()
+    assert finished.wait(2)
+    assert worker.ticks == 1 and worker.errors == errors
+    assert worker.stop_reason == f"action exited ({exit_status(code)})"
+
+def test_idle_workers_are_evicted(pool, tmp_path):
+    script = tmp_path / "quick.py"
+    script.write_text("def action():\n    return 'hi'\n")
+    assert pool.run("quick", script, timeout=10)[0] == 0
+    worker = pool.idle["quick"][0]
+    assert pool.run("quick", script, timeout=10)[0] == 0
+    assert pool.spawns == 1  # Reused while fresh
+
+    pool.evict_idle(max_idle=0)
+    assert pool.stats()["idle"] == {} and pool.stats()["evictions"] == 1
+    assert worker.proc.wait(5) is not None
+
+    # An acquire also evicts workers past the pool's max_idle
+    pool.max_idle = 0
+    pool.run("quick", script, timeout=10)
+    pool.run("quick", script, timeout=10)
+    assert pool.spawns == 3
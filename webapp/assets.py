@@ -0,0 +1,151 @@
+"""
+Build-free static asset pipeline.
+
+At startup every file under static/ is hashed and precompressed once (gzip,
+and brotli when the optional brotli package is installed). Templates link to
+content-hashed URLs, so those responses can be cached forever by the browser.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+from pathlib import Path
+from flask import Response, request, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+MIN_COMPRESS_SIZE = 512  # Not worth compressing below this
+
+class Asset:
+    """One static file with its hashed URL and precompressed variants"""
+
+    def __init__(self, path, data, mimetype):
+        self.path = path
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(data).hexdigest()[:12]
+        stem, dot, suffix = path.rpartition(".")
+        self.hashed_path = f"{stem}.{self.etag}.{suffix}" if dot else f"{path}.{self.etag}"
+        self.variants = encode_variants(data, mimetype)
+
+def encode_variants(data, mimetype):
+    """Precompress a payload once - returns {encoding: bytes}"""
+    variants = {"identity": data}
+    if len(data) < MIN_COMPRESS_SIZE or not mimetype.startswith(COMPRESSIBLE_TYPES):
+        return variants
+
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        variants["gzip"] = gz
+    if brotli:
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            variants["br"] = br
+    return variants
+
+def parse_accept_encoding(header):
+    """"gzip, br;q=0.5, *;q=0" -> {"gzip": 1.0, "br": 0.5, "*": 0.0}"""
+    weights = {}
+    for part in (header or "").split(","):
+        token, *params = [p.strip() for p in part.split(";")]
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[token.lower()] = q
+    return weights
+
+def negotiate(variants, accept_encoding=None):
+    """Pick the smallest variant the client accepts - encodings with q=0 are refused"""
+    if accept_encoding is None:
+        accept_encoding = request.headers.get("Accept-Encoding", "")
+    weights = parse_accept_encoding(accept_encoding)
+    for encoding in ("br", "gzip"):
+        if encoding in variants and weights.get(encoding, weights.get("*", 0.0)) > 0:
+            return encoding
+    return "identity"
+
+def make_response(variants, mimetype, etag, cache_control):
+    """Serve a precompressed payload with conditional GET support"""
+    if etag and request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        encoding = negotiate(variants)
+        response = Response(variants[encoding], mimetype=mimetype)
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+    if etag:
+        response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+class AssetPipeline:
+    """Hash and precompress static files, serve them under immutable URLs"""
+
+    def __init__(self, app, url_prefix="/assets"):
+        self.app = app
+        self.static_dir = Path(app.static_folder)
+        self.url_prefix = url_prefix
+        self.assets = {}  # Logical path -> Asset
+        self.by_hashed_path = {}  # Hashed path -> Asset
+        self.index_cache = {}  # Template name -> (variants, etag)
+
+        app.add_url_rule(f"{url_prefix}/<path:hashed_path>", "hashed_asset", self.serve)
+        app.jinja_env.globals["asset_url"] = self.url_for
+        self.build()
+
+    def build(self):
+        """Hash and precompress every static file"""
+        self.assets.clear()
+        self.by_hashed_path.clear()
+        self.index_cache.clear()
+        if not self.static_dir.exists():
+            return
+
+        for file_path in sorted(self.static_dir.rglob("*")):
+            if not file_path.is_file():
+                continue
+            rel_path = file_path.relative_to(self.static_dir).as_posix()
+            mimetype = mimetypes.guess_type(rel_path)[0] or "application/octet-stream"
+            asset = Asset(rel_path, file_path.read_bytes(), mimetype)
+            self.assets[rel_path] = asset
+            self.by_hashed_path[asset.hashed_path] = asset
+
+        encodings = "gzip, br" if brotli else "gzip"
+        print(f"📦 Prepared {len(self.assets)} static assets ({encodings})")
+
+    def url_for(self, filename):
+        """URL of the hashed asset, falling back to plain /static for unknown files"""
+        asset = self.assets.get(filename)
+        if not asset:
+            return url_for("static", filename=filename)
+        return f"{self.url_prefix}/{asset.hashed_path}"
+
+    def serve(self, hashed_path):
+        """Serve a hashed asset - its URL changes with its content, so cache it forever"""
+        asset = self.by_hashed_path.get(hashed_path)
+        if not asset:
+            return Response("Not found", status=404)
+        return make_response(asset.variants, asset.mimetype, asset.etag, IMMUTABLE_CACHE)
+
+    def render_cached(self, template_name, render):
+        """Render a page once per process and serve its precompressed bytes afterwards"""
+        cached = self.index_cache.get(template_name)
+        if cached is None:
+            data = render().encode("utf-8")
+            cached = (encode_variants(data, "text/html"), hashlib.sha256(data).hexdigest()[:12])
+            self.index_cache[template_name] = cached
+        variants, etag = cached
+        # The page itself must revalidate so new asset hashes are picked up
+        return make_response(variants, "text/html; charset=utf-8", etag, "no-cache")
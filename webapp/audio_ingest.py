@@ -0,0 +1,391 @@
+"""
+Host-side ingest for the ESP32 microphone stream.
+
+The device serves 16 kHz mono int16 PCM at /audio.wav - a 44-byte WAV header
+followed by raw samples for as long as the connection stays open - to at most
+five clients. The host holds a single connection and reads it straight into a
+preallocated NumPy ring buffer: socket reads land in the ring's memory, with
+no intermediate bytes objects.
+
+Every complete block gets its RMS and peak computed in one vectorized pass
+over all the blocks that arrived since the last read. The noise floor is a low
+percentile of recent block RMS. Other stages (triggers, recorder, relay,
+spectrum) either register a block listener or read the ring by absolute
+sample index.
+
+Run this file directly to ingest a fake PCM source for a few seconds.
+"""
+
+import threading
+import time
+import urllib.request
+import wave
+import numpy as np
+
+SAMPLE_RATE = 16000
+BLOCK_SAMPLES = 512  # 32 ms at 16 kHz
+RING_SECONDS = 10
+NOISE_FLOOR_SECONDS = 5
+NOISE_FLOOR_PERCENTILE = 10
+WAV_HEADER_BYTES = 44
+FULL_SCALE = 32768.0
+RECONNECT_SECONDS = 2.0
+READ_CHUNK_BYTES = 4096
+
+def to_dbfs(level):
+    """Linear level (0-1) to dBFS, floored at -120"""
+    return float(20 * np.log10(max(level, 1e-6)))
+
+class PcmRing:
+    """Preallocated int16 ring addressed by absolute sample index"""
+
+    def __init__(self, seconds=RING_SECONDS, rate=SAMPLE_RATE):
+        self.capacity = int(seconds * rate)
+        self.samples = np.zeros(self.capacity, dtype=np.int16)
+        self.raw = memoryview(self.samples).cast('B')  # Byte view sources read into
+        self.bytes_written = 0  # Total ever written, so odd-sized reads are fine
+
+    @property
+    def total(self):
+        """Absolute index one past the newest complete sample"""
+        return self.bytes_written // 2
+
+    def fill_from(self, source, max_bytes=READ_CHUNK_BYTES):
+        """Read from a source directly into the ring - returns bytes read (0 at end of stream)"""
+        offset = self.bytes_written % len(self.raw)
+        view = self.raw[offset:min(offset + max_bytes, len(self.raw))]
+        n = source.readinto(view)
+        self.bytes_written += n or 0
+        return n or 0
+
+    def realign(self):
+        """Drop a trailing half sample - a new stream starts on a sample boundary.
+
+        Without this, a stream that dropped after an odd number of bytes would
+        leave every later sample byte-shifted.
+        """
+        if self.bytes_written % 2:
+            self.bytes_written -= 1
+
+    def write(self, pcm):
+        """Copy int16 samples in (for sources that produce arrays rather than filling buffers)"""
+        data = memoryview(np.ascontiguousarray(pcm, dtype=np.int16)).cast('B')
+        while len(data):
+            offset = self.bytes_written % len(self.raw)
+            n = min(len(data), len(self.raw) - offset)
+            self.raw[offset:offset + n] = data[:n]
+            self.bytes_written += n
+            data = data[n:]
+
+    def oldest(self):
+        """Oldest sample index still held"""
+        return max(0, self.total - self.capacity)
+
+    def read(self, start, count):
+        """Copy of samples [start, start + count) - None if they were already overwritten or haven't arrived"""
+        if start < self.oldest() or start + count > self.total or count <= 0:
+            return None
+        begin = start % self.capacity
+        end = begin + count
+        if end <= self.capacity:
+            out = self.samples[begin:end].copy()
+        else:
+            out = np.concatenate((self.samples[begin:], self.samples[:end - self.capacity]))
+        # The writer may have lapped us while we copied
+        return out if start >= self.oldest() else None
+
+class HttpPcmSource:
+    """The device's /audio.wav stream"""
+
+    def __init__(self, url, timeout=5.0):
+        self.url = url
+        self.timeout = timeout
+        self.response = None
+
+    def open(self):
+        """Connect and skip the WAV header"""
+        self.response = urllib.request.urlopen(self.url, timeout=self.timeout)
+        header = self.response.read(WAV_HEADER_BYTES)
+        if len(header) < WAV_HEADER_BYTES:
+            raise ConnectionError("audio stream ended before the WAV header")
+
+    def readinto(self, buffer):
+        """Fill part of buffer with PCM bytes"""
+        return self.response.readinto(buffer)
+
+    def close(self):
+        """Drop the connection"""
+        if self.response:
+            self.response.close()
+            self.response = None
+
+    def describe(self):
+        """Where the audio comes from"""
+        return self.url
+
+class WavFileSource:
+    """16-bit mono WAV file - for recorded fixtures and benchmarks"""
+
+    def __init__(self, path, realtime=False, loop=False):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.wav = None
+        self.started = None
+        self.delivered = 0
+
+    def open(self):
+        """Open the file and check its format"""
+        self.wav = wave.open(str(self.path), 'rb')
+        if self.wav.getsampwidth() != 2 or self.wav.getnchannels() != 1:
+            raise ValueError(f"{self.path} is not 16-bit mono")
+        self.rate = self.wav.getframerate()
+        self.started = time.monotonic()
+
+    def readinto(self, buffer):
+        """Fill buffer with the next frames, paced to real time if asked"""
+        frames = len(buffer) // 2
+        if self.realtime:
+            due = int((time.monotonic() - self.started) * self.rate) - self.delivered
+            while due <= 0:
+                time.sleep(BLOCK_SAMPLES / self.rate)
+                due = int((time.monotonic() - self.started) * self.rate) - self.delivered
+            frames = min(frames, due)
+        data = self.wav.readframes(frames)
+        if not data and self.loop:
+            self.wav.rewind()
+            data = self.wav.readframes(frames)
+        buffer[:len(data)] = data
+        self.delivered += len(data) // 2
+        return len(data)
+
+    def close(self):
+        """Close the file"""
+        if self.wav:
+            self.wav.close()
+            self.wav = None
+
+    def describe(self):
+        """Where the audio comes from"""
+        return str(self.path)
+
+class FakePcmSource:
+    """Synthetic microphone: a tone over background noise, with optional clicks (claps)"""
+
+    def __init__(self, rate=SAMPLE_RATE, frequency=440.0, tone_level=0.05, noise_level=0.01,
+                 clicks=(), realtime=True, duration=None, seed=0):
+        self.rate = rate
+        self.frequency = frequency
+        self.tone_level = tone_level
+        self.noise_level = noise_level
+        self.clicks = sorted(clicks)  # Seconds from the start
+        self.realtime = realtime
+        self.duration = duration
+        self.rng = np.random.default_rng(seed)
+        self.position = 0
+        self.started = None
+
+    def open(self):
+        """Start the clock"""
+        self.started = time.monotonic()
+
+    def render(self, start, count):
+        """Samples [start, start + count) as int16"""
+        t = np.arange(start, start + count) / self.rate
+        x = (self.tone_level * np.sin(2 * np.pi * self.frequency * t)).astype(np.float32)
+        x += self.noise_level * self.rng.standard_normal(count).astype(np.float32)
+        for at in self.clicks:
+            first = int(at * self.rate)
+            length = int(0.03 * self.rate)  # 30 ms decaying burst
+            lo, hi = max(first, start), min(first + length, start + count)
+            if lo < hi:
+                n = np.arange(lo - first, hi - first)
+                burst = 0.8 * np.exp(-n / (0.005 * self.rate)) * self.rng.standard_normal(hi - lo)
+                x[lo - start:hi - start] += burst.astype(np.float32)
+        return (np.clip(x, -1, 1) * 32767).astype(np.int16)
+
+    def readinto(self, buffer):
+        """Fill buffer with the next samples, paced to real time unless realtime=False"""
+        count = len(buffer) // 2
+        if self.duration is not None:
+            count = min(count, int(self.duration * self.rate) - self.position)
+            if count <= 0:
+                return 0
+        if self.realtime:
+            due = int((time.monotonic() - self.started) * self.rate) - self.position
+            while due < BLOCK_SAMPLES:
+                time.sleep((BLOCK_SAMPLES - due) / self.rate)
+                due = int((time.monotonic() - self.started) * self.rate) - self.position
+            count = min(count, due)
+        buffer[:count * 2] = memoryview(self.render(self.position, count)).cast('B')
+        self.position += count
+        return count * 2
+
+    def close(self):
+        """Nothing to release"""
+
+    def describe(self):
+        """Where the audio comes from"""
+        return "fake"
+
+class AudioIngest:
+    """One reader thread: source -> ring buffer -> per-block level features -> listeners"""
+
+    def __init__(self, rate=SAMPLE_RATE, block=BLOCK_SAMPLES, ring_seconds=RING_SECONDS):
+        self.rate = rate
+        self.block = block
+        self.ring = PcmRing(ring_seconds, rate)
+        history = int(ring_seconds * rate // block)
+        self.block_rms = np.zeros(history, dtype=np.float32)
+        self.block_peak = np.zeros(history, dtype=np.float32)
+        self.floor_blocks = max(1, int(NOISE_FLOOR_SECONDS * rate // block))
+        self.blocks = 0  # Blocks processed so far
+        self.noise_floor = 0.0
+        self.listeners = []
+        self.source = None
+        self.source_factory = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.connected = False
+        self.reconnects = 0
+        self.read_calls = 0
+        self.listener_errors = 0
+        self.processing_time = 0.0
+        self.last_error = None
+
+    # ---- lifecycle ----
+
+    def start(self, source_factory):
+        """Start ingesting from source_factory() (called again on every reconnect)"""
+        self.stop()
+        self.source_factory = source_factory
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(self.stop_event,), name="audio-ingest", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the reader thread"""
+        self.stop_event.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2)
+        self.thread = None
+
+    def running(self):
+        """Reader thread alive"""
+        return bool(self.thread and self.thread.is_alive())
+
+    def add_listener(self, listener):
+        """listener(first_block, start_sample, rms, peak, noise_floor) for each batch of new blocks.
+
+        Called on the ingest thread with arrays covering the new blocks, so it
+        must only do vectorized work or hand off to another thread.
+        """
+        self.listeners.append(listener)
+
+    def _run(self, stop_event):
+        """Connect, read, process - reconnecting until stopped"""
+        while not stop_event.is_set():
+            source = self.source_factory()
+            try:
+                source.open()
+                self.ring.realign()
+                self.source = source
+                self.connected = True
+                self.last_error = None
+                while not stop_event.is_set():
+                    self.read_calls += 1
+                    if not self.ring.fill_from(source):
+                        break  # End of stream
+                    self.process()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Audio ingest error: {e}")
+            finally:
+                self.connected = False
+                source.close()
+            if not stop_event.wait(RECONNECT_SECONDS):
+                self.reconnects += 1
+
+    # ---- features ----
+
+    def process(self):
+        """Compute level features for every complete block not processed yet"""
+        first = self.blocks
+        start = first * self.block
+        count = (self.ring.total - start) // self.block
+        if count <= 0:
+            return
+        started = time.perf_counter()
+        pcm = self.ring.read(start, count * self.block)
+        if pcm is None:
+            # Fell more than a ring behind - skip to what is still held
+            self.blocks = -(-self.ring.oldest() // self.block)
+            return
+        x = pcm.reshape(count, self.block).astype(np.float32) / FULL_SCALE
+        rms = np.sqrt(np.mean(x * x, axis=1))
+        peak = np.max(np.abs(x), axis=1)
+
+        slots = np.arange(first, first + count) % len(self.block_rms)
+        self.block_rms[slots] = rms
+        self.block_peak[slots] = peak
+        self.blocks = first + count
+        self.noise_floor = float(np.percentile(self.recent(self.block_rms, self.floor_blocks), NOISE_FLOOR_PERCENTILE))
+        self.processing_time += time.perf_counter() - started
+
+        for listener in self.listeners:
+            try:
+                listener(first, start, rms, peak, self.noise_floor)
+            except Exception as e:
+                self.listener_errors += 1
+                print(f"Audio listener error: {e}")
+
+    def recent(self, history, n):
+        """The last n per-block values, oldest first"""
+        n = min(n, self.blocks, len(history))
+        slots = np.arange(self.blocks - n, self.blocks) % len(history)
+        return history[slots]
+
+    def level_frame(self, seconds, points=16):
+        """Compact level frame covering the last `seconds`: current levels plus a quantized envelope"""
+        n = max(1, int(seconds * self.rate // self.block))
+        peaks = self.recent(self.block_peak, n)
+        rms = self.recent(self.block_rms, n)
+        if not len(rms):
+            return {"rms": 0.0, "peak": 0.0, "noise_floor": 0.0, "dbfs": -120.0, "envelope": [], "blocks": 0}
+        # Downsample the envelope to at most `points` values, 0-255
+        chunks = np.array_split(peaks, min(points, len(peaks)))
+        envelope = [int(min(c.max(), 1.0) * 255) for c in chunks]
+        return {
+            "rms": round(float(rms[-1]), 5),
+            "peak": round(float(peaks.max()), 5),
+            "noise_floor": round(self.noise_floor, 5),
+            "dbfs": round(to_dbfs(float(rms[-1])), 1),
+            "envelope": envelope,
+            "blocks": self.blocks
+        }
+
+    def stats(self):
+        """Connection state and ingest counters"""
+        audio_seconds = self.ring.total / self.rate
+        return {
+            "running": self.running(),
+            "connected": self.connected,
+            "source": self.source.describe() if self.source else None,
+            "samples": self.ring.total,
+            "blocks": self.blocks,
+            "read_calls": self.read_calls,
+            "reconnects": self.reconnects,
+            "listener_errors": self.listener_errors,
+            "noise_floor_dbfs": round(to_dbfs(self.noise_floor), 1),
+            "cpu_ms_per_audio_second": round(self.processing_time / audio_seconds * 1000, 3) if audio_seconds else 0.0,
+            "last_error": self.last_error
+        }
+
+if __name__ == "__main__":
+    ingest = AudioIngest()
+    ingest.start(lambda: FakePcmSource(clicks=(1.0, 1.3), duration=3.0))
+    for _ in range(6):
+        time.sleep(0.5)
+        print(ingest.level_frame(0.5))
+    ingest.stop()
+    print(ingest.stats())
@@ -0,0 +1,258 @@
+"""
+Rolling WAV recorder for the microphone stream.
+
+The ingest ring always holds the last RING_SECONDS of audio, so a trigger can
+save what was heard before it fired (pre-roll) as well as after (post-roll).
+The ingest thread only notes how far the stream has got; a background writer
+thread copies samples out of the ring and writes them through a buffered file,
+so a slow disk never holds up ingest. If the writer falls so far behind that
+the ring overwrites audio it hadn't saved yet, the lost samples are counted
+rather than waited for. The same goes for post-roll that never arrives because
+the stream stopped or stalled.
+
+A trigger while a recording is still running extends that recording instead of
+starting an overlapping one. Files are split once they reach max_file_bytes,
+and the oldest recordings are deleted beyond max_files / max_total_bytes.
+"""
+
+import threading
+import time
+import wave
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_PRE_ROLL = 5.0
+DEFAULT_POST_ROLL = 5.0
+MAX_FILE_BYTES = 16 * 1024 * 1024  # ~8.7 minutes of 16 kHz mono per file
+MAX_TOTAL_BYTES = 256 * 1024 * 1024
+MAX_FILES = 100
+WRITE_BUFFER_BYTES = 256 * 1024
+WRITE_CHUNK_SECONDS = 1.0  # Most audio copied out of the ring per write
+STALL_SECONDS = 3.0  # Post-roll given up on after this long without new samples
+
+class Recording:
+    """One triggered recording: the sample range it covers and how far it got"""
+
+    def __init__(self, recording_id, label, start, end, rate):
+        self.id = recording_id
+        self.label = label
+        self.start = start  # Absolute sample indices, [start, end)
+        self.end = end
+        self.next = start  # Next sample to write
+        self.rate = rate
+        self.files = []
+        self.bytes = 0
+        self.dropped_samples = 0
+        self.triggers = 1
+        self.finished = False
+
+    def info(self):
+        """Progress as JSON"""
+        return {
+            "id": self.id,
+            "label": self.label,
+            "seconds": round((self.end - self.start) / self.rate, 2),
+            "written_seconds": round((self.next - self.start - self.dropped_samples) / self.rate, 2),
+            "files": [f.name for f in self.files],
+            "bytes": self.bytes,
+            "dropped_samples": self.dropped_samples,
+            "triggers": self.triggers,
+            "finished": self.finished
+        }
+
+class AudioRecorder:
+    """Save pre-roll + post-roll around triggers, without ever blocking the ingest thread"""
+
+    def __init__(self, ingest, directory, pre_roll=DEFAULT_PRE_ROLL, post_roll=DEFAULT_POST_ROLL,
+                 max_file_bytes=MAX_FILE_BYTES, max_total_bytes=MAX_TOTAL_BYTES, max_files=MAX_FILES,
+                 stall_seconds=STALL_SECONDS):
+        self.ingest = ingest
+        self.directory = Path(directory)
+        # Pre-roll can't reach further back than the ring holds (less a second of slack)
+        self.max_pre_roll = max(0.0, ingest.ring.capacity / ingest.rate - 1.0)
+        self.pre_roll = min(pre_roll, self.max_pre_roll)
+        self.post_roll = post_roll
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self.max_files = max_files
+        self.stall_seconds = stall_seconds
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.active = None  # Recording being written
+        self.history = deque(maxlen=20)  # Finished recordings
+        self.ids = 0
+        self.thread = None
+        self.retention_deleted = 0
+        self.notify_calls = 0
+        self.notify_max_seconds = 0.0
+        ingest.add_listener(self.on_blocks)
+
+    def on_blocks(self, first_block, start_sample, rms, peak, noise_floor):
+        """AudioIngest listener - just wake the writer if it has something to do"""
+        started = time.perf_counter()
+        if self.active:
+            self.wakeup.set()
+        self.notify_calls += 1
+        self.notify_max_seconds = max(self.notify_max_seconds, time.perf_counter() - started)
+
+    def trigger(self, label="", pre_roll=None, post_roll=None):
+        """Record around now - extends the running recording if there is one"""
+        pre_roll = min(self.pre_roll if pre_roll is None else max(0.0, pre_roll), self.max_pre_roll)
+        post_roll = self.post_roll if post_roll is None else max(0.0, post_roll)
+        rate = self.ingest.rate
+        now = self.ingest.ring.total
+        with self.lock:
+            if self.active and not self.active.finished:
+                self.active.end = max(self.active.end, now + int(post_roll * rate))
+                self.active.triggers += 1
+                return self.active
+            self.ids += 1
+            start = max(now - int(pre_roll * rate), self.ingest.ring.oldest())
+            self.active = Recording(self.ids, label, start, now + int(post_roll * rate), rate)
+            recording = self.active
+            if not (self.thread and self.thread.is_alive()):
+                self.thread = threading.Thread(target=self._run, name="audio-recorder", daemon=True)
+                self.thread.start()
+        self.wakeup.set()
+        return recording
+
+    # ---- writer thread ----
+
+    def _run(self):
+        """Write active recordings as their audio arrives"""
+        while True:
+            self.wakeup.wait(1.0)
+            self.wakeup.clear()
+            with self.lock:
+                recording = self.active
+            if recording is None:
+                continue
+            try:
+                self._write(recording)
+            except OSError as e:
+                print(f"Audio recorder error: {e}")
+                self._finish(recording)
+
+    def _write(self, recording):
+        """Write whatever of the recording is available, then finish it if complete"""
+        ring = self.ingest.ring
+        writer = None
+        last_total = ring.total
+        last_progress = time.monotonic()
+        while True:
+            with self.lock:
+                end = recording.end
+            total = ring.total
+            if total != last_total:
+                last_total, last_progress = total, time.monotonic()
+            available = min(end, total)
+            if recording.next >= available:
+                if recording.next >= end:
+                    break
+                if not self.ingest.running() or time.monotonic() - last_progress > self.stall_seconds:
+                    # The stream stopped - the post-roll still missing will never come
+                    recording.dropped_samples += end - recording.next
+                    recording.next = end
+                    break
+                if writer:
+                    writer.flush()
+                self.wakeup.wait(min(1.0, self.stall_seconds))
+                self.wakeup.clear()
+                continue
+            if recording.next < ring.oldest():
+                # Overwritten before we got to it
+                skipped = ring.oldest() - recording.next
+                recording.dropped_samples += skipped
+                recording.next += skipped
+                continue
+            count = min(available - recording.next, int(WRITE_CHUNK_SECONDS * recording.rate))
+            pcm = ring.read(recording.next, count)
+            if pcm is None:
+                continue  # Lapped while copying - the check above will skip ahead
+            if writer is None or writer.size + pcm.nbytes > self.max_file_bytes:
+                if writer:
+                    writer.close()
+                writer = self._open(recording)
+            writer.write(pcm)
+            recording.bytes += pcm.nbytes
+            recording.next += count
+        if writer:
+            writer.close()
+        self._finish(recording)
+
+    def _open(self, recording):
+        """Next part file of a recording"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        part = f"-{len(recording.files) + 1}" if recording.files else ""
+        path = self.directory / f"{stamp}-{recording.id}{part}.wav"
+        recording.files.append(path)
+        return WavWriter(path, recording.rate)
+
+    def _finish(self, recording):
+        """Mark a recording done and apply the retention policy"""
+        with self.lock:
+            recording.finished = True
+            if self.active is recording:
+                self.active = None
+            self.history.append(recording)
+        self.apply_retention()
+
+    def apply_retention(self):
+        """Delete the oldest recordings beyond max_files / max_total_bytes"""
+        files = sorted(self.directory.glob("*.wav"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        while files and (len(files) > self.max_files or total > self.max_total_bytes):
+            oldest = files.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink()
+            self.retention_deleted += 1
+
+    def recordings(self):
+        """Saved files, newest first"""
+        if not self.directory.exists():
+            return []
+        files = sorted(self.directory.glob("*.wav"), key=lambda p: p.stat().st_mtime, reverse=True)
+        return [{"name": p.name, "bytes": p.stat().st_size, "modified": p.stat().st_mtime} for p in files]
+
+    def stats(self):
+        """Active/finished recordings, drop counters and how long the ingest hook takes"""
+        with self.lock:
+            active = self.active.info() if self.active else None
+            history = [r.info() for r in self.history]
+        return {
+            "active": active,
+            "recent": history,
+            "dropped_samples": sum(r["dropped_samples"] for r in history) + (active["dropped_samples"] if active else 0),
+            "retention_deleted": self.retention_deleted,
+            "ingest_notify_calls": self.notify_calls,
+            "ingest_notify_max_ms": round(self.notify_max_seconds * 1000, 4),
+            "pre_roll": self.pre_roll,
+            "post_roll": self.post_roll
+        }
+
+class WavWriter:
+    """Mono 16-bit WAV through a large write buffer"""
+
+    def __init__(self, path, rate):
+        self.file = open(path, 'wb', buffering=WRITE_BUFFER_BYTES)
+        self.wav = wave.open(self.file, 'wb')
+        self.wav.setnchannels(1)
+        self.wav.setsampwidth(2)
+        self.wav.setframerate(rate)
+        self.size = 44
+
+    def write(self, pcm):
+        """Append int16 samples"""
+        self.wav.writeframesraw(pcm.tobytes())
+        self.size += pcm.nbytes
+
+    def flush(self):
+        """Push buffered audio to disk while waiting for more"""
+        self.file.flush()
+
+    def close(self):
+        """Fix up the header sizes and close"""
+        self.wav.close()
+        self.file.close()
@@ -0,0 +1,177 @@
+"""
+Fan-out relay for the microphone stream.
+
+The device can serve at most five streams, and every stream costs it CPU and
+airtime. The host already holds the one connection (AudioIngest); the relay
+re-serves that audio to any number of listeners, so device load stays the
+same however many dashboards or scripts are listening.
+
+Each listener picks a format - sample rate (16000 or an integer fraction of
+it) and codec ("pcm" 16-bit or "ulaw" 8-bit G.711) - and gets a bounded queue
+of encoded chunks. A listener that falls behind loses its oldest chunks
+rather than delaying the ingest thread or the other listeners. Every format
+is encoded once per batch, however many listeners share it.
+"""
+
+import itertools
+import struct
+import threading
+import time
+from collections import deque
+import numpy as np
+
+DEFAULT_BUFFER_SECONDS = 2.0  # Per-listener queue bound
+CODECS = ("pcm", "ulaw")
+ULAW_BIAS = 0x84
+ULAW_CLIP = 32635
+
+def ulaw_encode(pcm):
+    """int16 samples to G.711 u-law bytes (vectorized)"""
+    x = pcm.astype(np.int32)
+    sign = np.where(x < 0, 0x80, 0).astype(np.int32)
+    magnitude = np.minimum(np.abs(x), ULAW_CLIP) + ULAW_BIAS
+    exponent = np.floor(np.log2(magnitude)).astype(np.int32) - 7
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8).tobytes()
+
+def downsample(pcm, factor):
+    """Average groups of `factor` samples - a cheap low-pass plus decimation"""
+    if factor == 1:
+        return pcm
+    usable = len(pcm) - len(pcm) % factor
+    return pcm[:usable].reshape(-1, factor).mean(axis=1).astype(np.int16)
+
+def wav_header(rate, codec):
+    """Header for an open-ended WAV stream (sizes set to the maximum)"""
+    if codec == "ulaw":
+        format_tag, width = 7, 1
+    else:
+        format_tag, width = 1, 2
+    return (b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, format_tag, 1, rate, rate * width, width, width * 8)
+            + b"data" + struct.pack("<I", 0xFFFFFFFF))
+
+class RelayListener:
+    """One listener's format, bounded chunk queue and counters"""
+
+    def __init__(self, listener_id, rate, codec, max_chunks, description=""):
+        self.id = listener_id
+        self.rate = rate
+        self.codec = codec
+        self.description = description
+        self.queue = deque(maxlen=max_chunks)  # Encoded chunks - drop oldest
+        self.wakeup = threading.Condition()
+        self.connected = True
+        self.since = time.time()
+        self.sent_bytes = 0
+        self.dropped = 0
+
+    def put(self, chunk):
+        """Queue a chunk, dropping the oldest when full"""
+        with self.wakeup:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append(chunk)
+            self.wakeup.notify()
+
+    def chunks(self, poll_seconds=1.0):
+        """WAV header, then chunks as they arrive - until the listener is removed"""
+        yield wav_header(self.rate, self.codec)
+        while self.connected:
+            with self.wakeup:
+                if not self.queue:
+                    self.wakeup.wait(poll_seconds)
+                pending = b"".join(self.queue)
+                self.queue.clear()
+            if pending:
+                self.sent_bytes += len(pending)
+                yield pending
+
+    def stats(self):
+        """Format, queue depth and counters"""
+        return {
+            "id": self.id,
+            "rate": self.rate,
+            "codec": self.codec,
+            "client": self.description,
+            "queued": len(self.queue),
+            "sent_bytes": self.sent_bytes,
+            "dropped": self.dropped,
+            "seconds": round(time.time() - self.since, 1)
+        }
+
+class AudioRelay:
+    """Re-serve the ingested stream to many listeners from one device connection"""
+
+    def __init__(self, ingest, buffer_seconds=DEFAULT_BUFFER_SECONDS):
+        self.ingest = ingest
+        self.buffer_seconds = buffer_seconds
+        self.listeners = {}  # id -> RelayListener
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.encode_time = 0.0
+        self.batches = 0
+        self.listeners_total = 0
+        self.dropped_removed = 0  # Drops of listeners that have since left
+        ingest.add_listener(self.on_blocks)
+
+    def rates(self):
+        """Sample rates a listener can ask for"""
+        return [self.ingest.rate // factor for factor in (1, 2, 4)]
+
+    def add(self, rate=None, codec="pcm", description=""):
+        """Register a listener - raises ValueError for a format the relay can't produce"""
+        rate = int(rate or self.ingest.rate)
+        if rate not in self.rates():
+            raise ValueError(f"Unsupported rate {rate} (use one of {self.rates()})")
+        if codec not in CODECS:
+            raise ValueError(f"Unsupported codec {codec} (use one of {list(CODECS)})")
+        # Queue bound in chunks: one chunk per ingest batch of at least one block
+        max_chunks = max(4, int(self.buffer_seconds * self.ingest.rate / self.ingest.block))
+        listener = RelayListener(next(self.ids), rate, codec, max_chunks, description)
+        with self.lock:
+            self.listeners[listener.id] = listener
+            self.listeners_total += 1
+        return listener
+
+    def remove(self, listener):
+        """Unregister a listener and wake its generator so it returns"""
+        with self.lock:
+            if self.listeners.pop(listener.id, None):
+                self.dropped_removed += listener.dropped
+        with listener.wakeup:
+            listener.connected = False
+            listener.wakeup.notify()
+
+    def on_blocks(self, first_block, start_sample, rms, peak, noise_floor):
+        """AudioIngest listener - encode the new blocks once per format and queue them"""
+        with self.lock:
+            listeners = list(self.listeners.values())
+        if not listeners:
+            return
+        started = time.perf_counter()
+        pcm = self.ingest.ring.read(start_sample, len(rms) * self.ingest.block)
+        if pcm is None:
+            return
+        encoded = {}
+        for listener in listeners:
+            key = (listener.rate, listener.codec)
+            if key not in encoded:
+                samples = downsample(pcm, self.ingest.rate // listener.rate)
+                encoded[key] = ulaw_encode(samples) if listener.codec == "ulaw" else samples.tobytes()
+            listener.put(encoded[key])
+        self.encode_time += time.perf_counter() - started
+        self.batches += 1
+
+    def stats(self):
+        """Listeners, drops and the (constant) load on the device"""
+        with self.lock:
+            listeners = [l.stats() for l in self.listeners.values()]
+        return {
+            "listeners": listeners,
+            "listeners_total": self.listeners_total,
+            "device_connections": 1 if self.ingest.connected else 0,
+            "dropped": self.dropped_removed + sum(l["dropped"] for l in listeners),
+            "batches": self.batches,
+            "encode_ms_per_batch": round(self.encode_time / self.batches * 1000, 3) if self.batches else 0.0
+        }
@@ -0,0 +1,151 @@
+"""
+Spectrum features for the microphone stream.
+
+Runs as an AudioIngest block listener. Each batch of new blocks becomes one 2-D
+array, windowed and transformed with a single rfft call; band energies are a
+matrix product with a precomputed band-membership matrix, and the spectral
+centroid a weighted mean - no per-sample or per-bin Python loops.
+
+The UI gets a compact frame at a fixed rate: log-spaced band levels quantized
+to 0-255 (the loudest block since the previous frame) and the centroid.
+
+Run this file directly for a throughput benchmark: how many seconds of audio
+one core analyses per second, i.e. how many real-time streams it could keep
+up with.
+"""
+
+import sys
+import threading
+import time
+import numpy as np
+
+FFT_SIZE = 512  # One block at 16 kHz - 31.25 Hz bins
+BANDS = 16
+LOW_HZ = 60.0
+FLOOR_DB = -100.0  # Quantization range for band levels
+CEILING_DB = 0.0
+FULL_SCALE = 32768.0
+
+def band_matrix(rate, fft_size, bands, low_hz=LOW_HZ):
+    """(bins, bands) 0/1 matrix grouping rfft bins into log-spaced bands"""
+    freqs = np.fft.rfftfreq(fft_size, 1.0 / rate)
+    edges = np.geomspace(low_hz, rate / 2, bands + 1)
+    which = np.searchsorted(edges, freqs, side='right') - 1  # Band index per bin, -1/bands outside
+    matrix = np.zeros((len(freqs), bands), dtype=np.float32)
+    inside = (which >= 0) & (which < bands)
+    matrix[np.flatnonzero(inside), which[inside]] = 1.0
+    # Low bands narrower than a bin get the bin their centre falls in
+    centres = np.sqrt(edges[:-1] * edges[1:])
+    empty = matrix.sum(axis=0) == 0
+    matrix[np.rint(centres[empty] / (rate / fft_size)).astype(int), np.flatnonzero(empty)] = 1.0
+    return matrix, edges
+
+class SpectrumAnalyzer:
+    """Windowed FFT, band energies and spectral centroid over whole batches of blocks"""
+
+    def __init__(self, rate=16000, fft_size=FFT_SIZE, bands=BANDS):
+        self.rate = rate
+        self.fft_size = fft_size
+        self.window = np.hanning(fft_size).astype(np.float32)
+        # Scale so a full-scale sine reads about 0 dB in its band
+        self.scale = (2.0 / self.window.sum()) ** 2
+        self.freqs = np.fft.rfftfreq(fft_size, 1.0 / rate).astype(np.float32)
+        self.bands, self.edges = band_matrix(rate, fft_size, bands)
+
+    def analyse(self, pcm):
+        """int16 samples (a multiple of fft_size) -> (band dB per frame, centroid Hz per frame)"""
+        frames = pcm.reshape(-1, self.fft_size).astype(np.float32) * (1.0 / FULL_SCALE)
+        power = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2 * self.scale
+        band_db = 10 * np.log10(power @ self.bands + 1e-12)
+        total = power.sum(axis=1)
+        centroid = (power @ self.freqs) / np.maximum(total, 1e-12)
+        return band_db, centroid
+
+def quantize(band_db):
+    """Band levels in dB -> 0-255 over FLOOR_DB..CEILING_DB"""
+    scaled = (band_db - FLOOR_DB) * (255.0 / (CEILING_DB - FLOOR_DB))
+    return np.clip(scaled, 0, 255).astype(np.uint8)
+
+class SpectrumStage:
+    """Ingest listener keeping the features of the blocks since the last UI frame"""
+
+    def __init__(self, ingest, bands=BANDS, wanted=None):
+        """wanted() says whether anyone is looking - no analysis is done otherwise"""
+        self.ingest = ingest
+        self.analyzer = SpectrumAnalyzer(ingest.rate, ingest.block, bands)
+        self.wanted = wanted or (lambda: True)
+        self.lock = threading.Lock()
+        self.pending_max = None  # Loudest band levels since the last frame
+        self.pending_centroid = []
+        self.frames = 0
+        self.blocks = 0
+        self.analysis_time = 0.0
+        ingest.add_listener(self.on_blocks)
+
+    def on_blocks(self, first_block, start_sample, rms, peak, noise_floor):
+        """AudioIngest listener - analyse the new blocks in one batch"""
+        if not self.wanted():
+            return
+        started = time.perf_counter()
+        pcm = self.ingest.ring.read(start_sample, len(rms) * self.ingest.block)
+        if pcm is None:
+            return
+        band_db, centroid = self.analyzer.analyse(pcm)
+        loudest = band_db.max(axis=0)
+        with self.lock:
+            self.pending_max = loudest if self.pending_max is None else np.maximum(self.pending_max, loudest)
+            self.pending_centroid.append(float(centroid.mean()))
+        self.blocks += len(rms)
+        self.analysis_time += time.perf_counter() - started
+
+    def frame(self):
+        """Compact spectrogram column for the UI - None if no audio arrived since the last one"""
+        with self.lock:
+            levels, centroids = self.pending_max, self.pending_centroid
+            self.pending_max, self.pending_centroid = None, []
+        if levels is None:
+            return None
+        self.frames += 1
+        return {
+            "bands": quantize(levels).tolist(),
+            "centroid": round(sum(centroids) / len(centroids)),
+            "seq": self.frames
+        }
+
+    def stats(self):
+        """Analysis cost and band layout"""
+        audio_seconds = self.blocks * self.ingest.block / self.ingest.rate
+        return {
+            "bands": len(self.analyzer.edges) - 1,
+            "band_edges_hz": [round(float(e)) for e in self.analyzer.edges],
+            "frames": self.frames,
+            "blocks": self.blocks,
+            "cpu_ms_per_audio_second": round(self.analysis_time / audio_seconds * 1000, 3) if audio_seconds else 0.0
+        }
+
+def run_benchmark(seconds=60, batch_blocks=(1, 4, 32)):
+    """Seconds of audio analysed per CPU second (= real-time streams per core) by batch size"""
+    rate = 16000
+    analyzer = SpectrumAnalyzer(rate)
+    rng = np.random.default_rng(0)
+    t = np.arange(seconds * rate) / rate
+    pcm = (0.3 * np.sin(2 * np.pi * 440 * t) * 32767 + 300 * rng.standard_normal(len(t))).astype(np.int16)
+    pcm = pcm[:len(pcm) - len(pcm) % FFT_SIZE]
+    audio_seconds = len(pcm) / rate
+
+    print(f"{'blocks/batch':>12} {'cpu ms/audio s':>15} {'streams/core':>13}")
+    for batch in batch_blocks:
+        step = batch * FFT_SIZE
+        started = time.process_time()
+        for i in range(0, len(pcm), step):
+            analyzer.analyse(pcm[i:i + step])
+        cpu = time.process_time() - started
+        print(f"{batch:>12} {cpu / audio_seconds * 1000:>15.3f} {audio_seconds / cpu:>13.0f}")
+
+    band_db, centroid = analyzer.analyse(pcm[:FFT_SIZE * 4])
+    loudest = int(np.argmax(band_db[0]))
+    print(f"440 Hz tone -> band {loudest} ({analyzer.edges[loudest]:.0f}-{analyzer.edges[loudest + 1]:.0f} Hz), "
+          f"{band_db[0, loudest]:.1f} dB, centroid {centroid.mean():.0f} Hz")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 60)
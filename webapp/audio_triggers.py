@@ -0,0 +1,209 @@
+"""
+Acoustic triggers (claps) from the microphone's per-block level features.
+
+Runs as an AudioIngest block listener, so it only ever sees the vectorized
+per-block RMS/peak arrays - never individual samples. A block is an onset
+when its peak clears an adaptive threshold (a multiple of the noise floor, but
+never below MIN_PEAK) and its energy jumps relative to the block before. A clap
+is also short: two blocks after the onset its energy must have decayed, which
+rejects the onsets of speech and music. After an onset the detector ignores
+further onsets for the refractory period, so the decay of one clap can't count
+as a second clap.
+
+Onsets are grouped like taps: a clap followed by another within max_gap is a
+double clap, and so on up to a triple clap. As with button taps, the detector
+only waits for a possible next clap when a higher count is actually bound.
+All timing is done in audio time (sample indices), which makes it
+deterministic on recorded input.
+
+Run this file directly to benchmark detection latency, CPU per second of
+audio and false triggers on synthetic WAV fixtures (plus any WAV files given
+on the command line, treated as clap-free).
+"""
+
+import os
+import sys
+import tempfile
+import time
+import wave
+import numpy as np
+
+MIN_PEAK = 0.25  # Absolute floor for the onset threshold (fraction of full scale)
+PEAK_TO_FLOOR = 8.0  # Onset peak must be this many times the noise floor
+ONSET_RATIO = 3.0  # Block RMS must jump by this factor over the previous block
+DECAY_RATIO = 4.0  # ...and two blocks later be this many times quieter than the burst
+REFRACTORY = 0.12  # Seconds after an onset during which onsets are ignored
+MAX_GAP = 0.6  # Max seconds between claps of a double/triple clap
+MAX_CLAPS = 3
+
+CLAP_GESTURES = {1: "clap:1", 2: "clap:2", 3: "clap:3"}
+
+class ClapDetector:
+    """Turn per-block level features into clap, double clap and triple clap triggers"""
+
+    def __init__(self, on_trigger, bound_counts=None, rate=16000, block=512,
+                 refractory=REFRACTORY, max_gap=MAX_GAP):
+        """
+        on_trigger(gesture, latency, at_sample) is called on the ingest thread
+        with gesture "clap:<count>"; latency is the audio time from the last
+        clap's onset to the decision. bound_counts() returns the clap counts
+        bound right now, so single claps don't wait when nothing else is bound.
+        """
+        self.on_trigger = on_trigger
+        self.bound_counts = bound_counts or (lambda: {1, 2, 3})
+        self.rate = rate
+        self.block = block
+        self.refractory_samples = int(refractory * rate)
+        self.max_gap_samples = int(max_gap * rate)
+        self.carry_rms = np.zeros(3, dtype=np.float32)  # Last blocks of the previous batch
+        self.carry_peak = np.zeros(3, dtype=np.float32)
+        self.last_onset = None  # Sample index of the last accepted onset
+        self.claps = 0  # Claps in the sequence being collected
+        self.onsets = 0
+        self.triggers = 0
+
+    def __call__(self, first_block, start_sample, rms, peak, noise_floor):
+        """AudioIngest block listener"""
+        threshold = max(MIN_PEAK, noise_floor * PEAK_TO_FLOOR)
+        # Judge each block with the one before and the two after it, so the
+        # newest two blocks wait for the next batch (64 ms at 16 kHz)
+        rms = np.concatenate((self.carry_rms, rms))
+        peak = np.concatenate((self.carry_peak, peak))
+        self.carry_rms, self.carry_peak = rms[-3:], peak[-3:]
+        before, burst, after = rms[:-3], rms[1:-2], rms[3:]
+        burst_energy = np.maximum(burst, rms[2:-1])
+        onset = ((peak[1:-2] > threshold)
+                 & (burst > ONSET_RATIO * np.maximum(before, noise_floor))
+                 & (after * DECAY_RATIO < burst_energy))
+        candidates = np.flatnonzero(onset)
+        start_sample -= 2 * self.block  # candidates[0] is the block two before this batch
+
+        for i in candidates:
+            at = start_sample + int(i) * self.block
+            self._flush(at)  # A sequence that timed out before this onset
+            if self.last_onset is not None and at - self.last_onset < self.refractory_samples:
+                continue
+            self.onsets += 1
+            self.last_onset = at
+            self.claps = min(self.claps + 1, MAX_CLAPS)
+            if not any(n > self.claps for n in self.bound_counts()):
+                self._emit(at)  # Nothing longer is bound - no need to wait
+
+        self._flush(start_sample + (len(rms) - 1) * self.block)
+
+    def _flush(self, now):
+        """Emit the collected sequence once max_gap has passed without another clap"""
+        if self.claps and now - self.last_onset > self.max_gap_samples:
+            self._emit(now)
+
+    def _emit(self, now):
+        """Report the sequence and start a new one"""
+        count, self.claps = self.claps, 0
+        if count not in self.bound_counts():
+            return
+        self.triggers += 1
+        self.on_trigger(CLAP_GESTURES[count], (now - self.last_onset) / self.rate, now)
+
+    def stats(self):
+        """Onset and trigger counters"""
+        return {"onsets": self.onsets, "triggers": self.triggers}
+
+# ---- benchmark ----
+
+def write_fixture(path, pcm, rate):
+    """Save int16 samples as a mono WAV fixture"""
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.astype(np.int16).tobytes())
+
+def synth_fixtures(directory, rate, seconds=60):
+    """Synthetic fixtures: (name, path, expected [(gesture, time)] or None for clap-free)"""
+    from audio_ingest import FakePcmSource
+    rng = np.random.default_rng(7)
+    fixtures = []
+
+    # Claps at known times over quiet room noise
+    expected = []
+    clicks = []
+    t = 2.0
+    while t < seconds - 3:
+        count = int(rng.integers(1, 4))
+        for n in range(count):
+            clicks.append(t + n * 0.3)
+        expected.append((CLAP_GESTURES[count], t + (count - 1) * 0.3))
+        t += 4.0
+    source = FakePcmSource(rate=rate, tone_level=0.0, noise_level=0.01, clicks=clicks, realtime=False)
+    fixtures.append(("claps", source.render(0, int(seconds * rate)), expected))
+
+    # Clap-free: steady tone, speech-like modulated noise, loud music-like chords
+    n = int(seconds * rate)
+    t_axis = np.arange(n) / rate
+    tone = FakePcmSource(rate=rate, tone_level=0.3, noise_level=0.02, realtime=False).render(0, n)
+    fixtures.append(("tone", tone, None))
+    syllables = (np.sin(2 * np.pi * 4 * t_axis) > 0.3) * (0.5 + 0.5 * np.sin(2 * np.pi * 0.3 * t_axis))
+    speech = 0.2 * syllables * rng.standard_normal(n) + 0.01 * rng.standard_normal(n)
+    fixtures.append(("speech", (np.clip(speech, -1, 1) * 32767).astype(np.int16), None))
+    music = sum(0.1 * np.sin(2 * np.pi * f * t_axis) for f in (220, 277, 330))
+    music *= 0.6 + 0.4 * np.sin(2 * np.pi * 2 * t_axis)  # Beat-like swell
+    fixtures.append(("music", (np.clip(music, -1, 1) * 32767).astype(np.int16), None))
+
+    paths = []
+    for name, pcm, expected in fixtures:
+        path = os.path.join(directory, f"{name}.wav")
+        write_fixture(path, pcm, rate)
+        paths.append((name, path, expected))
+    return paths
+
+def run_fixture(path, rate):
+    """Feed a WAV file through ingest + detector as fast as possible - returns (triggers, cpu seconds, audio seconds)"""
+    from audio_ingest import AudioIngest, WavFileSource
+    ingest = AudioIngest(rate=rate)
+    triggers = []
+    detector = ClapDetector(lambda g, latency, at: triggers.append((g, latency, at / rate)), rate=rate, block=ingest.block)
+    ingest.add_listener(detector)
+
+    source = WavFileSource(path)
+    source.open()
+    started = time.process_time()
+    while ingest.ring.fill_from(source, max_bytes=ingest.block * 2):  # One block per read, as when live
+        ingest.process()
+    cpu = time.process_time() - started
+    source.close()
+    return triggers, cpu, ingest.ring.total / rate
+
+def run_benchmark(extra_fixtures=()):
+    """Detection latency, CPU per audio second and false-trigger rate"""
+    rate = 16000
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        fixtures = synth_fixtures(directory, rate)
+        fixtures += [(os.path.basename(p), p, None) for p in extra_fixtures]
+        print(f"{'fixture':<14} {'audio s':>8} {'cpu ms/s':>9} {'triggers':>9} {'correct':>8} {'false/min':>10} {'latency ms':>11}")
+        for name, path, expected in fixtures:
+            triggers, cpu, audio_seconds = run_fixture(path, rate)
+            cpu_per_second = cpu / audio_seconds * 1000
+            if expected is None:
+                correct = "-"
+                false = len(triggers)
+                latency = "-"
+            else:
+                matched = 0
+                latencies = []
+                for gesture, at in expected:
+                    hit = [t for t in triggers if t[0] == gesture and -0.05 <= t[2] - at <= MAX_GAP + 0.2]
+                    if hit:
+                        matched += 1
+                        latencies.append(max(0.0, hit[0][2] - at))
+                false = len(triggers) - matched
+                correct = f"{matched}/{len(expected)}"
+                latency = f"{np.mean(latencies) * 1000:.0f}" if latencies else "-"
+                ok = ok and matched == len(expected)
+            ok = ok and false == 0
+            print(f"{name:<14} {audio_seconds:>8.1f} {cpu_per_second:>9.3f} {len(triggers):>9} {correct:>8} "
+                  f"{false / audio_seconds * 60:>10.2f} {latency:>11}")
+    return ok
+
+if __name__ == "__main__":
+    raise SystemExit(0 if run_benchmark(sys.argv[1:]) else 1)
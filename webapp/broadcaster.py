@@ -0,0 +1,250 @@
+"""
+Topic-based Socket.IO broadcaster with per-client outbound queues.
+
+Publishing only enqueues: every client has an outbox drained by its own sender
+task, so a slow or stalled browser tab never blocks the thread that published
+the event (usually the BLE thread), and events reach each client in the order
+they were published.
+
+Button, status, layout and script events are reliable: they are never dropped.
+Log traffic is lossy: each client keeps at most max_queue pending log entries,
+dropping the oldest, and consecutive pending entries are coalesced into one
+'ble_logs' batch per send. When entries were dropped, the next batch carries a
+gap marker - {"since", "until"} seqs - so the client can fetch exactly the
+missing range instead of skipping it. Fixed-rate frames (audio levels) are
+conflated: only the newest pending frame per event is kept.
+
+Clients only receive the topics they subscribed to. Events with no
+subscribers are never queued, serialized or sent.
+"""
+
+import threading
+import time
+from collections import deque
+
+# Topics a client can subscribe to; script output uses 'script:<run_id>'
+TOPIC_LOGS = 'logs'
+TOPIC_BUTTONS = 'buttons'
+TOPIC_STATUS = 'status'
+TOPIC_RUNS = 'runs'  # Script started/finished notices
+TOPIC_SCRIPTS = 'scripts'  # Output of every script run
+TOPIC_LAYOUT = 'layout'  # Layout diffs
+TOPIC_AUDIO = 'audio'  # Microphone level frames
+DEFAULT_TOPICS = (TOPIC_LOGS, TOPIC_BUTTONS, TOPIC_STATUS, TOPIC_LAYOUT)  # For clients that don't say
+
+def script_topic(run_id):
+    """Topic carrying the output of a single script run"""
+    return f"script:{run_id}"
+
+def is_valid_topic(topic):
+    """Check a client-supplied topic name"""
+    if topic in (TOPIC_LOGS, TOPIC_BUTTONS, TOPIC_STATUS, TOPIC_RUNS, TOPIC_SCRIPTS, TOPIC_LAYOUT, TOPIC_AUDIO):
+        return True
+    return isinstance(topic, str) and topic.startswith("script:") and 7 < len(topic) <= 64
+
+class ClientOutbox:
+    """Outbound queues and counters for one connected client"""
+
+    def __init__(self, sid, max_queue):
+        self.sid = sid
+        self.topics = set()
+        self.max_queue = max_queue
+        self.pending = deque()  # (event, payload, queued_at) in publish order; event None = log entry
+        self.queued_logs = 0  # Log entries in pending - the oldest is dropped beyond max_queue
+        self.latest = {}  # event -> (payload, queued_at) - newest frame only
+        self.gap_since = None  # Seq just before the oldest log entry dropped since the last send
+        self.wakeup = threading.Condition()
+        self.connected = True
+        self.sent = 0
+        self.dropped = 0
+        self.batches = 0
+        self.last_seq = 0
+
+    def add_log(self, payload, now):
+        """Queue a log entry, dropping the oldest queued one past max_queue (call with wakeup held)"""
+        if self.queued_logs >= self.max_queue:
+            for i, (event, lost, _) in enumerate(self.pending):
+                if event is None:
+                    del self.pending[i]
+                    break
+            self.queued_logs -= 1
+            self.dropped += 1
+            if self.gap_since is None and isinstance(lost, dict) and lost.get("seq"):
+                self.gap_since = lost["seq"] - 1
+        self.pending.append((None, payload, now))
+        self.queued_logs += 1
+
+    def stats(self):
+        """Snapshot of this client's queue depth, lag and drop counters"""
+        now = time.monotonic()
+        with self.wakeup:
+            oldest = []
+            if self.pending:
+                oldest.append(self.pending[0][-1])
+            oldest.extend(queued_at for _, queued_at in self.latest.values())
+            return {
+                "topics": sorted(self.topics),
+                "queued_logs": self.queued_logs,
+                "queued_reliable": len(self.pending) - self.queued_logs,
+                "lag_seconds": round(now - min(oldest), 3) if oldest else 0.0,
+                "last_seq": self.last_seq,
+                "sent": self.sent,
+                "dropped": self.dropped,
+                "batches": self.batches
+            }
+
+class SocketBroadcaster:
+    """Fan events out to per-client outboxes - reliable, lossy or conflated"""
+
+    def __init__(self, socketio, max_queue=200):
+        self.socketio = socketio
+        self.max_queue = max_queue
+        self.clients = {}
+        self.lock = threading.Lock()
+        self.latest_seq = 0
+
+    def add_client(self, sid, topics=DEFAULT_TOPICS):
+        """Register a client, subscribe it to its initial topics and start its sender task"""
+        outbox = ClientOutbox(sid, self.max_queue)
+        with self.lock:
+            self.clients[sid] = outbox
+        self.subscribe(sid, topics)
+        self.socketio.start_background_task(self._sender, outbox)
+        return outbox
+
+    def subscribe(self, sid, topics):
+        """Add topics to a client's subscriptions - returns the resulting set"""
+        with self.lock:
+            outbox = self.clients.get(sid)
+            if not outbox:
+                return []
+            outbox.topics.update(t for t in topics if is_valid_topic(t))
+            return sorted(outbox.topics)
+
+    def unsubscribe(self, sid, topics):
+        """Remove topics from a client's subscriptions - returns the resulting set"""
+        with self.lock:
+            outbox = self.clients.get(sid)
+            if not outbox:
+                return []
+            outbox.topics.difference_update(topics)
+            return sorted(outbox.topics)
+
+    def has_subscribers(self, topic):
+        """Whether anyone is listening on a topic"""
+        with self.lock:
+            return any(topic in outbox.topics for outbox in self.clients.values())
+
+    def is_subscribed(self, sid, topic):
+        """Whether a given client is listening on a topic"""
+        with self.lock:
+            outbox = self.clients.get(sid)
+            return bool(outbox and topic in outbox.topics)
+
+    def remove_client(self, sid):
+        """Stop the sender task and forget the client"""
+        with self.lock:
+            outbox = self.clients.pop(sid, None)
+        if outbox:
+            with outbox.wakeup:
+                outbox.connected = False
+                outbox.wakeup.notify()
+
+    def publish(self, event, payload, topic, droppable=False, conflate=False):
+        """Queue an event for every subscriber of the topic(s) - never blocks on the network.
+
+        Reliable events are never dropped. droppable events count against each
+        client's log queue limit; conflate replaces any frame of the same event
+        the client hasn't been sent yet.
+        """
+        now = time.monotonic()
+        seq = payload.get("seq") if isinstance(payload, dict) else None
+        if seq:
+            self.latest_seq = max(self.latest_seq, seq)
+
+        topics = (topic,) if isinstance(topic, str) else tuple(topic)
+        with self.lock:
+            outboxes = [o for o in self.clients.values() if not o.topics.isdisjoint(topics)]
+
+        for outbox in outboxes:
+            with outbox.wakeup:
+                if conflate:
+                    if event in outbox.latest:
+                        outbox.dropped += 1
+                    outbox.latest[event] = (payload, now)
+                elif droppable:
+                    outbox.add_log(payload, now)
+                else:
+                    outbox.pending.append((event, payload, now))
+                outbox.wakeup.notify()
+
+    def _sender(self, outbox):
+        """Drain one client's outbox in order - runs of log entries as one batch - then the newest frames"""
+        while True:
+            with outbox.wakeup:
+                while outbox.connected and not outbox.pending and not outbox.latest:
+                    outbox.wakeup.wait()
+                if not outbox.connected:
+                    return
+                pending = list(outbox.pending)
+                outbox.pending.clear()
+                outbox.queued_logs = 0
+                gap_since, outbox.gap_since = outbox.gap_since, None
+                frames = [(event, payload) for event, (payload, _) in outbox.latest.items()]
+                outbox.latest.clear()
+
+            try:
+                logs = []
+                for event, payload, _ in pending:
+                    if event is None:
+                        logs.append(payload)
+                        continue
+                    if logs:
+                        self._send_logs(outbox, logs, gap_since)
+                        logs, gap_since = [], None
+                    self.socketio.emit(event, payload, to=outbox.sid)
+                    outbox.sent += 1
+                    self._track_seq(outbox, payload)
+                self._send_logs(outbox, logs, gap_since)
+
+                for event, payload in frames:
+                    self.socketio.emit(event, payload, to=outbox.sid)
+                    outbox.sent += 1
+            except Exception as e:
+                print(f"Error emitting to client {outbox.sid}: {e}")
+
+    def _send_logs(self, outbox, logs, gap_since=None):
+        """Emit a run of log entries - a single 'ble_log', or a 'ble_logs' batch with any gap marker"""
+        if not logs:
+            return
+        if len(logs) == 1 and gap_since is None:
+            self.socketio.emit('ble_log', logs[0], to=outbox.sid)
+        else:
+            batch = {
+                'logs': logs,
+                'seq': logs[-1].get('seq'),
+                'resync': False
+            }
+            if gap_since is not None:
+                # Entries in between were dropped - the client fetches them with 'request_logs'
+                batch['gap'] = {'since': gap_since, 'until': logs[0].get('seq')}
+            self.socketio.emit('ble_logs', batch, to=outbox.sid)
+            outbox.batches += 1
+        outbox.sent += len(logs)
+        self._track_seq(outbox, logs[-1])
+
+    def _track_seq(self, outbox, payload):
+        """Remember the newest seq delivered to a client"""
+        if isinstance(payload, dict) and payload.get("seq"):
+            outbox.last_seq = max(outbox.last_seq, payload["seq"])
+
+    def stats(self):
+        """Per-client lag and drop counters"""
+        with self.lock:
+            outboxes = list(self.clients.values())
+        clients = {}
+        for outbox in outboxes:
+            stats = outbox.stats()
+            stats["seq_lag"] = max(0, self.latest_seq - outbox.last_seq)
+            clients[outbox.sid] = stats
+        return {"latest_seq": self.latest_seq, "clients": clients}
@@ -0,0 +1,79 @@
+"""
+Rate-coalesced control stream for encoder rotation.
+
+The device can send rotation deltas far faster than a control action (volume,
+scroll, brightness) is worth running. Deltas are summed as they arrive and a
+single worker thread hands the accumulated delta to the handler at most once
+per frame. A slow handler just means more detents are folded into the next
+frame - nothing queues up behind it.
+"""
+
+import threading
+import time
+
+class ControlStream:
+    """Accumulate deltas and flush them at a fixed maximum frame rate"""
+
+    def __init__(self, handler, rate_hz=30, name="control-stream"):
+        self.handler = handler  # handler(delta, detents)
+        self.frame = 1.0 / rate_hz
+        self.name = name
+        self.pending_delta = 0
+        self.pending_detents = 0
+        self.last_flush = 0.0
+        self.wakeup = threading.Condition()
+        self.thread = None
+        self.deltas_received = 0
+        self.frames = 0
+        self.handler_errors = 0
+        self.handler_max = 0.0
+
+    def push(self, delta):
+        """Add a rotation delta - never blocks on the handler"""
+        if not delta:
+            return
+        with self.wakeup:
+            self.pending_delta += delta
+            self.pending_detents += 1
+            self.deltas_received += 1
+            if not self.thread:
+                self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self.thread.start()
+            self.wakeup.notify()
+
+    def _run(self):
+        """Wait for deltas, then flush at most once per frame"""
+        while True:
+            with self.wakeup:
+                while not self.pending_detents:
+                    self.wakeup.wait()
+                # Let the rest of this frame's detents arrive before flushing
+                deadline = self.last_flush + self.frame
+                while (remaining := deadline - time.monotonic()) > 0:
+                    self.wakeup.wait(remaining)
+                delta, detents = self.pending_delta, self.pending_detents
+                self.pending_delta = 0
+                self.pending_detents = 0
+                self.last_flush = time.monotonic()
+
+            if not delta:
+                continue  # Detents cancelled each other out
+            started = time.perf_counter()
+            try:
+                self.handler(delta, detents)
+            except Exception as e:
+                self.handler_errors += 1
+                print(f"Error in control handler: {e}")
+            self.frames += 1
+            self.handler_max = max(self.handler_max, time.perf_counter() - started)
+
+    def stats(self):
+        """How much coalescing is happening"""
+        return {
+            "rate_hz": round(1.0 / self.frame, 3),
+            "deltas_received": self.deltas_received,
+            "frames": self.frames,
+            "coalescing_ratio": round(self.deltas_received / self.frames, 2) if self.frames else 0.0,
+            "handler_errors": self.handler_errors,
+            "handler_max_ms": round(self.handler_max * 1000, 3)
+        }
@@ -0,0 +1,217 @@
+"""
+Priority executor for activations.
+
+A fixed pool of worker threads takes jobs from a priority queue instead of a
+thread being started per press. Some workers are reserved for critical jobs
+(lock, screen capture), so a burst of sound or screenshot presses can never
+hold every worker. Waiting jobs age: every aging_seconds in the queue moves a
+job up one class, so background jobs still run under a steady stream of
+interactive ones.
+
+Jobs can name the resources they need (see ResourceLocks). A job is only
+handed to a worker once all of its resources have been taken for it, so a
+worker never sits blocked on a busy device: contended jobs stay queued while
+unrelated ones run, and they are re-checked whenever a resource is released.
+A queued job whose deadline passes is dropped and reported through its
+on_expire callback instead of being run.
+"""
+
+import itertools
+import threading
+import time
+
+PRIORITY_CLASSES = ("critical", "interactive", "background")
+DEFAULT_PRIORITY = "interactive"
+
+def parse_priority(value):
+    """Normalize a priority class name, falling back to the default"""
+    value = (value or "").strip().lower()
+    return value if value in PRIORITY_CLASSES else DEFAULT_PRIORITY
+
+class Job:
+    """A queued call"""
+
+    __slots__ = ("priority", "rank", "seq", "queued_at", "fn", "args", "label",
+                 "resources", "deadline", "on_expire", "held", "blocked")
+
+    def __init__(self, priority, seq, fn, args, label, resources=(), deadline=None, on_expire=None):
+        self.priority = priority
+        self.rank = PRIORITY_CLASSES.index(priority)
+        self.seq = seq
+        self.queued_at = time.monotonic()
+        self.fn = fn
+        self.args = args
+        self.label = label
+        self.resources = list(resources or ())
+        self.deadline = deadline  # Monotonic time after which the job is dropped unrun
+        self.on_expire = on_expire  # on_expire(blocked) - blocked: it was waiting for resources
+        self.held = []
+        self.blocked = False
+
+class ClassStats:
+    """Queue wait counters for one priority class"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.aged = 0  # Jobs that ran ahead of a fresher, higher class job because they had waited
+        self.expired = 0  # Jobs dropped because their deadline passed in the queue
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+class ActivationExecutor:
+    """Run submitted jobs by priority class on a fixed pool with reserved critical capacity"""
+
+    def __init__(self, workers=4, critical_reserved=1, aging_seconds=2.0, name="activation", resource_locks=None):
+        self.workers = workers
+        self.critical_reserved = min(critical_reserved, workers - 1)
+        self.aging_seconds = aging_seconds
+        self.name = name
+        self.queue = []
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        self.threads = []
+        self.running = {p: 0 for p in PRIORITY_CLASSES}
+        self.counters = {p: ClassStats() for p in PRIORITY_CLASSES}
+        self.resource_locks = resource_locks
+        if resource_locks is not None:
+            resource_locks.release_listeners.append(self.wake)
+
+    def wake(self):
+        """Re-check queued jobs - called when resources are released"""
+        with self.cond:
+            self.cond.notify_all()
+
+    def submit(self, priority, fn, *args, label="", resources=None, deadline=None, on_expire=None):
+        """Queue fn(*args) in a priority class, to run once its resources are free and before its deadline"""
+        with self.cond:
+            if not self.threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True)
+                    thread.start()
+                    self.threads.append(thread)
+            job = Job(parse_priority(priority), next(self.counter), fn, args, label, resources, deadline, on_expire)
+            self.queue.append(job)
+            self.counters[job.priority].submitted += 1
+            self.cond.notify_all()
+
+    def _effective_rank(self, job, now):
+        """Priority class after aging - lower runs first"""
+        return job.rank - int((now - job.queued_at) / self.aging_seconds)
+
+    def _expired(self, now):
+        """Take the jobs whose deadline has passed out of the queue"""
+        expired = [job for job in self.queue if job.deadline is not None and now > job.deadline]
+        for job in expired:
+            self.queue.remove(job)
+            self.counters[job.priority].expired += 1
+        return expired
+
+    def _pick(self, now):
+        """Best job this worker may take with its resources taken, or None.
+
+        Only critical jobs may use the reserved workers. A job whose resources
+        are busy is skipped, not waited for, so it can't hold up the jobs behind it.
+        """
+        busy_others = sum(n for p, n in self.running.items() if p != "critical")
+        allow_others = busy_others < self.workers - self.critical_reserved
+        candidates = sorted(
+            (self._effective_rank(job, now), job.seq, job)
+            for job in self.queue
+            if job.priority == "critical" or allow_others
+        )
+        for _, _, job in candidates:
+            if job.resources and self.resource_locks is not None:
+                held = self.resource_locks.try_acquire(job.resources, job.queued_at)
+                if held is None:
+                    job.blocked = True
+                    continue
+                job.held = held
+            if any(other.rank < job.rank for other in self.queue):
+                self.counters[job.priority].aged += 1
+            return job
+        return None
+
+    def _wait_timeout(self, now):
+        """How long an idle worker may sleep - until the next aging step or queued deadline"""
+        if not self.queue:
+            return None
+        deadlines = [job.deadline - now for job in self.queue if job.deadline is not None]
+        return max(0.001, min([self.aging_seconds] + deadlines))
+
+    def _work(self):
+        """Worker loop"""
+        while True:
+            with self.cond:
+                while True:
+                    now = time.monotonic()
+                    expired = self._expired(now)
+                    job = self._pick(now)
+                    if job or expired:
+                        break
+                    # Aging and deadlines can change things without anything new arriving
+                    self.cond.wait(self._wait_timeout(now))
+                if job:
+                    self.queue.remove(job)
+                    self.running[job.priority] += 1
+                    counters = self.counters[job.priority]
+                    waited = now - job.queued_at
+                    counters.wait_total += waited
+                    counters.wait_max = max(counters.wait_max, waited)
+
+            for gone in expired:
+                self._expire(gone, now)
+            if not job:
+                continue
+
+            try:
+                job.fn(*job.args)
+            except Exception as e:
+                print(f"Error running {job.label or job.fn}: {e}")
+            finally:
+                if job.held:
+                    self.resource_locks.release(job.held)
+
+            with self.cond:
+                self.running[job.priority] -= 1
+                counters.completed += 1
+                self.cond.notify_all()
+
+    def _expire(self, job, now):
+        """Report a job dropped for missing its deadline"""
+        if job.blocked and self.resource_locks is not None:
+            self.resource_locks.timed_out(job.resources, now - job.queued_at)
+        if job.on_expire:
+            try:
+                job.on_expire(job.blocked)
+            except Exception as e:
+                print(f"Error expiring {job.label or job.fn}: {e}")
+
+    def stats(self):
+        """Queue depth, running jobs and queue wait per priority class"""
+        with self.cond:
+            queued = {p: 0 for p in PRIORITY_CLASSES}
+            blocked = {p: 0 for p in PRIORITY_CLASSES}
+            for job in self.queue:
+                queued[job.priority] += 1
+                blocked[job.priority] += job.blocked
+            return {
+                "workers": self.workers,
+                "critical_reserved": self.critical_reserved,
+                "aging_seconds": self.aging_seconds,
+                "classes": {
+                    p: {
+                        "queued": queued[p],
+                        "waiting_for_resources": blocked[p],
+                        "running": self.running[p],
+                        "submitted": c.submitted,
+                        "completed": c.completed,
+                        "aged": c.aged,
+                        "expired": c.expired,
+                        "mean_wait_ms": round(c.wait_total / (c.completed + self.running[p]) * 1000, 3)
+                        if c.completed + self.running[p] else 0.0,
+                        "max_wait_ms": round(c.wait_max * 1000, 3)
+                    }
+                    for p, c in self.counters.items()
+                }
+            }
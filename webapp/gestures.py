@@ -0,0 +1,339 @@
+"""
+Streaming gesture recognizer for the press/release event stream.
+
+Each button position runs a small state machine driven by the central timer
+scheduler. Recognized gestures:
+
+    press, release     - the raw edges
+    hold:<seconds>     - still held <seconds> after the press
+    repeat:<ms>        - on press, followed by repeat_end on release
+    short_press        - a single press released before the long-press threshold
+    long_press         - held past the long-press threshold (fires while held)
+    double_tap         - two short presses, each within tap_window of the last release
+    triple_tap         - three short presses
+    chord              - several chorded positions pressed within chord_window
+
+The recognizer only waits when it has to, so the extra latency added on top of
+the edge that completes a gesture is bounded:
+
+    press/release/hold  0 (chord_window if the position is part of a chord)
+    repeat/repeat_end   same as press/release
+    short_press         0, or tap_window if double/triple tap is also bound
+    double_tap          0, or tap_window if triple tap is also bound
+    triple_tap          0
+    long_press          0 after the long_press threshold
+    chord               0 after the last member's press
+
+Run this file directly to benchmark those bounds on a virtual clock.
+"""
+
+import threading
+import time
+from scheduler import ManualScheduler
+
+DEFAULT_TAP_WINDOW = 0.25
+DEFAULT_LONG_PRESS = 0.5
+DEFAULT_CHORD_WINDOW = 0.05
+
+TAP_GESTURES = {1: "short_press", 2: "double_tap", 3: "triple_tap"}
+
+class PositionState:
+    """Where one position is in its gesture sequence"""
+
+    def __init__(self):
+        self.down = False
+        self.down_at = 0.0
+        self.taps = 0
+        self.bindings = {}  # Gesture -> target, snapshotted at the start of a sequence
+        self.consumed = False  # Long press or chord already claimed this press
+        self.timers = []  # Hold/long-press timers for the current press
+        self.window_timer = None  # Waiting for the next tap
+        self.token = 0  # Invalidates stale timer callbacks
+
+class GestureRecognizer:
+    """Turn press/release edges into gestures and report them with their latency"""
+
+    def __init__(self, scheduler, on_gesture, bindings, chords=None,
+                 tap_window=DEFAULT_TAP_WINDOW, long_press=DEFAULT_LONG_PRESS,
+                 chord_window=DEFAULT_CHORD_WINDOW):
+        """
+        bindings(position) returns {gesture: target} for a position, and
+        chords() returns {frozenset(positions): target}. on_gesture is called
+        as on_gesture(positions, gesture, target, latency) from whichever
+        thread completed the gesture, so it should only queue work.
+        """
+        self.scheduler = scheduler
+        self.on_gesture = on_gesture
+        self.bindings = bindings
+        self.chords = chords or (lambda: {})
+        self.tap_window = tap_window
+        self.long_press = long_press
+        self.chord_window = chord_window
+        self.states = {}
+        self.chord_pending = {}  # Position -> (press time, timer) while waiting for chord partners
+        self.lock = threading.RLock()
+        self.counts = {}
+        self.latency_max = {}
+        self.latency_total = {}
+
+    def state(self, position):
+        """State machine for a position"""
+        st = self.states.get(position)
+        if st is None:
+            st = self.states[position] = PositionState()
+        return st
+
+    def feed(self, position, pressed, t=None):
+        """Feed one edge from the device"""
+        t = self.scheduler.now() if t is None else t
+        with self.lock:
+            events = []
+            if pressed:
+                self._on_press_edge(position, t, events)
+            else:
+                self._on_release_edge(position, t, events)
+        self._deliver(events)
+
+    # ---- chords ----
+
+    def _on_press_edge(self, position, t, events):
+        """Press edge - hold it back for chord_window if it could start a chord"""
+        st = self.state(position)
+        if st.down or position in self.chord_pending:
+            return  # Duplicate edge
+
+        chords = self.chords()
+        if any(position in chord for chord in chords):
+            candidates = set(self.chord_pending) | {position}
+            for chord, target in chords.items():
+                if position in chord and chord <= candidates:
+                    for member in chord:
+                        pending = self.chord_pending.pop(member, None)
+                        if pending:
+                            pending[1].cancel()
+                        member_state = self.state(member)
+                        member_state.down = True
+                        member_state.consumed = True
+                    events.append((tuple(sorted(chord)), "chord", target, self.scheduler.now() - t))
+                    return
+
+            timer = self.scheduler.call_at(t + self.chord_window, self._chord_timeout, position)
+            self.chord_pending[position] = (t, timer)
+            return
+
+        self._press(position, t, events)
+
+    def _chord_timeout(self, position):
+        """No chord formed - process the press that was held back"""
+        with self.lock:
+            events = []
+            pending = self.chord_pending.pop(position, None)
+            if pending:
+                self._press(position, pending[0], events)
+        self._deliver(events)
+
+    def _on_release_edge(self, position, t, events):
+        """Release edge - flush a held-back press first, swallow chord members"""
+        pending = self.chord_pending.pop(position, None)
+        if pending:
+            pending[1].cancel()
+            self._press(position, pending[0], events)
+
+        st = self.state(position)
+        if not st.down:
+            return
+        if st.consumed and st.taps == 0:
+            # Released after being part of a chord
+            st.down = False
+            st.consumed = False
+            return
+        self._release(position, t, events)
+
+    # ---- per-position state machine ----
+
+    def _press(self, position, t, events):
+        """A press that is not part of a chord"""
+        st = self.state(position)
+        st.down = True
+        st.down_at = t
+        st.token += 1
+
+        if st.window_timer:
+            # Another tap in a multi-tap sequence
+            st.window_timer.cancel()
+            st.window_timer = None
+            st.taps += 1
+        else:
+            st.taps = 1
+            st.bindings = self.bindings(position) or {}
+            st.consumed = False
+
+        self._emit(events, position, "press", st.bindings, t)
+
+        for gesture in st.bindings:
+            if gesture.startswith("repeat:"):
+                self._emit(events, position, gesture, st.bindings, t)
+            elif gesture.startswith("hold:"):
+                seconds = float(gesture.split(":", 1)[1])
+                st.timers.append(self.scheduler.call_at(t + seconds, self._hold_fire, position, gesture, st.token))
+
+        if "long_press" in st.bindings and st.taps == 1:
+            st.timers.append(self.scheduler.call_at(t + self.long_press, self._long_fire, position, st.token))
+
+    def _hold_fire(self, position, gesture, token):
+        """Hold timer expired - fire if the same press is still down"""
+        with self.lock:
+            events = []
+            st = self.state(position)
+            if st.down and st.token == token:
+                self._emit(events, position, gesture, st.bindings, st.down_at + float(gesture.split(":", 1)[1]))
+        self._deliver(events)
+
+    def _long_fire(self, position, token):
+        """Long-press threshold reached while held"""
+        with self.lock:
+            events = []
+            st = self.state(position)
+            if st.down and st.token == token and not st.consumed:
+                st.consumed = True
+                self._emit(events, position, "long_press", st.bindings, st.down_at + self.long_press)
+        self._deliver(events)
+
+    def _release(self, position, t, events):
+        """A release that ends a press we tracked"""
+        st = self.state(position)
+        st.down = False
+        for timer in st.timers:
+            timer.cancel()
+        st.timers = []
+
+        self._emit(events, position, "release", st.bindings, t)
+        for gesture, target in st.bindings.items():
+            if gesture.startswith("repeat:"):
+                events.append(((position,), "repeat_end", target, self.scheduler.now() - t))
+
+        if st.consumed or t - st.down_at >= self.long_press:
+            # Long press (or simply too long to be a tap) ends the sequence
+            self._reset(st)
+            return
+
+        taps = min(st.taps, 3)
+        higher = [TAP_GESTURES[n] for n in range(taps + 1, 4)]
+        if any(gesture in st.bindings for gesture in higher):
+            st.window_timer = self.scheduler.call_at(t + self.tap_window, self._window_fire, position, st.token, t)
+        else:
+            self._emit(events, position, TAP_GESTURES[taps], st.bindings, t)
+            self._reset(st)
+
+    def _window_fire(self, position, token, released_at):
+        """No further tap arrived - the sequence is complete"""
+        with self.lock:
+            events = []
+            st = self.state(position)
+            if st.window_timer and st.token == token and not st.down:
+                self._emit(events, position, TAP_GESTURES[min(st.taps, 3)], st.bindings, released_at)
+                self._reset(st)
+        self._deliver(events)
+
+    def _reset(self, st):
+        """Back to idle"""
+        st.taps = 0
+        st.consumed = False
+        st.window_timer = None
+
+    # ---- output ----
+
+    def _emit(self, events, position, gesture, bindings, edge_time):
+        """Queue a gesture for delivery if something is bound to it"""
+        if gesture in bindings:
+            events.append(((position,), gesture, bindings[gesture], self.scheduler.now() - edge_time))
+
+    def _deliver(self, events):
+        """Hand recognized gestures to the callback outside the lock"""
+        for positions, gesture, target, latency in events:
+            kind = gesture.split(":", 1)[0]
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+            self.latency_total[kind] = self.latency_total.get(kind, 0.0) + latency
+            self.latency_max[kind] = max(self.latency_max.get(kind, 0.0), latency)
+            try:
+                self.on_gesture(positions, gesture, target, latency)
+            except Exception as e:
+                print(f"Error handling gesture {gesture} on {positions}: {e}")
+
+    def stats(self):
+        """Per-gesture counts and added latency"""
+        return {
+            kind: {
+                "count": count,
+                "mean_latency_ms": round(self.latency_total[kind] / count * 1000, 3),
+                "max_latency_ms": round(self.latency_max[kind] * 1000, 3)
+            }
+            for kind, count in self.counts.items()
+        }
+
+def run_benchmark(rounds=2000):
+    """Drive the recognizer with scripted sequences on a virtual clock and check the latency bounds"""
+    scheduler = ManualScheduler()
+    seen = []
+    every_gesture = {g: g for g in ("press", "release", "hold:1", "short_press", "long_press", "double_tap", "triple_tap")}
+    taps_only = {"short_press": "short_press"}
+    bindings = {0: every_gesture, 1: taps_only, 2: {"press": "press"}, 3: {"press": "press"}}
+    chords = {frozenset((2, 3)): "chord"}
+    recognizer = GestureRecognizer(
+        scheduler,
+        lambda positions, gesture, target, latency: seen.append((gesture, latency)),
+        lambda position: bindings.get(position, {}),
+        lambda: chords
+    )
+
+    def edge(position, pressed, t):
+        scheduler.advance_to(t)
+        recognizer.feed(position, pressed, t)
+
+    def tap(position, t, length=0.08):
+        edge(position, True, t)
+        edge(position, False, t + length)
+        return t + length
+
+    t = 0.0
+    edges = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        t = tap(0, t) + 1.0  # Short press on a fully bound slot
+        t = tap(0, tap(0, t) + 0.1) + 1.0  # Double tap
+        t = tap(0, tap(0, tap(0, t) + 0.1) + 0.1) + 1.0  # Triple tap
+        t = tap(0, t, length=1.2) + 1.0  # Long press + hold:1
+        t = tap(1, t) + 1.0  # Short press with nothing else bound
+        edge(2, True, t)
+        edge(3, True, t + 0.02)  # Chord
+        edge(2, False, t + 0.2)
+        edge(3, False, t + 0.2)
+        t += 1.0
+        t = tap(2, t) + 1.0  # Chord member pressed alone
+        edges += 24
+    scheduler.advance_to(t + 10)
+    elapsed = time.perf_counter() - started
+
+    bounds = {
+        "press": recognizer.chord_window,
+        "release": 0.0,
+        "hold": 0.0,
+        "short_press": recognizer.tap_window,
+        "double_tap": recognizer.tap_window,
+        "triple_tap": 0.0,
+        "long_press": 0.0,
+        "chord": 0.0
+    }
+    stats = recognizer.stats()
+    print(f"{'gesture':<12} {'count':>6} {'mean ms':>9} {'max ms':>8} {'bound ms':>9}")
+    ok = True
+    for kind, bound in bounds.items():
+        s = stats.get(kind, {"count": 0, "mean_latency_ms": 0, "max_latency_ms": 0})
+        within = s["max_latency_ms"] <= bound * 1000 + 1e-6
+        ok = ok and within and s["count"] > 0
+        print(f"{kind:<12} {s['count']:>6} {s['mean_latency_ms']:>9.3f} {s['max_latency_ms']:>8.3f} {bound * 1000:>9.1f} {'ok' if within else 'OVER'}")
+    print(f"Recognizer throughput: {edges / elapsed:,.0f} edges/s ({elapsed / edges * 1e6:.2f} µs per edge)")
+    return ok
+
+if __name__ == "__main__":
+    raise SystemExit(0 if run_benchmark() else 1)
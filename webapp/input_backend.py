@@ -0,0 +1,344 @@
+"""
+Resident input injection.
+
+The service opens one injector when it starts and keeps it, so a click is an
+in-process call instead of an import plus controller setup (or a process
+launch) per press. Injectors, in order of preference:
+
+    uinput   a virtual device via python-evdev (Linux, works under X11 and
+             Wayland; needs write access to /dev/uinput)
+    pynput   one resident pynput controller (XTest on X11, SendInput on
+             Windows, Quartz on macOS)
+    null     records events in memory - for tests and benchmarks
+
+Timed sequences are played against absolute deadlines on the perf_counter
+clock: the player sleeps until just before each event and spins the last
+stretch, so errors don't accumulate the way chained time.sleep calls do.
+Every sequence reports its timing error.
+
+Run this file directly to benchmark events per second and scheduling error.
+"""
+
+import sys
+import threading
+import time
+
+try:
+    import evdev
+    from evdev import ecodes
+except ImportError:
+    evdev = None
+
+SPIN_SECONDS = 0.002  # Busy-wait this close to a deadline instead of sleeping
+BUTTONS = ("left", "right", "middle")
+# Modifier/special key names accepted in key combos besides single characters
+SPECIAL_KEYS = ("ctrl", "shift", "alt", "cmd", "enter", "esc", "tab", "space", "backspace", "delete",
+                "up", "down", "left", "right", "home", "end", "page_up", "page_down",
+                "media_play_pause", "media_next", "media_previous", "media_volume_up", "media_volume_down",
+                *(f"f{n}" for n in range(1, 13)))
+
+def check_key(key):
+    """Raise ValueError unless key is a single character or a known special key name"""
+    if not isinstance(key, str) or (len(key) != 1 and key not in SPECIAL_KEYS):
+        raise ValueError(f"Unknown key {key!r}")
+
+def parse_combo(combo):
+    """"ctrl+shift+s" -> ["ctrl", "shift", "s"] - raises ValueError for unknown keys"""
+    keys = [k.strip().lower() for k in combo.split('+') if k.strip()]
+    for key in keys:
+        check_key(key)
+    if not keys:
+        raise ValueError("Empty key combo")
+    return keys
+
+def wait_until(deadline):
+    """Sleep, then spin, until perf_counter() reaches deadline - returns how late we were"""
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return -remaining
+        if remaining > SPIN_SECONDS:
+            time.sleep(remaining - SPIN_SECONDS)
+
+class NullInjector:
+    """Records (time, kind, args) instead of touching real input"""
+    name = "null"
+
+    def __init__(self):
+        self.events = []
+
+    def move(self, dx, dy):
+        """Relative pointer motion"""
+        self.events.append((time.perf_counter(), "move", (dx, dy)))
+
+    def button(self, button, down):
+        """Press (down=True) or release a mouse button"""
+        self.events.append((time.perf_counter(), "button", (button, down)))
+
+    def key(self, key, down):
+        """Press (down=True) or release a key"""
+        self.events.append((time.perf_counter(), "key", (key, down)))
+
+    def close(self):
+        """Nothing to release"""
+
+class PynputInjector:
+    """One pynput mouse + keyboard controller, kept for the life of the process"""
+    name = "pynput"
+
+    def __init__(self):
+        from pynput import keyboard, mouse
+        self.mouse = mouse.Controller()
+        self.keyboard = keyboard.Controller()
+        self.buttons = {b: getattr(mouse.Button, b) for b in BUTTONS}
+        self.keys = {k: getattr(keyboard.Key, k) for k in SPECIAL_KEYS if hasattr(keyboard.Key, k)}
+
+    def move(self, dx, dy):
+        """Relative pointer motion"""
+        self.mouse.move(dx, dy)
+
+    def button(self, button, down):
+        """Press (down=True) or release a mouse button"""
+        (self.mouse.press if down else self.mouse.release)(self.buttons[button])
+
+    def key(self, key, down):
+        """Press (down=True) or release a key"""
+        (self.keyboard.press if down else self.keyboard.release)(self.keys.get(key, key))
+
+    def close(self):
+        """Controllers hold no resources of their own"""
+
+class UinputInjector:
+    """Virtual mouse + keyboard through /dev/uinput"""
+    name = "uinput"
+    KEY_NAMES = {"ctrl": "LEFTCTRL", "shift": "LEFTSHIFT", "alt": "LEFTALT", "cmd": "LEFTMETA",
+                 "esc": "ESC", "page_up": "PAGEUP", "page_down": "PAGEDOWN",
+                 "media_play_pause": "PLAYPAUSE", "media_next": "NEXTSONG", "media_previous": "PREVIOUSSONG",
+                 "media_volume_up": "VOLUMEUP", "media_volume_down": "VOLUMEDOWN",
+                 # Characters whose key isn't named after them (US layout)
+                 " ": "SPACE", ".": "DOT", ",": "COMMA", "/": "SLASH", "\\": "BACKSLASH", "-": "MINUS",
+                 "=": "EQUAL", ";": "SEMICOLON", "'": "APOSTROPHE", "`": "GRAVE", "[": "LEFTBRACE",
+                 "]": "RIGHTBRACE", "\t": "TAB", "\n": "ENTER"}
+    # Characters typed with shift held, and the unshifted character on the same key
+    SHIFTED = {"!": "1", "@": "2", "#": "3", "$": "4", "%": "5", "^": "6", "&": "7", "*": "8", "(": "9",
+               ")": "0", "_": "-", "+": "=", ":": ";", '"': "'", "~": "`", "{": "[", "}": "]", "|": "\\",
+               "<": ",", ">": ".", "?": "/"}
+    BUTTON_CODES = {"left": "BTN_LEFT", "right": "BTN_RIGHT", "middle": "BTN_MIDDLE"}
+
+    def __init__(self):
+        if evdev is None:
+            raise RuntimeError("python-evdev is not installed")
+        keys = [code for name, code in ecodes.ecodes.items() if name.startswith("KEY_")]
+        buttons = [getattr(ecodes, b) for b in self.BUTTON_CODES.values()]
+        self.device = evdev.UInput(
+            {ecodes.EV_KEY: sorted(set(keys + buttons)), ecodes.EV_REL: [ecodes.REL_X, ecodes.REL_Y]},
+            name="other-hand-input"
+        )
+
+    def _unshift(self, key):
+        """(key on the keyboard, whether shift is needed) for a key name or character"""
+        if key in self.SHIFTED:
+            return self.SHIFTED[key], True
+        if len(key) == 1 and key.isupper():
+            return key.lower(), True
+        return key, False
+
+    def _code(self, key):
+        """evdev key code for an unshifted key name or character - ValueError if there is none"""
+        code = getattr(ecodes, "KEY_" + self.KEY_NAMES.get(key, key).upper(), None)
+        if not isinstance(code, int):
+            raise ValueError(f"No uinput key code for {key!r}")
+        return code
+
+    def check_key(self, key):
+        """Raise ValueError if this key can't be injected"""
+        self._code(self._unshift(key)[0])
+
+    def move(self, dx, dy):
+        """Relative pointer motion"""
+        self.device.write(ecodes.EV_REL, ecodes.REL_X, int(dx))
+        self.device.write(ecodes.EV_REL, ecodes.REL_Y, int(dy))
+        self.device.syn()
+
+    def button(self, button, down):
+        """Press (down=True) or release a mouse button"""
+        self.device.write(ecodes.EV_KEY, getattr(ecodes, self.BUTTON_CODES[button]), int(down))
+        self.device.syn()
+
+    def key(self, key, down):
+        """Press (down=True) or release a key - shifted characters hold shift around it"""
+        key, shifted = self._unshift(key)
+        if shifted and down:
+            self.device.write(ecodes.EV_KEY, ecodes.KEY_LEFTSHIFT, 1)
+        self.device.write(ecodes.EV_KEY, self._code(key), int(down))
+        if shifted and not down:
+            self.device.write(ecodes.EV_KEY, ecodes.KEY_LEFTSHIFT, 0)
+        self.device.syn()
+
+    def close(self):
+        """Remove the virtual device"""
+        self.device.close()
+
+INJECTORS = {"uinput": UinputInjector, "pynput": PynputInjector, "null": NullInjector}
+
+class InputService:
+    """One injector, opened once; clicks, moves, key combos and timed sequences"""
+
+    def __init__(self, preference=("uinput", "pynput")):
+        self.preference = preference
+        self.injector = None
+        self.errors = {}  # Injector name -> why it couldn't open
+        self.lock = threading.RLock()  # One sequence at a time
+        self.events = 0
+        self.sequences = 0
+        self.last_timing = None
+
+    def open(self):
+        """Open the first injector that works - returns it, or None"""
+        with self.lock:
+            if self.injector is None:
+                for name in self.preference:
+                    try:
+                        self.injector = INJECTORS[name]()
+                        break
+                    except Exception as e:
+                        self.errors[name] = str(e)
+            return self.injector
+
+    def close(self):
+        """Release the injector"""
+        with self.lock:
+            if self.injector:
+                self.injector.close()
+                self.injector = None
+
+    def _require(self):
+        """The open injector - raises RuntimeError if none could be opened"""
+        injector = self.injector or self.open()
+        if injector is None:
+            raise RuntimeError("No input injector available: " + "; ".join(f"{k}: {v}" for k, v in self.errors.items()))
+        return injector
+
+    def click(self, button="left", count=1, interval=0.05):
+        """Click at the current pointer position"""
+        events = []
+        for n in range(count):
+            events += [(n * interval, "button", (button, True)), (n * interval, "button", (button, False))]
+        return self.play(events)
+
+    def move(self, dx, dy):
+        """Move the pointer relative to where it is"""
+        return self.play([(0.0, "move", (dx, dy))])
+
+    def press_combo(self, combo, hold=0.0):
+        """Press a combo like "ctrl+c": keys down in order, then up in reverse"""
+        keys = parse_combo(combo)
+        events = [(0.0, "key", (k, True)) for k in keys] + [(hold, "key", (k, False)) for k in reversed(keys)]
+        return self.play(events)
+
+    def type_text(self, text, interval=0.01):
+        """Type characters one after another"""
+        events = []
+        for n, char in enumerate(text):
+            events += [(n * interval, "key", (char, True)), (n * interval, "key", (char, False))]
+        return self.play(events)
+
+    def validate(self, events, injector=None):
+        """Raise ValueError for an event the injector can't play - before anything is injected"""
+        injector = injector or self._require()
+        for _, kind, args in events:
+            if kind == "key":
+                check_key(args[0])
+                if hasattr(injector, "check_key"):
+                    injector.check_key(args[0])
+            elif kind == "button":
+                if args[0] not in BUTTONS:
+                    raise ValueError(f"Unknown mouse button {args[0]!r}")
+            elif kind != "move":
+                raise ValueError(f"Unknown event kind {kind!r}")
+
+    def play(self, events, speed=1.0):
+        """Inject (offset_seconds, kind, args) events on schedule - returns timing error stats.
+
+        Keys and buttons still down when the sequence stops early (an injector
+        error, an interrupt) are released, so nothing stays held at the OS level.
+        """
+        with self.lock:
+            injector = self._require()
+            self.validate(events, injector)
+            start = time.perf_counter()
+            errors = []
+            held = {}  # (kind, name) -> True while pressed
+            try:
+                for offset, kind, args in events:
+                    deadline = start + offset / speed
+                    wait_until(deadline)
+                    errors.append(time.perf_counter() - deadline)
+                    getattr(injector, kind)(*args)
+                    if kind != "move":
+                        if args[1]:
+                            held[(kind, args[0])] = True
+                        else:
+                            held.pop((kind, args[0]), None)
+            finally:
+                for kind, name in reversed(list(held)):
+                    try:
+                        getattr(injector, kind)(name, False)
+                    except Exception as e:
+                        print(f"Error releasing {kind} {name}: {e}")
+            self.events += len(events)
+            self.sequences += 1
+            self.last_timing = timing_stats(errors)
+            return self.last_timing
+
+    def stats(self):
+        """Which injector is open and what was injected"""
+        return {
+            "injector": self.injector.name if self.injector else None,
+            "errors": self.errors,
+            "events": self.events,
+            "sequences": self.sequences,
+            "last_timing": self.last_timing
+        }
+
+def timing_stats(errors):
+    """Per-event lateness (seconds) -> summary in microseconds"""
+    if not errors:
+        return {"events": 0}
+    ordered = sorted(errors)
+    return {
+        "events": len(errors),
+        "mean_us": round(sum(errors) / len(errors) * 1e6, 1),
+        "p95_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e6, 1),
+        "max_us": round(ordered[-1] * 1e6, 1)
+    }
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared():
+    """The process-wide InputService, opened on first use"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = InputService()
+        return _shared
+
+def run_benchmark(injector_names=("null",)):
+    """Burst throughput and timed-sequence scheduling error per injector"""
+    for name in injector_names:
+        service = InputService(preference=(name,))
+        if not service.open():
+            print(f"{name}: unavailable ({service.errors.get(name)})")
+            continue
+        burst = [(0.0, "move", (1, 0))] * 20000
+        started = time.perf_counter()
+        service.play(burst)
+        elapsed = time.perf_counter() - started
+        timed = [(n * 0.005, "move", (0, 1)) for n in range(200)]  # 200 Hz for 1 s
+        timing = service.play(timed)
+        print(f"{name}: {len(burst) / elapsed:,.0f} events/s burst; 200 Hz sequence error {timing}")
+        service.close()
+
+if __name__ == "__main__":
+    run_benchmark(sys.argv[1:] or ("null",))
@@ -0,0 +1,188 @@
+"""
+Instance-aware app launcher for launcher modules.
+
+Resolved executable paths are cached, so a press doesn't search PATH (or run
+`which`) again. Launched apps are started fully detached - new session, no
+inherited stdio - and the Popen handle is kept, so the module returns at once
+and the app never holds an executor slot or shows up as a leaked process.
+
+A repeat press focuses the app instead of starting a second copy: first the
+window of the process we launched, then any window whose title matches (for
+apps that hand off to an existing instance, and for URLs opened in a browser).
+A new instance is only started when ours has exited and no matching window
+can be focused.
+
+The registry lives in the process that calls shared(), so modules that use
+it declare "Runner: in-process": the server's instance is the one every
+press sees, and the one /api/launcher/stats reports.
+"""
+
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import time
+import webbrowser
+
+IS_WINDOWS = os.name == "nt"
+MISS_RETRY_SECONDS = 60  # Re-check PATH for executables that weren't found
+FOCUS_TIMEOUT = 2.0
+
+class Launcher:
+    """Cached executable lookup, detached launches and focus-instead-of-relaunch"""
+
+    def __init__(self):
+        self.paths = {}  # name -> (path or None, resolved_at)
+        self.running = {}  # key -> Popen of the instance we launched
+        self.lock = threading.Lock()
+        self.system = platform.system()
+        self.counts = {"launched": 0, "focused": 0, "lookups": 0, "lookup_hits": 0}
+
+    # ---- executables ----
+
+    def which(self, *names):
+        """First of names found on PATH (cached) - None if none are installed"""
+        for name in names:
+            with self.lock:
+                self.counts["lookups"] += 1
+                cached = self.paths.get(name)
+            if cached and (cached[0] or time.monotonic() - cached[1] < MISS_RETRY_SECONDS):
+                self.counts["lookup_hits"] += 1
+                path = cached[0]
+            else:
+                path = shutil.which(name)
+                with self.lock:
+                    self.paths[name] = (path, time.monotonic())
+            if path:
+                return path
+        return None
+
+    # ---- launching ----
+
+    def spawn(self, argv, shell=False):
+        """Start a fully detached process - returns its Popen"""
+        kwargs = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL,
+                  "close_fds": True, "shell": shell}
+        if IS_WINDOWS:
+            kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        return subprocess.Popen(argv, **kwargs)
+
+    def alive(self, key):
+        """The process we launched under key, if it's still running"""
+        with self.lock:
+            proc = self.running.get(key)
+        if proc is None or proc.poll() is not None:  # poll() also reaps it
+            return None
+        return proc
+
+    def launch(self, key, argv, window_title=None, shell=False):
+        """Focus the running instance, or start one - returns "focused", "running" or "launched".
+
+        "running" means our instance is alive but its window couldn't be raised
+        (no xdotool/wmctrl) - a duplicate is still not started.
+        """
+        proc = self.alive(key)
+        if proc:
+            if self.focus(pid=proc.pid) or (window_title and self.focus(title=window_title)):
+                self.counts["focused"] += 1
+                return "focused"
+            return "running"
+        if window_title and self.focus(title=window_title):
+            self.counts["focused"] += 1
+            return "focused"
+        proc = self.spawn(argv, shell)
+        with self.lock:
+            self.running[key] = proc
+            self.counts["launched"] += 1
+        return "launched"
+
+    def open_url(self, url, window_title=None):
+        """Focus a browser window showing the site, or open the URL - returns "focused" or "launched" """
+        if window_title and self.focus(title=window_title):
+            self.counts["focused"] += 1
+            return "focused"
+        webbrowser.open(url)
+        self.counts["launched"] += 1
+        return "launched"
+
+    # ---- focusing ----
+
+    def focus(self, pid=None, title=None):
+        """Raise a window by owning process or title substring - True if one was raised"""
+        try:
+            if IS_WINDOWS:
+                return self._focus_windows(pid, title)
+            if self.system == "Linux":
+                return self._focus_x11(pid, title)
+        except (OSError, subprocess.SubprocessError):
+            pass
+        return False
+
+    def _focus_x11(self, pid, title):
+        """xdotool (by pid or title), else wmctrl (by title)"""
+        xdotool = self.which("xdotool")
+        if xdotool:
+            query = ["--pid", str(pid)] if pid else ["--name", title]
+            result = subprocess.run([xdotool, "search", "--onlyvisible", *query, "windowactivate"],
+                                    capture_output=True, timeout=FOCUS_TIMEOUT)
+            return result.returncode == 0
+        wmctrl = self.which("wmctrl")
+        if wmctrl and title:
+            return subprocess.run([wmctrl, "-a", title], capture_output=True, timeout=FOCUS_TIMEOUT).returncode == 0
+        return False
+
+    def _focus_windows(self, pid, title):
+        """EnumWindows for a visible window of the process (or with the title), then bring it forward"""
+        import ctypes
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        found = []
+
+        @ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+        def visit(hwnd, _):
+            if not user32.IsWindowVisible(hwnd):
+                return True
+            if pid:
+                owner = wintypes.DWORD()
+                user32.GetWindowThreadProcessId(hwnd, ctypes.byref(owner))
+                if owner.value == pid:
+                    found.append(hwnd)
+                    return False
+            if title:
+                buffer = ctypes.create_unicode_buffer(256)
+                user32.GetWindowTextW(hwnd, buffer, 256)
+                if title.lower() in buffer.value.lower():
+                    found.append(hwnd)
+                    return False
+            return True
+
+        user32.EnumWindows(visit, 0)
+        if not found:
+            return False
+        user32.ShowWindow(found[0], 9)  # SW_RESTORE
+        return bool(user32.SetForegroundWindow(found[0]))
+
+    def stats(self):
+        """Launch/focus counters, cached paths and the instances still running"""
+        with self.lock:
+            keys = list(self.running)
+            paths = {name: path for name, (path, _) in self.paths.items()}
+        return {
+            **self.counts,
+            "paths": paths,
+            "running": {key: self.running[key].pid for key in keys if self.alive(key)}
+        }
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared():
+    """The process-wide Launcher"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Launcher()
+        return _shared
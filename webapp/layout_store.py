@@ -0,0 +1,336 @@
+"""
+In-memory layout store backed by layout.json.
+
+The dispatcher reads slot assignments from memory instead of re-reading the
+file on every press. Writes are atomic (write to a temp file, fsync, rename),
+guarded by an ETag precondition, and return a diff that can be pushed to
+clients.
+
+A layout holds named profiles, each with an ordered list of layers, and each
+layer is a slot map. Every layer is resolved into memory at load, so switching
+the active layer or profile only swaps which slot map the dispatcher reads -
+the file is never rewritten for a switch. A plain flat slot map (the original
+layout.json format) is read as profile "default" with a single layer, and is
+written back in that form while it stays that simple.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+SLOT_IDS = ("000", "001", "010", "011", "100", "101", "110", "111")
+DEFAULT_PROFILE = "default"
+
+# Slot bindings starting with '@' switch layers/profiles instead of running a script:
+# "@next_layer", "@prev_layer", "@layer:<n>" and "@profile:<name>"
+
+# A slot (or a gesture in a gesture map) can also bind a module with per-slot
+# arguments, passed to its action() at dispatch, plus optional display overrides:
+# {"module": "play_sound", "args": {"file": "boom.mp3"}, "name": "Vine Boom", "icon": "📲"}
+
+# Module ids that were folded into a parameterized module - saved layouts that
+# still bind them are rewritten to the equivalent binding when they load
+RENAMED_MODULES = {
+    "bruh": {"module": "play_sound", "args": {"file": "bruh.mp3"},
+             "name": "Bruh", "icon": "🤦‍♂️", "color": "#FFFF33"},
+    "vine_boom": {"module": "play_sound", "args": {"file": "boom.mp3"},
+                  "name": "Vine Boom", "icon": "📲", "color": "#FF00FF"},
+    "rl": {"module": "play_sound", "args": {"file": "rl.mp3"},
+           "name": "This is Rocket League", "icon": "🏎️", "color": "#66B2FF"},
+}
+
+class LayoutConflict(Exception):
+    """Raised when a write's precondition doesn't match the current layout"""
+
+    def __init__(self, current_etag):
+        super().__init__(f"Layout changed (current version {current_etag})")
+        self.current_etag = current_etag
+
+def empty_layout():
+    """Layout with every slot unassigned"""
+    return {slot: None for slot in SLOT_IDS}
+
+def compute_etag(layout):
+    """Content hash of a layout, stable across restarts"""
+    data = json.dumps(layout, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()[:16]
+
+def is_layer_action(binding):
+    """Whether a slot binding is a layer/profile switch"""
+    return isinstance(binding, str) and binding.startswith("@")
+
+def is_module_binding(binding):
+    """Whether a slot binding is a module with per-slot arguments (rather than a gesture map)"""
+    return isinstance(binding, dict) and "module" in binding
+
+def split_binding(binding):
+    """Module binding or module id -> (module_id, args)"""
+    if is_module_binding(binding):
+        return binding["module"], dict(binding.get("args") or {})
+    return binding, {}
+
+def binding_label(binding):
+    """Readable, stable name for a binding - "play_sound(file=boom.mp3)" """
+    module_id, args = split_binding(binding)
+    if not args:
+        return module_id
+    return f"{module_id}(" + ", ".join(f"{k}={args[k]}" for k in sorted(args)) + ")"
+
+def migrate_binding(binding):
+    """A binding with any renamed module id replaced, including inside a gesture map"""
+    if isinstance(binding, str) and binding in RENAMED_MODULES:
+        return json.loads(json.dumps(RENAMED_MODULES[binding]))  # A copy the layout can own
+    if isinstance(binding, dict) and not is_module_binding(binding):
+        return {gesture: migrate_binding(target) for gesture, target in binding.items()}
+    return binding
+
+def normalize_document(data):
+    """Turn either layout.json format into {active_profile, active_layer, profiles}"""
+    if "profiles" not in data:
+        data = {"profiles": {DEFAULT_PROFILE: {"layers": [{"name": "Base", "slots": data}]}}}
+
+    profiles = {}
+    for profile_name, profile in data["profiles"].items():
+        raw_layers = profile.get("layers", []) if isinstance(profile, dict) else profile
+        layers = []
+        for index, layer in enumerate(raw_layers or [{}]):
+            if "slots" not in layer:
+                layer = {"slots": layer}
+            layers.append({
+                "name": layer.get("name") or f"Layer {index + 1}",
+                "slots": {**empty_layout(), **{slot: migrate_binding(b) for slot, b in layer["slots"].items()}}
+            })
+        profiles[profile_name] = {"layers": layers}
+
+    if not profiles:
+        profiles[DEFAULT_PROFILE] = {"layers": [{"name": "Base", "slots": empty_layout()}]}
+
+    active_profile = data.get("active_profile")
+    if active_profile not in profiles:
+        active_profile = next(iter(profiles))
+    active_layer = data.get("active_layer", 0)
+    if not isinstance(active_layer, int) or not 0 <= active_layer < len(profiles[active_profile]["layers"]):
+        active_layer = 0
+
+    return {"active_profile": active_profile, "active_layer": active_layer, "profiles": profiles}
+
+def serialize_document(doc):
+    """Write the simple flat format while the layout is a single profile/layer"""
+    profiles = doc["profiles"]
+    if list(profiles) == [DEFAULT_PROFILE] and len(profiles[DEFAULT_PROFILE]["layers"]) == 1:
+        layer = profiles[DEFAULT_PROFILE]["layers"][0]
+        if layer["name"] == "Base":
+            return layer["slots"]
+    return doc
+
+def diff_layouts(old, new):
+    """Slots whose assignment changed - {slot: new_value}"""
+    return {
+        slot: new.get(slot)
+        for slot in set(old) | set(new)
+        if old.get(slot) != new.get(slot)
+    }
+
+def atomic_write_json(path, data):
+    """Write JSON next to the target and rename over it, so readers never see a partial file"""
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class LayoutStore:
+    """Thread-safe, versioned view of layout.json with O(1) layer switching"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.doc = normalize_document({})
+        self.etag = compute_etag(self.doc)
+        self.version = 0  # Bumped on every change seen by this process
+        self.mtime = None
+        self.resolved = {}  # Profile -> [slot map per layer]
+        self.active_profile = self.doc["active_profile"]
+        self.active_layer = self.doc["active_layer"]
+        self.active_slots = {}  # The slot map the dispatcher reads
+        self._resolve()
+        self.reload()
+
+    def _resolve(self):
+        """Resolve every profile's layers into memory and re-point the active slot map"""
+        self.resolved = {
+            name: [dict(layer["slots"]) for layer in profile["layers"]]
+            for name, profile in self.doc["profiles"].items()
+        }
+        if self.active_profile not in self.resolved:
+            self.active_profile = self.doc["active_profile"]
+            self.active_layer = self.doc["active_layer"]
+        if not 0 <= self.active_layer < len(self.resolved[self.active_profile]):
+            self.active_layer = 0
+        self.active_slots = self.resolved[self.active_profile][self.active_layer]
+
+    def reload(self):
+        """(Re)load the file if it changed on disk, e.g. from a hand edit"""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self.mtime:
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                doc = normalize_document(json.load(f))
+        except Exception as e:
+            print(f"Error reading layout: {e}")
+            return
+
+        with self.lock:
+            first_load = self.mtime is None
+            self.mtime = mtime
+            etag = compute_etag(doc)
+            if etag != self.etag:
+                self.doc = doc
+                self.etag = etag
+                self.version += 1
+                if first_load:
+                    self.active_profile = doc["active_profile"]
+                    self.active_layer = doc["active_layer"]
+                self._resolve()
+
+    def _target(self, profile, layer):
+        """Resolve an explicit or active (profile, layer index) - raises KeyError if unknown"""
+        profile = self.active_profile if profile is None else profile
+        layer = self.active_layer if layer is None else int(layer)
+        if profile not in self.resolved or not 0 <= layer < len(self.resolved[profile]):
+            raise KeyError(f"Unknown layer {profile}/{layer}")
+        return profile, layer
+
+    def snapshot(self, profile=None, layer=None):
+        """Slot map of a layer (the active one by default), ETag and version"""
+        self.reload()
+        with self.lock:
+            profile, layer = self._target(profile, layer)
+            return dict(self.resolved[profile][layer]), self.etag, self.version
+
+    def document(self):
+        """The whole layout document, ETag and version"""
+        self.reload()
+        with self.lock:
+            return json.loads(json.dumps(self.doc)), self.etag, self.version
+
+    def get_slot(self, slot_id):
+        """Binding for a slot on the active layer - the hot path for button dispatch"""
+        self.reload()
+        return self.active_slots.get(slot_id)
+
+    def active(self):
+        """Currently active profile and layer"""
+        with self.lock:
+            layers = self.doc["profiles"][self.active_profile]["layers"]
+            return {
+                "profile": self.active_profile,
+                "layer": self.active_layer,
+                "layer_name": layers[self.active_layer]["name"],
+                "layer_count": len(layers)
+            }
+
+    def set_active(self, profile=None, layer=None):
+        """Switch profile and/or layer by swapping the active slot map - returns True if it changed.
+
+        layer may be an index, or "next"/"prev" to cycle within the profile.
+        """
+        self.reload()
+        with self.lock:
+            profile = self.active_profile if profile is None else profile
+            if profile not in self.resolved:
+                raise KeyError(f"Unknown profile {profile}")
+            layer_count = len(self.resolved[profile])
+
+            if layer == "next":
+                layer = (self.active_layer + 1) % layer_count
+            elif layer == "prev":
+                layer = (self.active_layer - 1) % layer_count
+            elif layer is None:
+                layer = self.active_layer if profile == self.active_profile else 0
+            layer = int(layer)
+            if not 0 <= layer < layer_count:
+                raise KeyError(f"Unknown layer {profile}/{layer}")
+
+            if (profile, layer) == (self.active_profile, self.active_layer):
+                return False
+            self.active_profile = profile
+            self.active_layer = layer
+            self.active_slots = self.resolved[profile][layer]
+            return True
+
+    def apply_layer_action(self, binding):
+        """Run an '@...' slot binding - returns True if the active layer changed"""
+        if binding == "@next_layer":
+            return self.set_active(layer="next")
+        if binding == "@prev_layer":
+            return self.set_active(layer="prev")
+        if binding.startswith("@layer:"):
+            return self.set_active(layer=int(binding.split(":", 1)[1]))
+        if binding.startswith("@profile:"):
+            return self.set_active(profile=binding.split(":", 1)[1])
+        raise KeyError(f"Unknown layer action {binding}")
+
+    def replace(self, layout, if_match=None, profile=None, layer=None):
+        """Replace a whole document (if it has 'profiles') or one layer's slot map"""
+        if "profiles" in layout:
+            return self._write(lambda doc: normalize_document(layout), if_match)
+
+        def apply(doc):
+            target_profile, target_layer = self._target(profile, layer)
+            doc["profiles"][target_profile]["layers"][target_layer]["slots"] = {**empty_layout(), **layout}
+            return doc
+        return self._write(apply, if_match)
+
+    def set_slot(self, slot_id, binding, if_match, profile=None, layer=None):
+        """Assign one slot on a layer (the active one by default)"""
+        def apply(doc):
+            target_profile, target_layer = self._target(profile, layer)
+            doc["profiles"][target_profile]["layers"][target_layer]["slots"][slot_id] = binding
+            return doc
+        return self._write(apply, if_match)
+
+    def _write(self, apply, if_match):
+        """Check the precondition, write atomically and compute per-layer diffs.
+
+        Returns ([(profile, layer, {slot: binding})], etag, version).
+        """
+        self.reload()
+        with self.lock:
+            if if_match is not None and if_match != self.etag:
+                raise LayoutConflict(self.etag)
+
+            updated = apply(json.loads(json.dumps(self.doc)))
+            diffs = []
+            for name, profile in updated["profiles"].items():
+                old_layers = self.resolved.get(name, [])
+                for index, layer in enumerate(profile["layers"]):
+                    old_slots = old_layers[index] if index < len(old_layers) else {}
+                    changes = diff_layouts(old_slots, layer["slots"])
+                    if changes:
+                        diffs.append((name, index, changes))
+            if updated == self.doc:
+                return diffs, self.etag, self.version
+
+            atomic_write_json(self.path, serialize_document(updated))
+            self.doc = updated
+            self.etag = compute_etag(updated)
+            self.version += 1
+            self.mtime = self.path.stat().st_mtime_ns
+            self._resolve()
+            return diffs, self.etag, self.version
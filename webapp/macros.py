@@ -0,0 +1,217 @@
+"""
+Timed input macros: record, store compactly, play back through the input backend.
+
+A macro is a list of (offset_seconds, kind, args) events - the format
+InputService.play() takes - with kind "move" (dx, dy), "button" (name, down)
+or "key" (name, down). On disk each event is one small array,
+[delta_ms, code, ...args], with times relative to the previous event and
+pointer motion coalesced to at most one move per MOVE_COALESCE_MS.
+
+Recording uses pynput listeners (optional); macros can also be written by
+hand or uploaded as JSON. Playback goes through the resident injector's
+deadline scheduler, so every event is placed against the macro's start rather
+than after the previous sleep, and each playback reports its timing error.
+
+Run this file directly to replay a synthetic macro into a null injector and
+check the timing error stays within bounds.
+"""
+
+import json
+import re
+import threading
+import time
+from pathlib import Path
+
+MOVE_COALESCE_MS = 8  # Pointer motion closer together than this is merged
+KIND_CODES = {"move": "m", "button": "b", "key": "k"}
+CODE_KINDS = {v: k for k, v in KIND_CODES.items()}
+NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+def encode(events):
+    """(offset_s, kind, args) events -> compact [delta_ms, code, ...args] rows"""
+    rows = []
+    previous_ms = 0.0
+    for offset, kind, args in events:
+        # Deltas between rounded absolute offsets, so rounding errors don't add up over a long macro
+        offset_ms = round(offset * 1000, 1)
+        delta = round(offset_ms - previous_ms, 1)
+        if kind != "move":
+            args = (args[0], int(args[1]))  # Pressed as 1/0
+        rows.append([int(delta) if delta == int(delta) else delta, KIND_CODES[kind], *args])
+        previous_ms = offset_ms
+    return rows
+
+def decode(rows):
+    """Compact rows -> (offset_s, kind, args) events - raises ValueError on malformed rows"""
+    events = []
+    offset_ms = 0.0
+    for row in rows:
+        if not isinstance(row, list) or len(row) != 4 or row[1] not in CODE_KINDS:
+            raise ValueError(f"Bad macro event {row!r}")
+        delta, code, a, b = row
+        if not isinstance(delta, (int, float)) or delta < 0:
+            raise ValueError(f"Bad event delay {delta!r}")
+        offset_ms += delta
+        kind = CODE_KINDS[code]
+        events.append((offset_ms / 1000, kind, (int(a), int(b)) if kind == "move" else (str(a), bool(b))))
+    return events
+
+def coalesce_moves(events, window=MOVE_COALESCE_MS / 1000):
+    """Merge runs of pointer moves closer than window into one move at the run's end"""
+    merged = []
+    for offset, kind, args in events:
+        if kind == "move" and merged and merged[-1][1] == "move" and offset - merged[-1][0] < window:
+            last = merged.pop()
+            args = (last[2][0] + args[0], last[2][1] + args[1])
+        merged.append((offset, kind, args))
+    return merged
+
+class MacroStore:
+    """Macros as <name>.json files, parsed once per file version"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.cache = {}  # name -> (mtime_ns, events)
+        self.lock = threading.Lock()
+
+    def path(self, name):
+        """File for a macro name - raises ValueError for names that aren't safe file names"""
+        if not NAME_PATTERN.match(name or ""):
+            raise ValueError(f"Invalid macro name {name!r}")
+        return self.directory / f"{name}.json"
+
+    def save(self, name, events):
+        """Write a macro - returns its event count"""
+        path = self.path(name)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"version": 1, "events": encode(events)}, separators=(',', ':')))
+        return len(events)
+
+    def load(self, name):
+        """Events of a macro - raises KeyError if it doesn't exist"""
+        path = self.path(name)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            raise KeyError(f"Macro not found: {name}")
+        with self.lock:
+            entry = self.cache.get(name)
+            if entry and entry[0] == mtime:
+                return entry[1]
+        events = decode(json.loads(path.read_text()).get("events", []))
+        with self.lock:
+            self.cache[name] = (mtime, events)
+        return events
+
+    def delete(self, name):
+        """Remove a macro - raises KeyError if it doesn't exist"""
+        try:
+            self.path(name).unlink()
+        except FileNotFoundError:
+            raise KeyError(f"Macro not found: {name}")
+
+    def list(self):
+        """Saved macros with event counts and lengths"""
+        macros = []
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                events = self.load(path.stem)
+            except (KeyError, ValueError, json.JSONDecodeError):
+                continue
+            macros.append({
+                "name": path.stem,
+                "events": len(events),
+                "seconds": round(events[-1][0], 3) if events else 0.0,
+                "bytes": path.stat().st_size
+            })
+        return macros
+
+class MacroRecorder:
+    """Capture mouse and keyboard events with pynput listeners"""
+
+    def __init__(self):
+        self.events = []
+        self.listeners = []
+        self.started = None
+        self.last_position = None
+        self.lock = threading.Lock()
+
+    def recording(self):
+        """Whether a recording is in progress"""
+        return bool(self.listeners)
+
+    def start(self):
+        """Start capturing - raises RuntimeError if pynput isn't available"""
+        try:
+            from pynput import keyboard, mouse
+        except ImportError as e:
+            raise RuntimeError(f"Recording needs pynput: {e}")
+        self.stop()
+        self.events = []
+        self.last_position = None
+        self.started = time.perf_counter()
+        self.listeners = [
+            mouse.Listener(on_move=self._on_move, on_click=self._on_click),
+            keyboard.Listener(on_press=lambda k: self._on_key(k, True), on_release=lambda k: self._on_key(k, False))
+        ]
+        for listener in self.listeners:
+            listener.start()
+
+    def stop(self):
+        """Stop capturing - returns the coalesced events"""
+        for listener in self.listeners:
+            listener.stop()
+        self.listeners = []
+        with self.lock:
+            return coalesce_moves(self.events)
+
+    def _add(self, kind, args):
+        """Timestamp an event relative to the start of the recording"""
+        with self.lock:
+            self.events.append((time.perf_counter() - self.started, kind, args))
+
+    def _on_move(self, x, y):
+        """Pointer moved - store the delta from the last position"""
+        if self.last_position is not None:
+            self._add("move", (x - self.last_position[0], y - self.last_position[1]))
+        self.last_position = (x, y)
+
+    def _on_click(self, x, y, button, pressed):
+        """Button pressed or released (after catching up on pointer motion)"""
+        self._on_move(x, y)
+        self._add("button", (button.name, pressed))
+
+    def _on_key(self, key, down):
+        """Key pressed or released, named the way parse_combo names keys"""
+        name = getattr(key, "char", None) or getattr(key, "name", None)
+        if name:
+            # pynput tells left/right modifiers apart ("ctrl_l"); playback doesn't
+            self._add("key", (re.sub(r'_[lr]$', '', name.lower()) if len(name) > 1 else name, down))
+
+def run_check(jitter_bound_us=5000, mean_bound_us=500):
+    """Replay a synthetic macro into a null injector and check timing error bounds"""
+    from input_backend import InputService
+    events = []
+    for n in range(100):  # 2 s: a click every 40 ms, pointer moves in between
+        at = n * 0.02
+        if n % 2:
+            events.append((at, "move", (3, -1)))
+        else:
+            events += [(at, "button", ("left", True)), (at + 0.005, "button", ("left", False))]
+    events.sort(key=lambda e: e[0])
+    restored = decode(json.loads(json.dumps(encode(events))))
+    assert [e[1:] for e in restored] == [e[1:] for e in events], "round trip changed the events"
+
+    service = InputService(preference=("null",))
+    timing = service.play(restored)
+    injected = service.injector.events
+    drift_us = abs((injected[-1][0] - injected[0][0]) - (restored[-1][0] - restored[0][0])) * 1e6
+    print(f"{len(injected)} events over {restored[-1][0]:.3f} s; timing {timing}; end-to-end drift {drift_us:.0f} us")
+    assert len(injected) == len(events), "events were lost"
+    assert timing["max_us"] <= jitter_bound_us, f"max error {timing['max_us']} us over {jitter_bound_us}"
+    assert timing["mean_us"] <= mean_bound_us, f"mean error {timing['mean_us']} us over {mean_bound_us}"
+    assert drift_us <= jitter_bound_us, f"drift {drift_us:.0f} us over {jitter_bound_us}"
+    print("ok")
+
+if __name__ == "__main__":
+    run_check()
@@ -1,9 +1,10 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, send_from_directory
 from flask_socketio import SocketIO, emit
 import os
 import json
 import re
 import asyncio
+import atexit
 import threading
 import logging
 import subprocess
@@ -11,11 +12,42 @@ import sys
 from bleak import BleakClient, BleakScanner
 import time
 import platform
+import bisect
+import uuid
+import functools
+from collections import deque
 from pathlib import Path
+from broadcaster import (SocketBroadcaster, DEFAULT_TOPICS, TOPIC_LOGS, TOPIC_BUTTONS,
+                         TOPIC_STATUS, TOPIC_RUNS, TOPIC_SCRIPTS, TOPIC_LAYOUT, TOPIC_AUDIO, script_topic)
+from assets import AssetPipeline
+from layout_store import (LayoutStore, LayoutConflict, SLOT_IDS, is_layer_action, is_module_binding,
+                          split_binding, binding_label)
+from scheduler import TimerScheduler
+from gestures import GestureRecognizer
+from warm_workers import WarmModuleCache, RepeatWorker, Prewarmer, WarmProcessPool
+from control_stream import ControlStream
+from resources import ResourceLocks
+from executor import ActivationExecutor
+from process_groups import run_in_group, LeakTracker, exit_status
+from script_index import ScriptIndex, DEFAULT_TIMEOUT, build_script, split_docstring
+from audio_ingest import AudioIngest, HttpPcmSource, FakePcmSource
+from audio_triggers import ClapDetector, CLAP_GESTURES
+from audio_relay import AudioRelay
+from audio_recorder import AudioRecorder
+from audio_spectrum import SpectrumStage
+import input_backend
+import launcher
+from macros import MacroStore, MacroRecorder, encode as encode_macro, decode as decode_macro
 
 app = Flask(__name__)
 socketio = SocketIO(app, cors_allowed_origins="*")
 
+# Per-client outbound queues so a slow tab never blocks the BLE thread
+broadcaster = SocketBroadcaster(socketio, max_queue=200)
+
+# Hashed, precompressed static files and a cached index page
+assets = AssetPipeline(app)
+
 # Configuration - OS agnostic paths
 BASE_DIR = Path(__file__).parent
 SCRIPTS_DIR = BASE_DIR / 'scripts'
@@ -24,6 +56,12 @@ LAYOUT_FILE = BASE_DIR / 'layout.json'
 # Ensure directories exist
 SCRIPTS_DIR.mkdir(exist_ok=True)
 
+# In-memory layout - the dispatcher's activation index
+layout_store = LayoutStore(LAYOUT_FILE)
+
+# Script docstring metadata and execution policy, parsed once per file version
+script_index = ScriptIndex()
+
 # OS Detection
 IS_WINDOWS = platform.system() == "Windows"
 IS_LINUX = platform.system() == "Linux"
@@ -42,18 +80,191 @@ last_button_state = {}
 ble_logs = []
 MAX_LOG_LINES = 100
 
-# Button activation tracking
-button_states = {}  # Track press/release states for each module
-button_timers = {}  # Track hold timers for each module
+# Sequenced event stream - every log entry and event gets a cursor so
+# reconnecting clients can ask for only what they missed
+STREAM_ID = uuid.uuid4().hex[:12]  # Changes on every server start
+MAX_EVENT_LINES = 50
+ble_events = deque()  # Retained button/status events, oldest first
+event_seq = 0  # Last sequence number handed out
+log_floor = 0  # Highest seq of a log entry that fell out of retention
+event_floor = 0  # Highest seq of an event that fell out of retention
+event_lock = threading.Lock()
+
+# Gesture recognition - one timer thread drives every hold, tap window and chord window
+GESTURE_TAP_WINDOW = 0.25  # Max gap between taps of a double/triple tap (s)
+GESTURE_LONG_PRESS = 0.5  # Held at least this long is a long press (s)
+GESTURE_CHORD_WINDOW = 0.05  # Chord members must be pressed this close together (s)
+timer_scheduler = TimerScheduler()
+
+# Modules run as a subprocess unless they opt in: "Runner: warm pool" keeps an
+# isolated worker process, "Runner: in-process" (only for short, known-safe
+# actions - it can't be killed) runs action() inside the server. Launcher modules
+# run in-process, so every press sees the server's launcher.shared() registry.
+# The encoder cursor ("C,<position>") hints which one to prewarm before its press
+WARM_MODULE_CAPACITY = 6  # Least recently used warm modules are evicted past this
+WARM_IDLE_SECONDS = 300  # Warm modules unused this long release their resources
+warm_modules = WarmModuleCache(capacity=WARM_MODULE_CAPACITY)
+prewarmer = Prewarmer()
+
+# "Runner: warm pool" modules keep a worker process that has already imported them,
+# stopped after WARM_IDLE_SECONDS unused and when the server exits
+warm_pool = WarmProcessPool(BASE_DIR / 'warm_pool_host.py', lambda: get_python_executable(), max_idle=WARM_IDLE_SECONDS)
+atexit.register(warm_pool.stop_all)
+
+# Deadlines - a module's "Max Delay:" metadata is how late (since the edge was
+# received) an activation is still worth running; later ones are dropped
+dispatch_counts = {"dispatched": 0, "expired": 0, "debounced": 0}
+expired_history = deque(maxlen=20)  # Most recent dropped activations
+last_activation = {}  # Binding label -> when it was last dispatched, for "Debounce:"
+
+# Modules declaring the same "Resources:" (camera, audio, input, display) take
+# turns; a module without a deadline waits at most RESOURCE_WAIT_SECONDS
+RESOURCE_WAIT_SECONDS = 30
+resource_locks = ResourceLocks()
+
+# Activations run on a fixed pool ordered by the module's "Priority:" class
+# (critical, interactive, background), with workers kept free for critical ones
+EXECUTOR_WORKERS = 4
+EXECUTOR_CRITICAL_RESERVED = 1  # Workers only critical activations may use
+EXECUTOR_AGING_SECONDS = 2.0  # Each this long in the queue moves a job up one class
+activation_executor = ActivationExecutor(
+    workers=EXECUTOR_WORKERS,
+    critical_reserved=EXECUTOR_CRITICAL_RESERVED,
+    aging_seconds=EXECUTOR_AGING_SECONDS,
+    resource_locks=resource_locks
+)
+
+# Script processes run in their own process group; leftovers are tracked here
+LEAK_REAP_SECONDS = 30
+leak_tracker = LeakTracker()
+
+# "@macro:<name>" bindings replay a recorded input macro from MACROS_DIR through
+# the resident input injector, holding the 'input' resource while they play
+MACRO_ACTION_PREFIX = "@macro:"
+MACROS_DIR = BASE_DIR / 'macros'
+macro_store = MacroStore(MACROS_DIR)
+macro_recorder = MacroRecorder()
+macro_history = deque(maxlen=20)  # Timing stats of recent playbacks
+
+# Hold-to-repeat runs the module's action in its warm instance
+REPEAT_MAX_SECONDS = 60  # Safety stop if a release is never received
+repeat_workers = {}  # Position -> running RepeatWorker
+repeat_history = deque(maxlen=20)  # Stats of finished repeat runs
+
+# Microphone stream - one connection to the device's /audio.wav, fed into a
+# ring buffer; level frames go to 'audio' subscribers AUDIO_LEVEL_HZ times a second
+AUDIO_STREAM_URL = "http://192.168.4.1:8080/audio.wav"  # Device access point address
+AUDIO_LEVEL_HZ = 15
+audio_ingest = AudioIngest()
+# Listeners of /api/audio/stream.wav share that one connection, each with a
+# bounded queue (oldest audio dropped when a listener falls behind)
+AUDIO_RELAY_BUFFER_SECONDS = 2.0
+audio_relay = AudioRelay(audio_ingest, AUDIO_RELAY_BUFFER_SECONDS)
+# Binding "@record" to a slot or trigger (or POST /api/audio/record) saves the
+# last RECORD_PRE_ROLL seconds plus the next RECORD_POST_ROLL to RECORDINGS_DIR
+RECORD_ACTION = "@record"
+RECORD_PRE_ROLL = 5.0
+RECORD_POST_ROLL = 5.0
+RECORDINGS_DIR = BASE_DIR / 'recordings'
+audio_recorder = AudioRecorder(audio_ingest, RECORDINGS_DIR, RECORD_PRE_ROLL, RECORD_POST_ROLL)
+# Spectrogram columns (quantized band levels + centroid) for 'audio' subscribers,
+# analysed only while someone is subscribed
+AUDIO_SPECTRUM_HZ = 20
+audio_spectrum = SpectrumStage(audio_ingest, wanted=lambda: broadcaster.has_subscribers(TOPIC_AUDIO))
+
+# Encoder rotation - deltas are coalesced and handed to the layer's "encoder"
+# module's control(delta) at most CONTROL_STREAM_HZ times a second
+CONTROL_STREAM_HZ = 30
+ENCODER_BINDING = "encoder"
+
+def append_log(log_entry):
+    """Stamp a log entry with the next sequence number and retain it"""
+    global event_seq, log_floor
+    with event_lock:
+        event_seq += 1
+        log_entry["seq"] = event_seq
+        ble_logs.append(log_entry)
+
+        # Keep only last MAX_LOG_LINES entries
+        if len(ble_logs) > MAX_LOG_LINES:
+            log_floor = ble_logs.pop(0)["seq"]
+    return log_entry
+
+def record_event(event_type, payload):
+    """Stamp a button/status event with the next sequence number and retain it"""
+    global event_seq, event_floor
+    with event_lock:
+        event_seq += 1
+        payload["seq"] = event_seq
+        ble_events.append({"type": event_type, "seq": event_seq, "data": payload})
+
+        if len(ble_events) > MAX_EVENT_LINES:
+            event_floor = ble_events.popleft()["seq"]
+    return payload
+
+def parse_since(value):
+    """Parse a 'since' cursor from a query string or socket payload"""
+    if value is None or value == "":
+        return None
+    try:
+        since = int(value)
+        return since if since >= 0 else None
+    except (TypeError, ValueError):
+        return None
+
+def get_stream_since(since, stream=None, tail=None):
+    """Return logs and events newer than the cursor, or a full snapshot if a resync is needed"""
+    with event_lock:
+        # Resync when there is no cursor, the cursor is from a previous server
+        # run, or entries the client never saw already fell out of retention
+        resync = (
+            since is None
+            or (stream is not None and stream != STREAM_ID)
+            or since > event_seq
+            or since < log_floor
+            or since < event_floor
+        )
+
+        if resync:
+            logs = ble_logs[-tail:] if tail else list(ble_logs)
+            events = list(ble_events)
+        else:
+            start = bisect.bisect_right(ble_logs, since, key=lambda e: e["seq"])
+            logs = ble_logs[start:]
+            events = [e for e in ble_events if e["seq"] > since]
+
+        return {
+            "logs": logs,
+            "events": events,
+            "seq": event_seq,
+            "stream": STREAM_ID,
+            "resync": resync
+        }
 
 def parse_activation_type(activation_str):
     """Parse activation string to determine type and duration"""
-    activation_str = activation_str.strip().lower()
+    activation_str = activation_str.strip().lower().replace('_', ' ')
     
-    if activation_str == "on press":
+    if activation_str in ("on press", "press"):
         return "press", 0
-    elif activation_str == "on release":
+    elif activation_str in ("on release", "release"):
         return "release", 0
+    elif activation_str in ("short press", "tap", "single tap"):
+        return "short_press", 0
+    elif activation_str == "long press":
+        return "long_press", 0
+    elif activation_str == "double tap":
+        return "double_tap", 0
+    elif activation_str == "triple tap":
+        return "triple_tap", 0
+    elif activation_str.startswith("repeat"):
+        # Parse interval from "repeat every 100ms while held", "repeat every 0.5s", etc.
+        match = re.search(r'repeat(?:\s+every)?\s+(\d+(?:\.\d+)?)\s*(ms|s)?', activation_str)
+        if match:
+            interval = float(match.group(1))
+            if match.group(2) == "s":
+                interval *= 1000
+            return "repeat", max(int(interval), 1)
     elif activation_str.startswith("hold"):
         # Parse duration from "hold 3s", "hold 15s", etc.
         match = re.search(r'hold\s+(\d+)s?', activation_str)
@@ -64,6 +275,322 @@ def parse_activation_type(activation_str):
     # Default to "on press"
     return "press", 0
 
+def gesture_key(activation_type, duration=0):
+    """Gesture name the recognizer uses for an activation type"""
+    if activation_type in ("hold", "repeat"):
+        return f"{activation_type}:{duration}"
+    return activation_type
+
+def gesture_label(gesture):
+    """Human-readable activation label for logs"""
+    if gesture.startswith("hold:"):
+        return f"Hold {gesture.split(':', 1)[1]}s"
+    if gesture.startswith("repeat:"):
+        return f"Repeat every {gesture.split(':', 1)[1]}ms"
+    if gesture in ("press", "release"):
+        return f"On {gesture.title()}"
+    if gesture.startswith("clap:"):
+        return {"1": "Clap", "2": "Double Clap"}.get(gesture.split(':', 1)[1], "Triple Clap")
+    return gesture.replace('_', ' ').title()
+
+def gesture_bindings(position):
+    """Map each gesture bound on a position's slot to its target (module id, module binding or layer action)"""
+    binding = layout_store.get_slot(f"{position:03b}")
+    if not binding:
+        return {}
+    if is_layer_action(binding):
+        return {"press": binding}
+    if isinstance(binding, dict) and not is_module_binding(binding):
+        # Gesture map - each gesture runs its own module, e.g. {"Double Tap": "screenshot"}
+        return {gesture_key(*parse_activation_type(g)): target for g, target in binding.items() if target}
+
+    module_id, _ = split_binding(binding)
+    script_path = SCRIPTS_DIR / f"{module_id}.py"
+    if not script_path.exists():
+        return {}
+    info = script_index.get(script_path)
+    return {gesture_key(*parse_activation_type(info.activation if info else "On Press")): binding}
+
+def chord_bindings():
+    """Chords on the active layer - slot keys like "000+011" map to a target"""
+    chords = {}
+    for key, target in layout_store.active_slots.items():
+        if '+' in key and target:
+            try:
+                chords[frozenset(int(slot, 2) for slot in key.split('+'))] = target
+            except ValueError:
+                continue
+    return chords
+
+def clap_counts():
+    """Clap counts bound on the active layer - keys "clap:1" to "clap:3" """
+    return {count for count, key in CLAP_GESTURES.items() if layout_store.get_slot(key)}
+
+def dispatch_clap(gesture, latency, at_sample):
+    """Clap detector callback (ingest thread) - run the bound target like a button gesture"""
+    target = layout_store.get_slot(gesture)
+    if target:
+        dispatch_gesture((), gesture, target, latency)
+
+def dispatch_gesture(positions, gesture, target, latency):
+    """Run whatever a recognized gesture is bound to - called from the BLE or timer thread"""
+    label = gesture_label(gesture)
+    if gesture == "chord":
+        label = "Chord " + "+".join(f"{p:03b}" for p in positions)
+
+    if target == RECORD_ACTION:
+        record_audio(label)
+        return
+
+    if isinstance(target, str) and target.startswith(MACRO_ACTION_PREFIX):
+        name = target[len(MACRO_ACTION_PREFIX):]
+        submit_macro(name, label)
+        return
+
+    if is_layer_action(target):
+        try:
+            switch_layer(binding=target, reason=f"({label})")
+        except (KeyError, ValueError):
+            if ble_receiver:
+                ble_receiver.add_log(f"❌ Unknown layer action {target}", "error")
+        return
+
+    if gesture == "repeat_end":
+        stop_repeat(positions[0])
+        return
+
+    # Every variant of a parameterized module shares its script, metadata and warm instance
+    module_id, args = split_binding(target)
+    name = binding_label(target)
+    script_path = SCRIPTS_DIR / f"{module_id}.py"
+    info = script_index.get(script_path)
+    if not info:
+        return
+    # latency is measured from the receive time of the edge that completed the gesture
+    max_delay = info.max_delay
+    if max_delay is not None and latency > max_delay:
+        record_expired(name, label, latency, max_delay)
+        return
+    received_at = timer_scheduler.now() - latency
+    if received_at - last_activation.get(name, float('-inf')) < info.debounce:
+        dispatch_counts["debounced"] += 1
+        if ble_receiver:
+            ble_receiver.add_log(f"⏱️ Debounced {name} ({label})")
+        return
+    last_activation[name] = received_at
+    dispatch_counts["dispatched"] += 1
+    if ble_receiver:
+        ble_receiver.add_log(f"🎯 Activating {name} ({label})")
+    if gesture.startswith("repeat:"):
+        start_repeat(positions[0], module_id, script_path, int(gesture.split(':', 1)[1]), args)
+        return
+    deadline = received_at + (max_delay if max_delay is not None else RESOURCE_WAIT_SECONDS)
+    # Max Concurrency is one more resource the run has to hold
+    concurrency_key = f"module:{module_id}"
+    resources = info.resources + [concurrency_key]
+    resource_locks.ensure(concurrency_key, info.max_concurrency)
+    # The executor takes the resources before a worker picks the job up, so a
+    # busy resource never ties up a worker
+    activation_executor.submit(
+        info.priority,
+        run_activation, get_runner(info), str(script_path), module_id, label, args,
+        label=name, resources=resources, deadline=deadline,
+        on_expire=functools.partial(expire_activation, module_id, label, resources, received_at, max_delay)
+    )
+
+def submit_macro(name, label):
+    """Queue a macro to play once the input injector is free"""
+    activation_executor.submit(
+        None, run_macro, name, label,
+        label=f"macro:{name}", resources=["input"], deadline=timer_scheduler.now() + RESOURCE_WAIT_SECONDS,
+        on_expire=functools.partial(expire_macro, name)
+    )
+
+def expire_macro(name, blocked):
+    """Log a macro that waited too long for the input injector"""
+    if ble_receiver:
+        ble_receiver.add_log(f"❌ Macro {name} gave up waiting for input", "error")
+
+def run_macro(name, label):
+    """Play a saved macro on the input injector (executor thread)"""
+    try:
+        events = macro_store.load(name)
+    except (KeyError, ValueError) as e:
+        if ble_receiver:
+            ble_receiver.add_log(f"❌ Macro {name}: {e}", "error")
+        return
+    try:
+        timing = input_backend.shared().play(events)
+    except (RuntimeError, ValueError) as e:  # No injector, or an event it can't play
+        if ble_receiver:
+            ble_receiver.add_log(f"❌ Macro {name}: {e}", "error")
+        return
+    macro_history.append({"name": name, "gesture": label, "timing": timing, "timestamp": time.time()})
+    if ble_receiver:
+        ble_receiver.add_log(f"🎬 Played macro {name} ({label}): {timing['events']} events, max error {timing.get('max_us', 0)}us")
+
+def record_audio(label, pre_roll=None, post_roll=None):
+    """Save audio around now - returns the recording"""
+    if not audio_ingest.running():
+        if ble_receiver:
+            ble_receiver.add_log(f"❌ Can't record ({label}) - the microphone stream isn't running", "error")
+        return None
+    recording = audio_recorder.trigger(label, pre_roll, post_roll)
+    if ble_receiver:
+        ble_receiver.add_log(f"🎙️ Recording audio ({label})")
+    return recording
+
+def run_activation(runner, script_path, module_id, label, args=None):
+    """Run a module - the executor already holds its resources"""
+    runner(script_path, module_id, f"({label})", args=args)
+
+def expire_activation(module_id, label, resources, received_at, max_delay, blocked):
+    """Count and log an activation whose deadline passed in the queue"""
+    if max_delay is not None:
+        reason = "waiting for " + ", ".join(resources) if blocked else "queued"
+        record_expired(module_id, label, timer_scheduler.now() - received_at, max_delay, reason)
+    elif ble_receiver:
+        ble_receiver.add_log(f"❌ {module_id} gave up waiting for {', '.join(resources)}", "error")
+
+def record_expired(module_id, label, delay, max_delay, reason=""):
+    """Count and log an activation dropped for missing its deadline"""
+    dispatch_counts["expired"] += 1
+    expired_history.append({
+        "module_id": module_id,
+        "gesture": label,
+        "delay_ms": round(delay * 1000, 1),
+        "max_delay_ms": round(max_delay * 1000, 1),
+        "reason": reason,
+        "timestamp": time.time()
+    })
+    if ble_receiver:
+        ble_receiver.add_log(
+            f"⌛ Expired {module_id} ({label}): {delay * 1000:.0f}ms late, max {max_delay * 1000:.0f}ms"
+            + (f" ({reason})" if reason else ""), "warning"
+        )
+
+def slot_module_ids(position):
+    """Module ids bound to a position's slot on the active layer, including gesture-map targets"""
+    binding = layout_store.get_slot(f"{position:03b}")
+    targets = binding.values() if isinstance(binding, dict) and not is_module_binding(binding) else [binding]
+    module_ids = [split_binding(t)[0] for t in targets]
+    return list(dict.fromkeys(m for m in module_ids if isinstance(m, str) and m and not is_layer_action(m)))
+
+def prewarm_position(position):
+    """Prewarm the warm-capable modules under the encoder cursor - runs on the prewarmer thread"""
+    for module_id in slot_module_ids(position):
+        script_path = SCRIPTS_DIR / f"{module_id}.py"
+        info = script_index.get(script_path)
+        if not info or info.runner == "subprocess":
+            continue
+        try:
+            if info.runner == "warm pool":
+                warmed = warm_pool.prewarm(module_id, script_path, info.timeout, info.limits)
+            else:
+                warmed = warm_modules.prewarm(module_id, script_path)
+            if warmed and ble_receiver:
+                ble_receiver.add_log(f"🔥 Prewarmed {module_id}")
+        except Exception as e:
+            if ble_receiver:
+                ble_receiver.add_log(f"⚠️ Could not prewarm {module_id}: {e}", "warning")
+
+def evict_idle_modules():
+    """Let warm modules and pool workers nobody has used for a while release their resources"""
+    warm_modules.evict_idle(WARM_IDLE_SECONDS)
+    warm_pool.evict_idle()
+    timer_scheduler.call_later(WARM_IDLE_SECONDS / 2, evict_idle_modules)
+
+timer_scheduler.call_later(WARM_IDLE_SECONDS / 2, evict_idle_modules)
+
+def reap_process_groups():
+    """Drop leaked/detached process groups whose processes have all exited"""
+    leak_tracker.reap()
+    timer_scheduler.call_later(LEAK_REAP_SECONDS, reap_process_groups)
+
+timer_scheduler.call_later(LEAK_REAP_SECONDS, reap_process_groups)
+
+def publish_audio_level():
+    """Send the latest level frame to 'audio' subscribers at a fixed rate"""
+    if audio_ingest.running() and broadcaster.has_subscribers(TOPIC_AUDIO):
+        broadcaster.publish('audio_level', audio_ingest.level_frame(1.0 / AUDIO_LEVEL_HZ), TOPIC_AUDIO, conflate=True)
+    timer_scheduler.call_later(1.0 / AUDIO_LEVEL_HZ, publish_audio_level)
+
+timer_scheduler.call_later(1.0 / AUDIO_LEVEL_HZ, publish_audio_level)
+
+def publish_audio_spectrum():
+    """Send the spectrogram column accumulated since the last one to 'audio' subscribers"""
+    frame = audio_spectrum.frame()
+    if frame and broadcaster.has_subscribers(TOPIC_AUDIO):
+        broadcaster.publish('audio_spectrum', frame, TOPIC_AUDIO, conflate=True)
+    timer_scheduler.call_later(1.0 / AUDIO_SPECTRUM_HZ, publish_audio_spectrum)
+
+timer_scheduler.call_later(1.0 / AUDIO_SPECTRUM_HZ, publish_audio_spectrum)
+
+# Claps heard on the microphone stream run whatever "clap:1".."clap:3" is bound to
+clap_detector = ClapDetector(dispatch_clap, clap_counts, audio_ingest.rate, audio_ingest.block)
+audio_ingest.add_listener(clap_detector)
+
+def run_encoder_control(delta, detents):
+    """Pass one frame's accumulated rotation to the active layer's encoder module"""
+    module_id, args = split_binding(layout_store.get_slot(ENCODER_BINDING))
+    if not module_id or not isinstance(module_id, str):
+        return
+    script_path = SCRIPTS_DIR / f"{module_id}.py"
+    if not script_path.exists():
+        return
+    control = getattr(warm_modules.load(module_id, script_path), "control", None)
+    if not callable(control):
+        if ble_receiver:
+            ble_receiver.add_log(f"❌ {module_id} has no control(delta) function", "error")
+        return
+    control(delta, **args)
+
+encoder_stream = ControlStream(run_encoder_control, rate_hz=CONTROL_STREAM_HZ)
+
+def start_repeat(position, module_id, script_path, interval_ms, args=None):
+    """Start calling a module's action every interval_ms until the button is released"""
+    stop_repeat(position, "restarted")
+    try:
+        action = warm_modules.get_action(module_id, script_path)
+        if args:
+            action = functools.partial(action, **args)
+    except Exception as e:
+        if ble_receiver:
+            ble_receiver.add_log(f"❌ Could not load {module_id} for repeat: {e}", "error")
+        return
+    repeat_workers[position] = RepeatWorker(
+        module_id, action, interval_ms,
+        max_seconds=REPEAT_MAX_SECONDS,
+        on_finish=finish_repeat
+    ).start()
+
+def stop_repeat(position, reason="released"):
+    """Stop the repeat running on a position, if any"""
+    worker = repeat_workers.pop(position, None)
+    if worker:
+        worker.stop(reason)
+
+def finish_repeat(worker):
+    """Record and log a finished repeat run's rate accuracy"""
+    stats = worker.stats()
+    repeat_history.append(stats)
+    if ble_receiver:
+        ble_receiver.add_log(
+            f"🔁 {stats['module_id']} repeated {stats['ticks']}x at {stats['achieved_rate_hz']}/{stats['target_rate_hz']} Hz "
+            f"({stats['missed_ticks']} missed, max late {stats['max_lateness_ms']}ms, {stats['stop_reason']})"
+        )
+
+gesture_engine = GestureRecognizer(
+    timer_scheduler,
+    dispatch_gesture,
+    gesture_bindings,
+    chord_bindings,
+    tap_window=GESTURE_TAP_WINDOW,
+    long_press=GESTURE_LONG_PRESS,
+    chord_window=GESTURE_CHORD_WINDOW
+)
+
+@functools.lru_cache(maxsize=None)
 def get_python_executable():
     """Get the correct Python executable for the current OS"""
     if IS_WINDOWS:
@@ -87,85 +614,172 @@ def get_python_executable():
     # Fallback to sys.executable (works on all platforms)
     return sys.executable
 
-def get_module_script(slot_id):
-    """Get the script for a given slot ID from the layout"""
-    try:
-        if LAYOUT_FILE.exists():
-            with open(LAYOUT_FILE, 'r', encoding='utf-8') as f:
-                layout = json.load(f)
-                module_id = layout.get(slot_id)
-                if module_id:
-                    script_path = SCRIPTS_DIR / f"{module_id}.py"
-                    if script_path.exists():
-                        return str(script_path), module_id
-        return None, None
-    except Exception as e:
-        print(f"Error getting module script: {e}")
-        return None, None
+def publish_script_output(run_id, module_id, output, return_code=None):
+    """Send a script run's output to its own topic and to whole-library subscribers"""
+    broadcaster.publish('script_output', {
+        "run_id": run_id,
+        "module_id": module_id,
+        "output": output,
+        "return_code": return_code
+    }, (script_topic(run_id), TOPIC_SCRIPTS))
+    broadcaster.publish('script_finished', {
+        "run_id": run_id,
+        "module_id": module_id,
+        "return_code": return_code
+    }, TOPIC_RUNS)
 
-def execute_script(script_path, module_id, reason=""):
-    """Execute a script and log the output - OS agnostic"""
+def execute_script(script_path, module_id, reason="", run_id=None, args=None):
+    """Execute a script and log the output - OS agnostic; args are passed as one JSON argument"""
+    run_id = run_id or uuid.uuid4().hex[:8]
+    broadcaster.publish('script_started', {
+        "run_id": run_id,
+        "module_id": module_id,
+        "reason": reason
+    }, TOPIC_RUNS)
+    timeout = DEFAULT_TIMEOUT
     try:
         python_cmd = get_python_executable()
         
-        # Create platform-appropriate command
-        if IS_WINDOWS:
-            # On Windows, handle spaces in paths and use shell=True for better compatibility
-            cmd = [python_cmd, str(script_path)]
-            result = subprocess.run(cmd, 
-                                  capture_output=True, 
-                                  text=True, 
-                                  timeout=30,
-                                  shell=False,
-                                  encoding='utf-8',
-                                  errors='replace')
-        else:
-            # On Linux/macOS, use standard approach
-            result = subprocess.run([python_cmd, str(script_path)], 
-                                  capture_output=True, 
-                                  text=True, 
-                                  timeout=30,
-                                  encoding='utf-8',
-                                  errors='replace')
+        info = script_index.get(script_path)
+        timeout = info.timeout if info else DEFAULT_TIMEOUT
+        
+        # Own process group, so a timeout takes down everything the script started
+        return_code, stdout, stderr, pgid = run_in_group(
+            [python_cmd, str(script_path)] + ([json.dumps(args)] if args else []),
+            timeout=timeout,
+            limits=info.limits if info else None
+        )
         
         # Get output, handling both stdout and stderr
         output = ""
-        if result.stdout:
-            output += result.stdout
-        if result.stderr:
+        if stdout:
+            output += stdout
+        if stderr:
             if output:
                 output += "\n"
-            output += f"STDERR: {result.stderr}"
+            output += f"STDERR: {stderr}"
         
         if not output:
-            output = f"Script completed with return code: {result.returncode}"
+            output = f"Script completed with return code: {return_code}"
         
         log_msg = f"🚀 Executed {module_id} {reason}: {output.strip()}"
         if ble_receiver:
             ble_receiver.add_log(log_msg)
         print(log_msg)
+        publish_script_output(run_id, module_id, output, return_code)
+        
+        detached = info.detached if info else False
+        leftovers = leak_tracker.check(pgid, module_id, detached)
+        if leftovers and not detached and ble_receiver:
+            ble_receiver.add_log(f"⚠️ {module_id} left {len(leftovers)} process(es) running: {leftovers}", "warning")
         
     except subprocess.TimeoutExpired:
-        error_msg = f"❌ Script {module_id} timed out (30s)"
+        leak_tracker.timeouts_killed += 1
+        error_msg = f"❌ Script {module_id} timed out ({timeout:g}s), killed its process group"
         if ble_receiver:
             ble_receiver.add_log(error_msg, "error")
         print(error_msg)
+        publish_script_output(run_id, module_id, error_msg)
     except FileNotFoundError as e:
         error_msg = f"❌ Python executable not found for {module_id}: {e}"
         if ble_receiver:
             ble_receiver.add_log(error_msg, "error")
         print(error_msg)
+        publish_script_output(run_id, module_id, error_msg)
     except Exception as e:
         error_msg = f"❌ Error executing {module_id}: {e}"
         if ble_receiver:
             ble_receiver.add_log(error_msg, "error")
         print(error_msg)
+        publish_script_output(run_id, module_id, error_msg)
+    return run_id
+
+def execute_warm(script_path, module_id, reason="", run_id=None, args=None):
+    """Run a module's action(**args) in its warm in-process instance and log the result"""
+    run_id = run_id or uuid.uuid4().hex[:8]
+    broadcaster.publish('script_started', {
+        "run_id": run_id,
+        "module_id": module_id,
+        "reason": reason
+    }, TOPIC_RUNS)
+    started = time.perf_counter()
+    try:
+        action = warm_modules.get_action(module_id, script_path)
+        warm_modules.acquire(module_id)
+        try:
+            result = action(**(args or {}))
+        finally:
+            warm_modules.release(module_id)
+        output = str(result) if result is not None else "Completed"
+        return_code = 0
+        elapsed = time.perf_counter() - started
+        log_msg = f"⚡ Ran {module_id} warm {reason} in {elapsed * 1000:.0f}ms: {output}"
+        if ble_receiver:
+            ble_receiver.add_log(log_msg)
+            # An in-process run can't be killed, only reported
+            info = script_index.get(script_path)
+            if info and elapsed > info.timeout:
+                ble_receiver.add_log(f"⚠️ {module_id} overran its {info.timeout:g}s timeout in-process", "warning")
+    except SystemExit as e:
+        # sys.exit() in an action ends the run, not the executor thread - same codes as a subprocess
+        return_code = exit_status(e.code)
+        output = log_msg = f"{'⚡' if return_code == 0 else '❌'} {module_id} exited with code {return_code} {reason}"
+        if ble_receiver:
+            ble_receiver.add_log(log_msg, "info" if return_code == 0 else "error")
+    except Exception as e:
+        output = log_msg = f"❌ Error running {module_id}: {e}"
+        return_code = 1
+        if ble_receiver:
+            ble_receiver.add_log(log_msg, "error")
+    print(log_msg)
+    publish_script_output(run_id, module_id, output, return_code)
+    return run_id
+
+def execute_pooled(script_path, module_id, reason="", run_id=None, args=None):
+    """Run a module in its warm pool worker process and log the output"""
+    run_id = run_id or uuid.uuid4().hex[:8]
+    broadcaster.publish('script_started', {
+        "run_id": run_id,
+        "module_id": module_id,
+        "reason": reason
+    }, TOPIC_RUNS)
+    info = script_index.get(script_path)
+    timeout = info.timeout if info else DEFAULT_TIMEOUT
+    try:
+        return_code, stdout, stderr = warm_pool.run(module_id, script_path, timeout, info.limits if info else None, args)
+        output = stdout
+        if stderr:
+            output += ("\n" if output else "") + f"STDERR: {stderr}"
+        output = output or f"Script completed with return code: {return_code}"
+        log_msg = f"🚀 Executed {module_id} {reason} (warm pool): {output.strip()}"
+        level = "info"
+    except subprocess.TimeoutExpired:
+        output = log_msg = f"❌ Script {module_id} timed out ({timeout:g}s), killed its pool worker"
+        return_code = None
+        level = "error"
+    except Exception as e:
+        output = log_msg = f"❌ Error executing {module_id} in the warm pool: {e}"
+        return_code = None
+        level = "error"
+    if ble_receiver:
+        ble_receiver.add_log(log_msg, level)
+    print(log_msg)
+    publish_script_output(run_id, module_id, output, return_code)
+    return run_id
+
+def get_runner(info):
+    """The execute_* function for a script's Runner"""
+    if info.runner == "warm pool":
+        return execute_pooled
+    if info.runner == "in-process" and info.has_action:
+        return execute_warm
+    return execute_script
 
 class WebAppBLEReceiver:
     """BLE Receiver integrated with Flask-SocketIO for real-time updates"""
     
-    def __init__(self, socketio):
-        self.socketio = socketio
+    def __init__(self, broadcaster):
+        self.broadcaster = broadcaster
         self.is_running = False
         self.client = None
         self.reconnect_count = 0
@@ -174,56 +788,78 @@ class WebAppBLEReceiver:
     def add_log(self, message, level="info"):
         """Add a log message and emit to connected clients"""
         timestamp = time.strftime("%H:%M:%S")
-        log_entry = {
+        log_entry = append_log({
             "timestamp": timestamp,
             "message": message,
             "level": level
-        }
-        
-        global ble_logs
-        ble_logs.append(log_entry)
-        
-        # Keep only last MAX_LOG_LINES entries
-        if len(ble_logs) > MAX_LOG_LINES:
-            ble_logs.pop(0)
+        })
         
-        # Emit to all connected clients
-        self.socketio.emit('ble_log', log_entry)
+        # Queue for all connected clients (droppable under backpressure)
+        self.broadcaster.publish('ble_log', log_entry, TOPIC_LOGS, droppable=True)
         
     def notification_handler(self, sender, data):
         """Handle incoming BLE notifications from ESP32"""
-        global last_button_state, ble_connected, button_states, button_timers
+        global last_button_state, ble_connected
         
+        received = timer_scheduler.now()  # Deadlines count from here
         try:
             message = data.decode('utf-8').strip()
-            self.add_log(f"📡 Received: {message}")
+            if not message.startswith(('R,', 'C,')):
+                self.add_log(f"📡 Received: {message}")
+            
+            # Encoder cursor moved: "C,<position>" - a hint that this slot is likely
+            # to be pressed next, so prewarm its module off the BLE thread
+            if message.startswith('C,'):
+                try:
+                    position = int(message[2:])
+                except ValueError:
+                    self.add_log(f"❌ Invalid cursor data: {message}", "error")
+                    return
+                prewarmer.hint(lambda: prewarm_position(position))
+                return
+            
+            # Encoder rotation: "R,<delta>" (e.g. "R,-2") - a continuous control stream,
+            # not a button edge, so it is coalesced rather than logged or dispatched
+            if message.startswith('R,'):
+                try:
+                    encoder_stream.push(int(message[2:]))
+                except ValueError:
+                    self.add_log(f"❌ Invalid rotation data: {message}", "error")
+                return
             
-            # Parse button data: "position,state" (e.g., "4,1" = module 4, button pressed)
+            # Parse button data: "position,state[,layer]" (e.g., "4,1" = module 4, button pressed;
+            # "4,1,2" = same, with the device's LED mode selecting layer 2)
             if ',' in message:
                 parts = message.split(',')
-                if len(parts) == 2:
+                if len(parts) in (2, 3):
                     try:
                         position = int(parts[0])  # 0-7 (modules 0-7)
                         button_state = int(parts[1])  # 0 = released, 1 = pressed
                         
+                        if len(parts) == 3:
+                            try:
+                                switch_layer(layer=int(parts[2]), reason="(device)")
+                            except KeyError:
+                                self.add_log(f"⚠️ Device selected unknown layer {parts[2]}", "warning")
+                        
                         # Convert position to slot ID (binary representation)
                         slot_id = f"{position:03b}"  # Convert to 3-bit binary string
                         
                         # Update button state
-                        last_button_state = {
+                        last_button_state = record_event('button_press', {
                             "slot": slot_id,
                             "module_number": position,  # 0-7 for display
                             "pressed": button_state == 1,
                             "timestamp": time.time()
-                        }
+                        })
                         
-                        # Emit button state to all connected clients
-                        self.socketio.emit('button_press', last_button_state)
+                        # Queue button state for all connected clients
+                        self.broadcaster.publish('button_press', last_button_state, TOPIC_BUTTONS)
                         
                         self.add_log(f"🔘 Module {position} {'pressed' if button_state == 1 else 'released'}")
                         
                         # Handle script execution based on activation type
-                        self.handle_button_activation(slot_id, position, button_state == 1)
+                        self.handle_button_activation(slot_id, position, button_state == 1, received)
                         
                     except ValueError:
                         self.add_log(f"❌ Invalid data format: {message}", "error")
@@ -231,66 +867,19 @@ class WebAppBLEReceiver:
         except Exception as e:
             self.add_log(f"❌ Error processing data: {e}", "error")
 
-    def handle_button_activation(self, slot_id, position, is_pressed):
-        """Handle script execution based on button activation type"""
-        global button_states, button_timers
-        
-        # Get the script and its activation type for this slot
-        script_path, module_id = get_module_script(slot_id)
-        if not script_path or not module_id:
-            return  # No script assigned to this slot
-        
-        # Parse activation from script metadata
-        _, _, _, _, activation = parse_script_metadata(script_path)
-        activation_type, hold_duration = parse_activation_type(activation)
-        
-        # Track button state changes
-        prev_state = button_states.get(position, False)
-        button_states[position] = is_pressed
-        
-        if activation_type == "press" and is_pressed and not prev_state:
-            # Execute on button press (press down event)
-            self.add_log(f"🎯 Activating {module_id} (On Press)")
-            threading.Thread(target=execute_script, args=(script_path, module_id, "(On Press)")).start()
-            
-        elif activation_type == "release" and not is_pressed and prev_state:
-            # Execute on button release (release event)
-            self.add_log(f"🎯 Activating {module_id} (On Release)")
-            threading.Thread(target=execute_script, args=(script_path, module_id, "(On Release)")).start()
-            
-        elif activation_type == "hold":
-            if is_pressed and not prev_state:
-                # Button pressed - start hold timer
-                def hold_timer():
-                    time.sleep(hold_duration)
-                    # Check if button is still pressed after hold duration
-                    if button_states.get(position, False):
-                        self.add_log(f"🎯 Activating {module_id} (Hold {hold_duration}s)")
-                        execute_script(script_path, module_id, f"(Hold {hold_duration}s)")
-                
-                # Cancel any existing timer for this position
-                if position in button_timers:
-                    button_timers[position].cancel()
-                
-                # Start new hold timer
-                timer = threading.Timer(hold_duration, hold_timer)
-                timer.start()
-                button_timers[position] = timer
-                self.add_log(f"⏱️ Hold timer started for {module_id} ({hold_duration}s)")
-                
-            elif not is_pressed and prev_state:
-                # Button released - cancel hold timer if running
-                if position in button_timers:
-                    button_timers[position].cancel()
-                    del button_timers[position]
-                    self.add_log(f"⏹️ Hold timer cancelled for {module_id}")
+    def handle_button_activation(self, slot_id, position, is_pressed, received=None):
+        """Feed the edge (stamped with its receive time) to the gesture recognizer, which dispatches whatever it completes"""
+        gesture_engine.feed(position, is_pressed, received)
 
     def disconnect_handler(self, client):
         """Handle BLE disconnection events"""
         global ble_connected
         ble_connected = False
+        # No release will arrive now, so don't leave anything repeating
+        for position in list(repeat_workers):
+            stop_repeat(position, "device disconnected")
         self.add_log("🔌 Device disconnected!", "warning")
-        self.socketio.emit('ble_status', {'connected': False})
+        self.broadcaster.publish('ble_status', record_event('ble_status', {'connected': False}), TOPIC_STATUS)
 
     async def find_and_connect_device(self):
         """Find ESP32 device and establish connection - OS agnostic"""
@@ -430,7 +1019,7 @@ class WebAppBLEReceiver:
         ble_connected = True
         
         self.add_log("🎯 Ready to receive data! Press buttons on ESP32...")
-        self.socketio.emit('ble_status', {'connected': True})
+        self.broadcaster.publish('ble_status', record_event('ble_status', {'connected': True}), TOPIC_STATUS)
         
         try:
             while self.is_running and self.client and self.client.is_connected:
@@ -461,7 +1050,7 @@ class WebAppBLEReceiver:
                 self.add_log(f"❌ Cleanup error: {e}", "error")
         
         ble_connected = False
-        self.socketio.emit('ble_status', {'connected': False})
+        self.broadcaster.publish('ble_status', record_event('ble_status', {'connected': False}), TOPIC_STATUS)
 
     async def run(self):
         """Main run loop with OS-agnostic reconnection logic"""
@@ -513,34 +1102,10 @@ class WebAppBLEReceiver:
 
 def parse_script_metadata(file_path):
     """Parse name, description, icon, color, and activation from script docstring - OS agnostic"""
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-            content = f.read()
-        
-        # Extract docstring
-        docstring_match = re.search(r'"""(.*?)"""', content, re.DOTALL)
-        if not docstring_match:
-            return None, None, None, None, None
-        
-        docstring = docstring_match.group(1).strip()
-        
-        # Parse name, description, icon, color, and activation
-        name_match = re.search(r'Name:\s*(.+)', docstring)
-        desc_match = re.search(r'Description:\s*(.+)', docstring)
-        icon_match = re.search(r'Icon:\s*(.+)', docstring)
-        color_match = re.search(r'Color:\s*(.+)', docstring)
-        activation_match = re.search(r'Activation:\s*(.+)', docstring)
-        
-        name = name_match.group(1).strip() if name_match else Path(file_path).stem
-        description = desc_match.group(1).strip() if desc_match else "No description available"
-        icon = icon_match.group(1).strip() if icon_match else "🔧"
-        color = color_match.group(1).strip() if color_match else None
-        activation = activation_match.group(1).strip() if activation_match else "On Press"
-        
-        return name, description, icon, color, activation
-    except Exception as e:
-        print(f"Error parsing {file_path}: {e}")
+    info = script_index.get(file_path)
+    if not info or info.docstring is None:
         return None, None, None, None, None
+    return info.name, info.description, info.icon, info.color, info.activation
 
 def get_script_code(file_path):
     """Read the full script code - OS agnostic"""
@@ -553,8 +1118,8 @@ def get_script_code(file_path):
 
 @app.route('/')
 def index():
-    """Serve the main page"""
-    return render_template('index.html')
+    """Serve the main page - rendered once, then served precompressed"""
+    return assets.render_cached('index.html', lambda: render_template('index.html'))
 
 @app.route('/api/scripts')
 def get_scripts():
@@ -567,6 +1132,7 @@ def get_scripts():
     try:
         for file_path in SCRIPTS_DIR.glob('*.py'):
             name, description, icon, color, activation = parse_script_metadata(str(file_path))
+            info = script_index.get(file_path)
             
             if name:  # Only include if we could parse metadata
                 scripts.append({
@@ -576,6 +1142,8 @@ def get_scripts():
                     'icon': icon,
                     'color': color,
                     'activation': activation,
+                    'policy': info.policy(),
+                    'parameters': info.parameters,
                     'path': file_path.name,
                     'code': get_script_code(str(file_path))
                 })
@@ -584,31 +1152,146 @@ def get_scripts():
     
     return jsonify(scripts)
 
+def get_if_match(allow_body=False):
+    """Read the layout version precondition from If-Match (or an 'etag' body field)"""
+    if request.if_match and not request.if_match.star_tag:
+        return next(iter(request.if_match), None)
+    if allow_body:
+        body = request.get_json(silent=True) or {}
+        return body.get('etag') if isinstance(body, dict) else None
+    return None
+
+def get_layer_target():
+    """Read the optional ?profile=&layer= target of a layout request (active layer by default)"""
+    profile = request.args.get('profile') or None
+    layer = request.args.get('layer')
+    return profile, int(layer) if layer not in (None, '') else None
+
+def publish_layout_change(diffs, etag, version):
+    """Push per-layer layout diffs to clients so they update in place"""
+    for profile, layer, changes in diffs:
+        broadcaster.publish('layout_changed', {
+            "profile": profile,
+            "layer": layer,
+            "changes": changes,
+            "etag": etag,
+            "version": version
+        }, TOPIC_LAYOUT)
+
+def switch_layer(profile=None, layer=None, binding=None, reason=""):
+    """Swap the active profile/layer and tell clients - returns the active layer info"""
+    if binding:
+        changed = layout_store.apply_layer_action(binding)
+    else:
+        changed = layout_store.set_active(profile, layer)
+    active = layout_store.active()
+    if changed:
+        if ble_receiver:
+            ble_receiver.add_log(f"🗂️ Layer {active['profile']}/{active['layer_name']} active {reason}".rstrip())
+        broadcaster.publish('layer_changed', active, TOPIC_LAYOUT)
+    return active
+
 @app.route('/api/layout', methods=['GET'])
 def get_layout():
-    """Get the current layout - OS agnostic"""
-    if LAYOUT_FILE.exists():
-        try:
-            with open(LAYOUT_FILE, 'r', encoding='utf-8') as f:
-                layout = json.load(f)
-            return jsonify(layout)
-        except Exception as e:
-            print(f"Error reading layout: {e}")
-    
-    # Return empty layout if file doesn't exist
-    return jsonify({
-        "000": None, "001": None, "010": None, "011": None,
-        "100": None, "101": None, "110": None, "111": None
-    })
+    """Get a layer's slot map (the active layer unless ?profile=&layer= is given)"""
+    try:
+        profile, layer = get_layer_target()
+        layout, etag, version = layout_store.snapshot(profile, layer)
+    except (KeyError, ValueError) as e:
+        return jsonify({"success": False, "error": str(e)}), 404
+    active = layout_store.active()
+    response = jsonify(layout)
+    response.set_etag(etag)
+    response.headers['X-Layout-Version'] = str(version)
+    response.headers['X-Layout-Profile'] = profile or active['profile']
+    response.headers['X-Layout-Layer'] = str(layer if layer is not None else active['layer'])
+    return response
 
 @app.route('/api/layout', methods=['POST'])
 def save_layout():
-    """Save the current layout - OS agnostic"""
+    """Save a layer's slot map, or the whole document if it has 'profiles' - If-Match is honoured when given"""
     try:
         layout = request.json
-        with open(LAYOUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(layout, f, indent=2, ensure_ascii=False)
-        return jsonify({"success": True})
+        if not isinstance(layout, dict):
+            return jsonify({"success": False, "error": "Layout must be an object"}), 400
+        profile, layer = get_layer_target()
+        diffs, etag, version = layout_store.replace(layout, get_if_match(), profile, layer)
+        publish_layout_change(diffs, etag, version)
+        return jsonify({"success": True, "etag": etag, "version": version})
+    except LayoutConflict as e:
+        return jsonify({"success": False, "error": str(e), "etag": e.current_etag}), 412
+    except (KeyError, ValueError) as e:
+        return jsonify({"success": False, "error": str(e)}), 404
+    except Exception as e:
+        print(f"Error saving layout: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/layout/profiles', methods=['GET'])
+def get_layout_profiles():
+    """Get every profile with its layers, the active layer and the whole document"""
+    doc, etag, version = layout_store.document()
+    return jsonify({
+        "active": layout_store.active(),
+        "profiles": {
+            name: [layer["name"] for layer in profile["layers"]]
+            for name, profile in doc["profiles"].items()
+        },
+        "document": doc,
+        "etag": etag,
+        "version": version
+    })
+
+@app.route('/api/layout/active', methods=['POST'])
+def set_active_layer():
+    """Switch the active profile/layer - {"profile": name, "layer": index | "next" | "prev"}"""
+    data = request.get_json(silent=True) or {}
+    try:
+        active = switch_layer(data.get('profile'), data.get('layer'), reason="(API)")
+        return jsonify({"success": True, "active": active})
+    except (KeyError, ValueError) as e:
+        return jsonify({"success": False, "error": str(e)}), 404
+
+@app.route('/api/layout/<slot_id>', methods=['PATCH'])
+def patch_layout_slot(slot_id):
+    """Assign one slot - requires the current layout ETag as a precondition"""
+    try:
+        if slot_id not in SLOT_IDS and slot_id not in CLAP_GESTURES.values():
+            return jsonify({"success": False, "error": f"Unknown slot {slot_id}"}), 404
+
+        data = request.get_json(silent=True) or {}
+        if 'module' not in data:
+            return jsonify({"success": False, "error": "Body must include 'module' (or null)"}), 400
+        module_id = data['module']
+        # A binding is a module id, a module binding with args, a layer action, or a gesture map of those
+        is_gesture_map = isinstance(module_id, dict) and not is_module_binding(module_id)
+        targets = module_id.values() if is_gesture_map else [module_id]
+        for target in targets:
+            if target is None or is_layer_action(target):
+                continue
+            if is_module_binding(target) and not isinstance(target.get("args", {}), dict):
+                return jsonify({"success": False, "error": f"Module args must be an object: {target!r}"}), 400
+            target_id, args = split_binding(target)
+            info = script_index.get(SCRIPTS_DIR / f"{target_id}.py")
+            if not info:
+                return jsonify({"success": False, "error": f"Script not found: {target_id}"}), 404
+            unknown = [k for k in args if k not in info.parameters]
+            if unknown:
+                return jsonify({"success": False, "error": f"{target_id} doesn't take {', '.join(unknown)}"}), 400
+
+        if_match = get_if_match(allow_body=True)
+        if not if_match:
+            return jsonify({"success": False, "error": "If-Match precondition required"}), 428
+
+        profile, layer = get_layer_target()
+        diffs, etag, version = layout_store.set_slot(slot_id, module_id, if_match, profile, layer)
+        publish_layout_change(diffs, etag, version)
+        response = jsonify({"success": True, "etag": etag, "version": version})
+        response.set_etag(etag)
+        return response
+    except LayoutConflict as e:
+        return jsonify({"success": False, "error": str(e), "etag": e.current_etag}), 412
+    except (KeyError, ValueError) as e:
+        return jsonify({"success": False, "error": str(e)}), 404
     except Exception as e:
         print(f"Error saving layout: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
@@ -645,15 +1328,8 @@ def create_script():
             script_path = SCRIPTS_DIR / f"{script_id}.py"
             counter += 1
         
-        # Create the script content
-        color_line = f"Color: {color}\n" if color else ""
-        script_content = f'''"""
-Name: {name}
-Description: {description}
-Icon: {icon}
-{color_line}"""
-
-{code}'''
+        # Create the script content - any other keys in a docstring at the top of code are kept
+        script_content = build_script(code, {"Name": name, "Description": description, "Icon": icon, "Color": color})
         
         # Write the script file with proper encoding
         with open(script_path, 'w', encoding='utf-8') as f:
@@ -685,20 +1361,18 @@ def update_script(script_id):
         color = data.get('color')
         code = data.get('code', '')
         
-        color_line = f"Color: {color}\n" if color else ""
-        script_content = f'''"""
-Name: {name}
-Description: {description}
-Icon: {icon}
-{color_line}"""
-
-{code}'''
+        # Only the display keys change - Timeout, Runner, Resources etc. stay as they were
+        with open(script_path, 'r', encoding='utf-8') as f:
+            docstring, _ = split_docstring(f.read())
+        script_content = build_script(
+            code, {"Name": name, "Description": description, "Icon": icon, "Color": color}, docstring
+        )
         
         # Write the updated script with proper encoding
         with open(script_path, 'w', encoding='utf-8') as f:
             f.write(script_content)
             
-        return jsonify({"success": True})
+        return jsonify({"success": True, "content": script_content})
     except Exception as e:
         print(f"Error updating script: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
@@ -731,42 +1405,27 @@ def test_script(script_id):
         try:
             python_cmd = get_python_executable()
             
-            # Run with platform-appropriate settings
-            if IS_WINDOWS:
-                result = subprocess.run(
-                    [python_cmd, str(script_path)],
-                    capture_output=True,
-                    text=True,
-                    timeout=10,
-                    encoding='utf-8',
-                    errors='replace',
-                    shell=False
-                )
-            else:
-                result = subprocess.run(
-                    [python_cmd, str(script_path)],
-                    capture_output=True,
-                    text=True,
-                    timeout=10,
-                    encoding='utf-8',
-                    errors='replace'
-                )
-            
-            stdout_content = result.stdout or ""
-            stderr_content = result.stderr or ""
+            info = script_index.get(script_path)
+            timeout = info.timeout if info else DEFAULT_TIMEOUT
+            args = (request.get_json(silent=True) or {}).get('args')
+            return_code, stdout_content, stderr_content, _ = run_in_group(
+                [python_cmd, str(script_path)] + ([json.dumps(args)] if args else []),
+                timeout=timeout,
+                limits=info.limits if info else None
+            )
             
             return jsonify({
                 "success": True,
                 "output": stdout_content,
                 "error": stderr_content if stderr_content else None,
-                "return_code": result.returncode
+                "return_code": return_code
             })
             
         except subprocess.TimeoutExpired:
             return jsonify({
                 "success": False,
                 "output": "",
-                "error": "Script execution timed out (10s limit)"
+                "error": f"Script execution timed out ({timeout:g}s limit)"
             })
         except Exception as subprocess_error:
             # Fallback to exec() method
@@ -829,19 +1488,231 @@ def test_script(script_id):
 # BLE Management Routes
 @app.route('/api/ble/status')
 def get_ble_status():
-    """Get current BLE connection status"""
-    global ble_connected, last_button_state, ble_logs
-    return jsonify({
+    """Get current BLE connection status, plus anything newer than ?since="""
+    global ble_connected, last_button_state
+    since = parse_since(request.args.get('since'))
+    stream = get_stream_since(since, request.args.get('stream'), tail=20)  # Last 20 log entries on resync
+    stream.update({
         "connected": ble_connected,
-        "last_button": last_button_state,
-        "logs": ble_logs[-20:] if ble_logs else []  # Return last 20 log entries
+        "last_button": last_button_state
     })
+    return jsonify(stream)
 
 @app.route('/api/ble/logs')
 def get_ble_logs():
-    """Get all BLE logs"""
-    global ble_logs
-    return jsonify({"logs": ble_logs})
+    """Get all BLE logs, or only those newer than ?since="""
+    since = parse_since(request.args.get('since'))
+    stream = get_stream_since(since, request.args.get('stream'))
+    del stream["events"]
+    return jsonify(stream)
+
+@app.route('/api/gestures/stats')
+def get_gesture_stats():
+    """Get per-gesture counts and added latency, plus timer scheduler health"""
+    return jsonify({
+        "gestures": gesture_engine.stats(),
+        "scheduler": timer_scheduler.stats(),
+        "dispatch": dict(dispatch_counts),
+        "expired": list(expired_history),
+        "config": {
+            "tap_window": GESTURE_TAP_WINDOW,
+            "long_press": GESTURE_LONG_PRESS,
+            "chord_window": GESTURE_CHORD_WINDOW
+        }
+    })
+
+@app.route('/api/repeat/stats')
+def get_repeat_stats():
+    """Get rate accuracy and missed-tick counters for running and recent repeat runs"""
+    return jsonify({
+        "running": {f"{p:03b}": w.stats() for p, w in list(repeat_workers.items())},
+        "recent": list(repeat_history)
+    })
+
+@app.route('/api/control/stats')
+def get_control_stats():
+    """Get encoder control stream coalescing counters"""
+    return jsonify({"encoder": encoder_stream.stats(), "module": layout_store.get_slot(ENCODER_BINDING)})
+
+@app.route('/api/executor/stats')
+def get_executor_stats():
+    """Get queue depth and queue wait per priority class, plus warm pool and metadata index counters"""
+    stats = activation_executor.stats()
+    stats["warm_pool"] = warm_pool.stats()
+    stats["script_index"] = script_index.stats()
+    stats["dispatch"] = dict(dispatch_counts)
+    return jsonify(stats)
+
+@app.route('/api/processes/leaks')
+def get_process_leaks():
+    """Get process groups still running after their script exited"""
+    leak_tracker.reap()
+    return jsonify(leak_tracker.stats())
+
+@app.route('/api/resources/stats')
+def get_resource_stats():
+    """Get per-resource holders and contention wait time"""
+    return jsonify(resource_locks.stats())
+
+@app.route('/api/audio/start', methods=['POST'])
+def start_audio():
+    """Start ingesting the microphone stream (or a fake source with {"source": "fake"})"""
+    data = request.get_json(silent=True) or {}
+    if data.get('source') == 'fake':
+        audio_ingest.start(lambda: FakePcmSource())
+    else:
+        url = data.get('url') or AUDIO_STREAM_URL
+        audio_ingest.start(lambda: HttpPcmSource(url))
+    return jsonify({"success": True, "audio": audio_ingest.stats()})
+
+@app.route('/api/audio/stop', methods=['POST'])
+def stop_audio():
+    """Stop ingesting the microphone stream"""
+    audio_ingest.stop()
+    return jsonify({"success": True, "audio": audio_ingest.stats()})
+
+@app.route('/api/audio/stats')
+def get_audio_stats():
+    """Get audio ingest connection state and counters"""
+    return jsonify({**audio_ingest.stats(), "claps": clap_detector.stats(), "relay": audio_relay.stats(),
+                    "spectrum": audio_spectrum.stats()})
+
+@app.route('/api/audio/record', methods=['POST'])
+def trigger_recording():
+    """Save pre-roll + post-roll audio around now ({"pre": 5, "post": 5} overrides the defaults)"""
+    data = request.get_json(silent=True) or {}
+    try:
+        pre_roll = float(data['pre']) if data.get('pre') is not None else None
+        post_roll = float(data['post']) if data.get('post') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "pre and post must be numbers of seconds"}), 400
+    recording = record_audio(data.get('label') or "API", pre_roll, post_roll)
+    if not recording:
+        return jsonify({"success": False, "error": "Microphone stream is not running"}), 409
+    return jsonify({"success": True, "recording": recording.info()})
+
+@app.route('/api/audio/recordings')
+def list_recordings():
+    """List saved recordings and recorder counters"""
+    return jsonify({"recordings": audio_recorder.recordings(), "recorder": audio_recorder.stats()})
+
+@app.route('/api/audio/recordings/<name>')
+def download_recording(name):
+    """Download a saved recording"""
+    return send_from_directory(RECORDINGS_DIR, name, mimetype='audio/wav')
+
+@app.route('/api/audio/stream.wav')
+def relay_audio():
+    """Listen to the microphone through the host (?rate=8000&codec=ulaw) without another device connection"""
+    try:
+        listener = audio_relay.add(request.args.get('rate'), request.args.get('codec', 'pcm'), request.remote_addr)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    if not audio_ingest.running():
+        audio_ingest.start(lambda: HttpPcmSource(AUDIO_STREAM_URL))
+
+    def stream():
+        try:
+            yield from listener.chunks()
+        finally:
+            audio_relay.remove(listener)
+
+    return Response(stream(), mimetype='audio/wav', headers={"Cache-Control": "no-store"})
+
+@app.route('/api/input/stats')
+def get_input_stats():
+    """Get the resident input injector and its last timing stats"""
+    return jsonify(input_backend.shared().stats())
+
+@app.route('/api/launcher/stats')
+def get_launcher_stats():
+    """Get cached executable paths and the app instances launched so far"""
+    return jsonify(launcher.shared().stats())
+
+@app.route('/api/macros')
+def list_macros():
+    """List saved macros and the timing of recent playbacks"""
+    return jsonify({
+        "macros": macro_store.list(),
+        "recording": macro_recorder.recording(),
+        "history": list(macro_history)
+    })
+
+@app.route('/api/macros/record/start', methods=['POST'])
+def start_macro_recording():
+    """Start capturing mouse and keyboard input"""
+    try:
+        macro_recorder.start()
+    except RuntimeError as e:
+        return jsonify({"success": False, "error": str(e)}), 501
+    return jsonify({"success": True})
+
+@app.route('/api/macros/record/stop', methods=['POST'])
+def stop_macro_recording():
+    """Stop capturing and save the macro as {"name": ...}"""
+    data = request.get_json(silent=True) or {}
+    events = macro_recorder.stop()
+    try:
+        count = macro_store.save(data.get('name') or time.strftime("macro-%Y%m%d-%H%M%S"), events)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({"success": True, "events": count})
+
+@app.route('/api/macros/<name>', methods=['GET'])
+def get_macro(name):
+    """Get a macro's events as compact [delta_ms, code, arg, arg] rows"""
+    try:
+        return jsonify({"name": name, "events": encode_macro(macro_store.load(name))})
+    except KeyError as e:
+        return jsonify({"success": False, "error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@app.route('/api/macros/<name>', methods=['PUT'])
+def put_macro(name):
+    """Save a macro from compact rows ({"events": [[delta_ms, "m"|"b"|"k", arg, arg], ...]})"""
+    data = request.get_json(silent=True) or {}
+    try:
+        count = macro_store.save(name, decode_macro(data.get('events') or []))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({"success": True, "events": count})
+
+@app.route('/api/macros/<name>', methods=['DELETE'])
+def delete_macro(name):
+    """Delete a macro"""
+    try:
+        macro_store.delete(name)
+    except KeyError as e:
+        return jsonify({"success": False, "error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({"success": True})
+
+@app.route('/api/macros/<name>/play', methods=['POST'])
+def play_macro(name):
+    """Play a macro now"""
+    try:
+        macro_store.load(name)
+    except KeyError as e:
+        return jsonify({"success": False, "error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    submit_macro(name, "API")
+    return jsonify({"success": True})
+
+@app.route('/api/warm/stats')
+def get_warm_stats():
+    """Get warm module cache contents and the cursor prewarm hit/miss ratio"""
+    stats = warm_modules.stats()
+    stats["cursor_hints"] = prewarmer.hints
+    stats["superseded_hints"] = prewarmer.superseded
+    return jsonify(stats)
+
+@app.route('/api/clients')
+def get_client_stats():
+    """Get per-client outbound queue depth, lag and drop counters"""
+    return jsonify(broadcaster.stats())
 
 @app.route('/api/ble/connect', methods=['POST'])
 def connect_ble():
@@ -853,7 +1724,7 @@ def connect_ble():
             return jsonify({"success": False, "error": "BLE receiver already running"}), 400
         
         # Create and start BLE receiver
-        ble_receiver = WebAppBLEReceiver(socketio)
+        ble_receiver = WebAppBLEReceiver(broadcaster)
         
         def run_ble_async():
             # Create new event loop for this thread (required on Windows)
@@ -904,24 +1775,78 @@ def disconnect_ble():
 def handle_connect():
     """Handle client connection"""
     print('Client connected')
+    # Clients may pick their topics up front with ?topics=buttons,status
+    topics = request.args.get('topics')
+    topics = [t.strip() for t in topics.split(',') if t.strip()] if topics else DEFAULT_TOPICS
+    broadcaster.add_client(request.sid, topics)
     # Send current BLE status to new client
-    emit('ble_status', {'connected': ble_connected})
-    if last_button_state:
+    if TOPIC_STATUS in topics:
+        emit('ble_status', {'connected': ble_connected})
+    if last_button_state and TOPIC_BUTTONS in topics:
         emit('button_press', last_button_state)
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
     print('Client disconnected')
+    broadcaster.remove_client(request.sid)
 
 @socketio.on('request_ble_status')
-def handle_ble_status_request():
-    """Handle request for current BLE status"""
-    global ble_connected, last_button_state, ble_logs
-    emit('ble_status', {'connected': ble_connected})
-    if last_button_state:
-        emit('button_press', last_button_state)
-    emit('ble_logs', {'logs': ble_logs[-20:] if ble_logs else []})
+def handle_ble_status_request(data=None):
+    """Handle request for current BLE status - sends only what the client missed when given a cursor"""
+    global ble_connected, last_button_state
+    data = data or {}
+    sid = request.sid
+    stream = get_stream_since(parse_since(data.get('since')), data.get('stream'), tail=20)
+    if broadcaster.is_subscribed(sid, TOPIC_STATUS):
+        emit('ble_status', {'connected': ble_connected, 'seq': stream['seq']})
+    if broadcaster.is_subscribed(sid, TOPIC_BUTTONS):
+        if stream['resync']:
+            if last_button_state:
+                emit('button_press', last_button_state)
+        else:
+            # Replay missed button events in order
+            for event in stream['events']:
+                if event['type'] == 'button_press':
+                    emit('button_press', event['data'])
+    if not broadcaster.is_subscribed(sid, TOPIC_LOGS):
+        return
+    emit('ble_logs', {
+        'logs': stream['logs'],
+        'seq': stream['seq'],
+        'stream': stream['stream'],
+        'resync': stream['resync']
+    })
+
+@socketio.on('request_logs')
+def handle_logs_request(data=None):
+    """Re-send the log entries a client missed - {"since", "until", "stream"} from a batch's gap marker"""
+    data = data or {}
+    if not broadcaster.is_subscribed(request.sid, TOPIC_LOGS):
+        return
+    stream = get_stream_since(parse_since(data.get('since')), data.get('stream'), tail=20)
+    until = parse_since(data.get('until'))
+    logs = stream['logs']
+    if not stream['resync'] and until is not None:
+        logs = [entry for entry in logs if entry['seq'] < until]
+    emit('ble_logs', {
+        'logs': logs,
+        'seq': stream['seq'] if stream['resync'] else (logs[-1]['seq'] if logs else None),
+        'stream': stream['stream'],
+        'resync': stream['resync']
+    })
+
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    """Subscribe the client to more topics (logs, buttons, status, runs, scripts, script:<run_id>)"""
+    topics = (data or {}).get('topics', [])
+    emit('subscriptions', {'topics': broadcaster.subscribe(request.sid, topics)})
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(data):
+    """Stop sending the given topics to the client"""
+    topics = (data or {}).get('topics', [])
+    emit('subscriptions', {'topics': broadcaster.unsubscribe(request.sid, topics)})
 
 # Auto-start BLE connection on startup (optional)
 def auto_start_ble():
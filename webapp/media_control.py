@@ -0,0 +1,311 @@
+"""
+Resident MPRIS media control over one D-Bus session connection.
+
+Instead of launching playerctl / dbus-send per press, the service connects to
+the session bus once (on its own asyncio thread) and keeps a live view of the
+MPRIS players: NameOwnerChanged tells it when players appear or quit, and
+PropertiesChanged when one starts or stops playing. Commands are plain method
+calls to the player that is playing (or was most recently active).
+
+Uses dbus-fast, which bleak already installs on Linux. Run this file directly
+to start a private bus with a fake player and exercise the service against it.
+"""
+
+import asyncio
+import threading
+import time
+
+try:
+    from dbus_fast import BusType, Message, MessageType, Variant
+    from dbus_fast.aio import MessageBus
+    from dbus_fast.service import ServiceInterface, PropertyAccess, dbus_property, method
+except ImportError:  # Not Linux, or dbus-fast missing
+    MessageBus = None
+
+MPRIS_PREFIX = "org.mpris.MediaPlayer2."
+MPRIS_PATH = "/org/mpris/MediaPlayer2"
+PLAYER_INTERFACE = "org.mpris.MediaPlayer2.Player"
+PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+CALL_TIMEOUT = 2.0
+
+class MediaControl:
+    """One bus connection, a signal-driven player list, and direct MPRIS calls"""
+
+    def __init__(self, bus_address=None):
+        self.bus_address = bus_address  # None = the user's session bus
+        self.bus = None
+        self.loop = None
+        self.thread = None
+        self.ready = threading.Event()
+        self.error = None
+        self.players = {}  # Well-known name -> {"owner", "status", "changed"}
+        self.owners = {}  # Unique name -> well-known name
+        self.lock = threading.Lock()
+        self.commands = 0
+        self.signals = 0
+
+    def available(self):
+        """Whether D-Bus control is possible here at all"""
+        return MessageBus is not None
+
+    def start(self, timeout=CALL_TIMEOUT):
+        """Connect (once) - returns True when the bus is ready"""
+        if not self.available():
+            return False
+        if not self.thread:
+            self.thread = threading.Thread(target=self._run, name="media-control", daemon=True)
+            self.thread.start()
+        self.ready.wait(timeout)
+        return self.bus is not None and self.bus.connected
+
+    def _run(self):
+        """Own event loop for the bus connection"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._connect())
+        except Exception as e:
+            self.error = str(e)
+            print(f"Media control error: {e}")
+            self.ready.set()
+            return
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def _connect(self):
+        """Connect, subscribe to player signals, then list the players already running"""
+        self.bus = await MessageBus(bus_address=self.bus_address, bus_type=BusType.SESSION).connect()
+        self.bus.add_message_handler(self._on_message)
+        for rule in (
+            f"type='signal',interface='org.freedesktop.DBus',member='NameOwnerChanged',arg0namespace='{MPRIS_PREFIX[:-1]}'",
+            f"type='signal',interface='{PROPERTIES_INTERFACE}',member='PropertiesChanged',path='{MPRIS_PATH}'"
+        ):
+            await self._bus_call("AddMatch", "s", [rule])
+        names = (await self._bus_call("ListNames")).body[0]
+        for name in names:
+            if name.startswith(MPRIS_PREFIX):
+                owner = (await self._bus_call("GetNameOwner", "s", [name])).body[0]
+                await self._add_player(name, owner)
+
+    async def _bus_call(self, member, signature="", body=()):
+        """Call the bus daemon itself"""
+        return await self.bus.call(Message(
+            destination="org.freedesktop.DBus", path="/org/freedesktop/DBus",
+            interface="org.freedesktop.DBus", member=member, signature=signature, body=list(body)
+        ))
+
+    async def _add_player(self, name, owner):
+        """Track a player and read its current status"""
+        with self.lock:
+            self.players[name] = {"owner": owner, "status": "Stopped", "changed": 0.0}
+            self.owners[owner] = name
+        reply = await self.bus.call(Message(
+            destination=name, path=MPRIS_PATH, interface=PROPERTIES_INTERFACE,
+            member="Get", signature="ss", body=[PLAYER_INTERFACE, "PlaybackStatus"]
+        ))
+        if reply.message_type == MessageType.METHOD_RETURN:
+            self._set_status(name, reply.body[0].value)
+
+    def _set_status(self, name, status):
+        """Record a player's PlaybackStatus and when it changed"""
+        with self.lock:
+            if name in self.players:
+                self.players[name]["status"] = status
+                self.players[name]["changed"] = time.monotonic()
+
+    def _on_message(self, message):
+        """Bus signal handler (loop thread)"""
+        if message.message_type != MessageType.SIGNAL:
+            return
+        if message.member == "NameOwnerChanged":
+            name, old, new = message.body
+            if not name.startswith(MPRIS_PREFIX):
+                return
+            self.signals += 1
+            with self.lock:
+                self.players.pop(name, None)
+                self.owners.pop(old, None)
+            if new:
+                asyncio.ensure_future(self._add_player(name, new))
+        elif message.member == "PropertiesChanged" and message.body and message.body[0] == PLAYER_INTERFACE:
+            self.signals += 1
+            changed = message.body[1]
+            with self.lock:
+                name = self.owners.get(message.sender)
+            if name and "PlaybackStatus" in changed:
+                self._set_status(name, changed["PlaybackStatus"].value)
+
+    # ---- commands ----
+
+    def active_player(self):
+        """The player that's playing, else the one most recently active - None if there are none"""
+        with self.lock:
+            if not self.players:
+                return None
+            return max(self.players, key=lambda n: (self.players[n]["status"] == "Playing", self.players[n]["changed"]))
+
+    def _call(self, coroutine):
+        """Run a coroutine on the bus thread and wait for it"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(CALL_TIMEOUT)
+
+    async def _player_call(self, name, member, signature="", body=()):
+        """Call a Player method, raising if the player returns an error"""
+        reply = await self.bus.call(Message(
+            destination=name, path=MPRIS_PATH, interface=PLAYER_INTERFACE,
+            member=member, signature=signature, body=list(body)
+        ))
+        if reply.message_type == MessageType.ERROR:
+            raise RuntimeError(f"{name}: {reply.error_name} {reply.body}")
+        return reply
+
+    def command(self, member):
+        """PlayPause, Next, Previous, ... on the active player - returns its name, or None"""
+        if not self.start():
+            return None
+        name = self.active_player()
+        if not name:
+            return None
+        self._call(self._player_call(name, member))
+        self.commands += 1
+        return name
+
+    def play_pause(self):
+        """Toggle playback on the active player"""
+        return self.command("PlayPause")
+
+    def next(self):
+        """Skip to the next track"""
+        return self.command("Next")
+
+    def previous(self):
+        """Go back to the previous track"""
+        return self.command("Previous")
+
+    async def _change_volume(self, name, delta):
+        """Read-modify-write the Volume property"""
+        reply = await self.bus.call(Message(
+            destination=name, path=MPRIS_PATH, interface=PROPERTIES_INTERFACE,
+            member="Get", signature="ss", body=[PLAYER_INTERFACE, "Volume"]
+        ))
+        if reply.message_type == MessageType.ERROR:
+            raise RuntimeError(f"{name}: {reply.error_name} {reply.body}")
+        volume = min(1.0, max(0.0, reply.body[0].value + delta))
+        await self.bus.call(Message(
+            destination=name, path=MPRIS_PATH, interface=PROPERTIES_INTERFACE,
+            member="Set", signature="ssv", body=[PLAYER_INTERFACE, "Volume", Variant("d", volume)]
+        ))
+        return volume
+
+    def change_volume(self, delta):
+        """Nudge the active player's volume (0-1 scale) - returns the new volume, or None"""
+        if not self.start():
+            return None
+        name = self.active_player()
+        if not name:
+            return None
+        volume = self._call(self._change_volume(name, delta))
+        self.commands += 1
+        return volume
+
+    def stats(self):
+        """Known players and counters"""
+        with self.lock:
+            players = {n: p["status"] for n, p in self.players.items()}
+        return {
+            "connected": bool(self.bus and self.bus.connected),
+            "players": players,
+            "active": self.active_player(),
+            "commands": self.commands,
+            "signals": self.signals,
+            "error": self.error
+        }
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared():
+    """The process-wide MediaControl, so every module reuses one bus connection"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = MediaControl()
+        return _shared
+
+if MessageBus is not None:
+    class FakeMprisPlayer(ServiceInterface):
+        """Minimal MPRIS player for testing against a private bus"""
+
+        def __init__(self):
+            super().__init__(PLAYER_INTERFACE)
+            self.status = "Paused"
+            self.volume = 0.5
+            self.calls = []
+
+        def _set(self, status):
+            self.status = status
+            self.emit_properties_changed({"PlaybackStatus": status})
+
+        @method()
+        def PlayPause(self):
+            self.calls.append("PlayPause")
+            self._set("Paused" if self.status == "Playing" else "Playing")
+
+        @method()
+        def Next(self):
+            self.calls.append("Next")
+
+        @method()
+        def Previous(self):
+            self.calls.append("Previous")
+
+        @dbus_property(access=PropertyAccess.READ)
+        def PlaybackStatus(self) -> "s":
+            return self.status
+
+        @dbus_property()
+        def Volume(self) -> "d":
+            return self.volume
+
+        @Volume.setter
+        def Volume(self, value: "d"):
+            self.volume = value
+
+def run_demo():
+    """Private bus + two fake players: signal tracking, commands and call latency"""
+    import subprocess
+    daemon = subprocess.Popen(["dbus-daemon", "--session", "--nofork", "--print-address"],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    address = daemon.stdout.readline().strip()
+    players = {}
+
+    async def serve(loop_ready):
+        for name in ("fakeone", "faketwo"):
+            bus = await MessageBus(bus_address=address).connect()
+            players[name] = FakeMprisPlayer()
+            bus.export(MPRIS_PATH, players[name])
+            await bus.request_name(MPRIS_PREFIX + name)
+        loop_ready.set()
+        await asyncio.Event().wait()
+
+    ready = threading.Event()
+    threading.Thread(target=lambda: asyncio.run(serve(ready)), daemon=True).start()
+    ready.wait(5)
+    try:
+        control = MediaControl(address)
+        print("connected:", control.start())
+        print("players:", control.stats()["players"])
+        # The player reports its new status by signal - the service never polls
+        print("play/pause ->", control.play_pause())
+        time.sleep(0.1)
+        print("after:", control.stats()["players"], "active:", control.active_player())
+        print("next ->", control.next(), "volume ->", control.change_volume(0.1))
+        started = time.perf_counter()
+        for _ in range(200):
+            control.command("Previous")
+        print(f"{(time.perf_counter() - started) / 200 * 1000:.3f} ms per command; calls:",
+              {n: len(p.calls) for n, p in players.items()})
+    finally:
+        daemon.terminate()
+
+if __name__ == "__main__":
+    run_demo()
@@ -0,0 +1,173 @@
+"""
+Script processes in their own process group, with optional resource limits.
+
+Each run starts a new session (a new process group on Windows), so a timeout
+kills everything the script started - players, ffmpeg, helper shells - rather
+than only the Python process. Processes still alive in the group after the
+script exits are tracked: modules that launch apps on purpose declare
+"Detach: yes", anything else is reported as a leak.
+"""
+
+import os
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
+
+IS_WINDOWS = os.name == "nt"
+KILL_GRACE_SECONDS = 2.0  # Between SIGTERM and SIGKILL
+
+def apply_limits(pid, cpu_seconds=None, memory_bytes=None, open_files=None):
+    """Set rlimits on a running process - returns whether they could be applied.
+
+    Uses prlimit(2) from the parent rather than a preexec_fn, which isn't safe
+    to run between fork and exec in a process with threads. Linux only; other
+    platforms run the script without limits.
+    """
+    if not (cpu_seconds or memory_bytes or open_files):
+        return True
+    if resource is None or not hasattr(resource, "prlimit"):
+        return False
+    try:
+        if cpu_seconds:
+            resource.prlimit(pid, resource.RLIMIT_CPU, (int(cpu_seconds), int(cpu_seconds) + 1))
+        if memory_bytes:
+            resource.prlimit(pid, resource.RLIMIT_AS, (int(memory_bytes), int(memory_bytes)))
+        if open_files:
+            resource.prlimit(pid, resource.RLIMIT_NOFILE, (int(open_files), int(open_files)))
+    except (ProcessLookupError, PermissionError, ValueError):
+        return False  # Already exited, or asked to raise a hard limit
+    return True
+
+def exit_status(code):
+    """Return code for a SystemExit code, as the interpreter maps it: None is 0, non-ints are 1"""
+    if code is None:
+        return 0
+    return code if isinstance(code, int) else 1
+
+def group_members(pgid):
+    """PIDs still in a process group - empty if none (or unknown on this OS)"""
+    if IS_WINDOWS:
+        return []
+    if os.path.isdir("/proc"):
+        members = []
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat", "rb") as f:
+                    # Fields after the parenthesised command name: state, ppid, pgrp
+                    fields = f.read().rsplit(b")", 1)[1].split()
+                if int(fields[2]) == pgid and fields[0] != b"Z":
+                    members.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+        return members
+    try:
+        os.killpg(pgid, 0)
+        return [pgid]  # Alive, but we can't list who
+    except (ProcessLookupError, PermissionError):
+        return []
+
+def kill_group(proc):
+    """Terminate a run's whole process tree, escalating to a hard kill"""
+    if IS_WINDOWS:
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(proc.pid)], capture_output=True)
+        return
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            return
+        deadline = time.monotonic() + KILL_GRACE_SECONDS
+        while time.monotonic() < deadline:
+            if proc.poll() is not None and not group_members(proc.pid):
+                return
+            time.sleep(0.05)
+
+def spawn_in_group(cmd, limits=None, **popen_kwargs):
+    """Start cmd as the leader of a new process group (session on POSIX), with optional rlimits"""
+    if IS_WINDOWS:
+        popen_kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        popen_kwargs["start_new_session"] = True
+    proc = subprocess.Popen(cmd, **popen_kwargs)
+    if limits and not IS_WINDOWS:
+        apply_limits(proc.pid, **limits)
+    return proc
+
+def run_in_group(cmd, timeout, limits=None):
+    """Run cmd in its own process group - returns (returncode, stdout, stderr, pgid).
+
+    Output goes to temporary files rather than pipes, so an app the script
+    launches can't hold the run open by inheriting stdout. On timeout the whole
+    group is killed and subprocess.TimeoutExpired is raised.
+    """
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        proc = spawn_in_group(cmd, limits, stdout=out, stderr=err, stdin=subprocess.DEVNULL)
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            kill_group(proc)
+            proc.wait()
+            raise
+        out.seek(0)
+        err.seek(0)
+        stdout = out.read().decode("utf-8", errors="replace")
+        stderr = err.read().decode("utf-8", errors="replace")
+    return proc.returncode, stdout, stderr, proc.pid
+
+class LeakTracker:
+    """Process groups that outlived their script, until their members exit"""
+
+    def __init__(self):
+        self.groups = {}  # pgid -> record
+        self.lock = threading.Lock()
+        self.leaks_total = 0
+        self.timeouts_killed = 0
+
+    def check(self, pgid, module_id, detached=False):
+        """After a script exits - record its group if anything is still running in it"""
+        members = group_members(pgid)
+        if not members:
+            return []
+        with self.lock:
+            self.groups[pgid] = {
+                "module_id": module_id,
+                "pgid": pgid,
+                "pids": members,
+                "detached": detached,
+                "since": time.time()
+            }
+            if not detached:
+                self.leaks_total += 1
+        return members
+
+    def reap(self):
+        """Forget groups whose processes have all exited"""
+        with self.lock:
+            pgids = list(self.groups)
+        for pgid in pgids:
+            members = group_members(pgid)
+            with self.lock:
+                if members:
+                    self.groups[pgid]["pids"] = members
+                else:
+                    self.groups.pop(pgid, None)
+
+    def stats(self):
+        """Leaked and detached groups still alive"""
+        with self.lock:
+            groups = list(self.groups.values())
+        return {
+            "leaked": [g for g in groups if not g["detached"]],
+            "detached": [g for g in groups if g["detached"]],
+            "leaks_total": self.leaks_total,
+            "timeouts_killed": self.timeouts_killed
+        }
@@ -0,0 +1,145 @@
+"""
+Per-resource capacity limits for activations.
+
+Modules declare the devices they use in their metadata ("Resources: camera,
+audio"). Activations that share a resource take turns while everything else
+runs in parallel, and the time spent waiting is tracked per resource. A
+module's Max Concurrency is enforced the same way, as a "module:<id>" resource.
+"""
+
+import threading
+import time
+
+# Resources a module can declare, and how many activations may hold each at once
+DEFAULT_CAPACITIES = {
+    "camera": 1,
+    "audio": 1,
+    "input": 1,
+    "display": 1
+}
+
+class ResourceStats:
+    """Contention counters for one resource"""
+
+    def __init__(self):
+        self.acquisitions = 0
+        self.contended = 0  # Acquisitions that had to wait
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.holders = 0
+
+class ResourceLocks:
+    """Acquire a set of resources all at once, so two activations can't deadlock.
+
+    Capacity is a per-resource counter under one Condition rather than a
+    semaphore object, so ensure() can change it in place: holders and waiters
+    keep working against the same state, a larger capacity admits waiters at
+    once, and a smaller one simply admits nobody new until enough holders
+    have released.
+    """
+
+    def __init__(self, capacities=None):
+        self.capacities = dict(capacities or DEFAULT_CAPACITIES)
+        self.counters = {name: ResourceStats() for name in self.capacities}
+        self.cond = threading.Condition()
+        self.release_listeners = []  # Called after every release, e.g. to wake the executor
+
+    def ensure(self, name, capacity):
+        """Add a resource or change its capacity"""
+        with self.cond:
+            if self.capacities.get(name) == capacity:
+                return
+            self.capacities[name] = capacity
+            self.counters.setdefault(name, ResourceStats())
+            self.cond.notify_all()
+        self._notify_released()
+
+    def known(self, resources):
+        """The declared resources this host manages, in a stable order"""
+        return sorted(r for r in set(resources) if r in self.capacities)
+
+    def _free(self, names):
+        """Whether every named resource has room for one more holder (call with cond held)"""
+        return all(self.counters[n].holders < self.capacities[n] for n in names)
+
+    def _take(self, names, waited):
+        """Record a successful acquisition (call with cond held)"""
+        for name in names:
+            counters = self.counters[name]
+            counters.acquisitions += 1
+            counters.holders += 1
+            if waited > 0.001:
+                counters.contended += 1
+            counters.wait_total += waited
+            counters.wait_max = max(counters.wait_max, waited)
+
+    def try_acquire(self, resources, waiting_since=None):
+        """Take every resource now or none - returns the ones held, or None if any is busy.
+
+        waiting_since (monotonic) is when the caller started waiting, for the wait stats.
+        """
+        names = self.known(resources)
+        with self.cond:
+            if not self._free(names):
+                return None
+            self._take(names, time.monotonic() - waiting_since if waiting_since is not None else 0.0)
+        return names
+
+    def acquire(self, resources, deadline=None):
+        """Wait for every resource (until the monotonic deadline, if given) - returns the ones held, or None on timeout"""
+        names = self.known(resources)
+        started = time.monotonic()
+        with self.cond:
+            while not self._free(names):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._timed_out(names, time.monotonic() - started)
+                    return None
+                self.cond.wait(remaining)
+            self._take(names, time.monotonic() - started)
+        return names
+
+    def timed_out(self, resources, waited):
+        """Count a caller that gave up waiting for resources"""
+        with self.cond:
+            self._timed_out(self.known(resources), waited)
+
+    def _timed_out(self, names, waited):
+        """Timeout counters (call with cond held)"""
+        for name in names:
+            counters = self.counters[name]
+            counters.timeouts += 1
+            counters.contended += 1
+            counters.wait_total += waited
+            counters.wait_max = max(counters.wait_max, waited)
+
+    def release(self, resources):
+        """Give back resources returned by acquire() or try_acquire()"""
+        with self.cond:
+            for name in resources:
+                self.counters[name].holders -= 1
+            self.cond.notify_all()
+        self._notify_released()
+
+    def _notify_released(self):
+        """Tell listeners capacity may have freed up"""
+        for listener in self.release_listeners:
+            listener()
+
+    def stats(self):
+        """Per-resource holders and contention wait time"""
+        with self.cond:
+            return {
+                name: {
+                    "capacity": self.capacities[name],
+                    "holders": c.holders,
+                    "acquisitions": c.acquisitions,
+                    "contended": c.contended,
+                    "timeouts": c.timeouts,
+                    "mean_wait_ms": round(c.wait_total / (c.acquisitions + c.timeouts) * 1000, 3)
+                    if c.acquisitions + c.timeouts else 0.0,
+                    "max_wait_ms": round(c.wait_max * 1000, 3)
+                }
+                for name, c in self.counters.items()
+            }
@@ -0,0 +1,135 @@
+"""
+Central timer scheduler.
+
+One thread and a heap of deadlines replace a threading.Timer (and its thread)
+per hold timer, gesture window or repeat tick. Callbacks run on the scheduler
+thread, so they must be quick - hand real work off to the executor.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+class TimerHandle:
+    """A scheduled callback that can be cancelled"""
+
+    __slots__ = ("when", "callback", "args", "cancelled")
+
+    def __init__(self, when, callback, args):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """Prevent the callback from running (no-op if it already ran)"""
+        self.cancelled = True
+
+class TimerScheduler:
+    """Run callbacks at monotonic deadlines from a single thread"""
+
+    def __init__(self, name="timer-scheduler"):
+        self.name = name
+        self.heap = []
+        self.counter = itertools.count()  # Tie-breaker so equal deadlines keep FIFO order
+        self.wakeup = threading.Condition()
+        self.thread = None
+        self.late_callbacks = 0
+        self.max_lateness = 0.0
+
+    def now(self):
+        """Clock used for every deadline"""
+        return time.monotonic()
+
+    def start(self):
+        """Start the scheduler thread (idempotent)"""
+        with self.wakeup:
+            if self.thread and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self.thread.start()
+
+    def call_at(self, when, callback, *args):
+        """Run callback(*args) at the given monotonic time"""
+        handle = TimerHandle(when, callback, args)
+        with self.wakeup:
+            heapq.heappush(self.heap, (when, next(self.counter), handle))
+            # Only wake the thread if this is the new earliest deadline
+            if self.heap[0][2] is handle:
+                self.wakeup.notify()
+        if not self.thread:
+            self.start()
+        return handle
+
+    def call_later(self, delay, callback, *args):
+        """Run callback(*args) after delay seconds"""
+        return self.call_at(self.now() + delay, callback, *args)
+
+    def _run(self):
+        """Sleep until the earliest deadline, then run everything that is due"""
+        while True:
+            with self.wakeup:
+                while True:
+                    while self.heap and self.heap[0][2].cancelled:
+                        heapq.heappop(self.heap)
+                    if not self.heap:
+                        self.wakeup.wait()
+                        continue
+                    delay = self.heap[0][0] - self.now()
+                    if delay <= 0:
+                        break
+                    self.wakeup.wait(delay)
+                _, _, handle = heapq.heappop(self.heap)
+
+            lateness = self.now() - handle.when
+            if lateness > 0.005:
+                self.late_callbacks += 1
+            self.max_lateness = max(self.max_lateness, lateness)
+
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                print(f"Error in scheduled callback {handle.callback}: {e}")
+
+    def stats(self):
+        """Pending timers and lateness counters"""
+        with self.wakeup:
+            pending = sum(1 for _, _, h in self.heap if not h.cancelled)
+        return {
+            "pending": pending,
+            "late_callbacks": self.late_callbacks,
+            "max_lateness_ms": round(self.max_lateness * 1000, 3)
+        }
+
+class ManualScheduler:
+    """Scheduler driven by a virtual clock - for benchmarks and replaying recorded input"""
+
+    def __init__(self, start=0.0):
+        self.clock = start
+        self.heap = []
+        self.counter = itertools.count()
+
+    def now(self):
+        """Current virtual time"""
+        return self.clock
+
+    def call_at(self, when, callback, *args):
+        """Queue callback(*args) for the given virtual time"""
+        handle = TimerHandle(when, callback, args)
+        heapq.heappush(self.heap, (when, next(self.counter), handle))
+        return handle
+
+    def call_later(self, delay, callback, *args):
+        """Queue callback(*args) delay virtual seconds from now"""
+        return self.call_at(self.clock + delay, callback, *args)
+
+    def advance_to(self, when):
+        """Move the clock forward, running every callback that falls due on the way"""
+        while self.heap and self.heap[0][0] <= when:
+            due, _, handle = heapq.heappop(self.heap)
+            if handle.cancelled:
+                continue
+            self.clock = max(self.clock, due)
+            handle.callback(*handle.args)
+        self.clock = max(self.clock, when)
@@ -0,0 +1,176 @@
+"""
+Script metadata index.
+
+Every docstring key a script can declare is parsed once per file version and
+kept in memory, so the dispatcher never re-reads a script on a button press.
+Besides the display keys (Name, Description, Icon, Color, Activation) a
+script can declare its execution policy:
+
+    Timeout: 5s              kill (or report) a run that takes longer
+    Max Concurrency: 1       runs of this module allowed at once
+    Debounce: 300ms          ignore activations this soon after the last one
+    Priority: critical       critical, interactive or background
+    Runner: warm pool        subprocess (default), warm pool or in-process
+    Max Delay: 1s            drop activations that arrive later than this
+    Resources: camera        camera, audio, input, display
+    CPU Limit / Memory Limit / Open Files   rlimits for process runners
+    Detach: yes              processes left running on purpose aren't leaks
+    Parameters: file         per-slot arguments action() accepts from the layout
+"""
+
+import re
+import threading
+from pathlib import Path
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_CONCURRENCY = 4
+RUNNERS = ("subprocess", "warm pool", "in-process")
+DISPLAY_KEYS = ("name", "description", "icon", "color")  # What the web editor changes
+
+def parse_duration(value):
+    """Parse "500ms", "2s" or "2" into seconds - None if it isn't a duration"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*(ms|s)?\s*', value or "", re.IGNORECASE)
+    if not match:
+        return None
+    seconds = float(match.group(1))
+    return seconds / 1000 if (match.group(2) or "").lower() == "ms" else seconds
+
+def parse_size(value):
+    """Parse "512MB", "1G" or a byte count into bytes - None if it isn't a size"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([kmg]?)i?b?\s*', value or "", re.IGNORECASE)
+    if not match:
+        return None
+    return int(float(match.group(1)) * 1024 ** " kmg".index(match.group(2).lower() or " "))
+
+def parse_count(value):
+    """Parse a positive integer - None otherwise"""
+    value = (value or "").strip()
+    return int(value) if value.isdigit() and int(value) > 0 else None
+
+def parse_runner(value):
+    """Normalize a Runner value ("warm-pool", "in process", ...) - None if unknown"""
+    value = re.sub(r'[\s_-]+', ' ', (value or "").strip().lower())
+    value = {"in process": "in-process", "warm": "warm pool", "pool": "warm pool"}.get(value, value)
+    return value if value in RUNNERS else None
+
+def split_docstring(source):
+    """(docstring, rest of the source) for a script that starts with a docstring, else (None, source)"""
+    match = re.match(r'\s*"""(.*?)"""[ \t]*\n?', source, re.DOTALL)
+    if not match:
+        return None, source
+    return match.group(1).strip("\n"), source[match.end():]
+
+def build_script(code, display, docstring=None):
+    """Script source with the display keys set and every other docstring line kept.
+
+    display maps Name/Description/Icon/Color to values (a missing value drops
+    the key). Keys are edited in place, so policy keys like Timeout, Runner or
+    Resources survive an edit from the web editor. A docstring at the top of
+    code takes precedence over the docstring argument.
+    """
+    code_docstring, code = split_docstring(code)
+    if code_docstring is not None:
+        docstring = code_docstring
+    pending = {key.lower(): (key, value) for key, value in display.items()}
+    lines = []
+    for line in (docstring or "").splitlines():
+        key = re.match(r'\s*(\w+)\s*:', line)
+        if key and key.group(1).lower() in DISPLAY_KEYS:
+            if key.group(1).lower() in pending:
+                name, value = pending.pop(key.group(1).lower())
+                if value:
+                    lines.append(f"{name}: {value}")
+            continue
+        lines.append(line)
+    new = [f"{name}: {value}" for name, value in pending.values() if value]
+    return '"""\n' + "\n".join(new + lines) + '\n"""\n\n' + code.lstrip("\n")
+
+class ScriptInfo:
+    """Everything a script's docstring declares, with defaults filled in"""
+
+    def __init__(self, module_id, source):
+        docstring_match = re.search(r'"""(.*?)"""', source, re.DOTALL)
+        self.docstring = docstring_match.group(1).strip() if docstring_match else None
+        self.module_id = module_id
+        self.has_action = re.search(r'^def action\(', source, re.M) is not None
+
+        self.name = self.field(r'Name') or module_id
+        self.description = self.field(r'Description') or "No description available"
+        self.icon = self.field(r'Icon') or "🔧"
+        self.color = self.field(r'Color')
+        self.activation = self.field(r'Activation') or "On Press"
+
+        self.timeout = parse_duration(self.field(r'Timeout')) or DEFAULT_TIMEOUT
+        self.max_concurrency = parse_count(self.field(r'Max\s*Concurrency')) or DEFAULT_MAX_CONCURRENCY
+        self.debounce = parse_duration(self.field(r'Debounce')) or 0.0
+        self.priority = (self.field(r'Priority') or "").lower() or None
+        self.runner = parse_runner(self.field(r'Runner')) or "subprocess"
+        self.max_delay = parse_duration(self.field(r'Max\s*Delay'))
+        resources = self.field(r'Resources')
+        self.resources = [r.strip().lower() for r in resources.split(',') if r.strip()] if resources else []
+        self.limits = {
+            "cpu_seconds": parse_duration(self.field(r'CPU\s*Limit')),
+            "memory_bytes": parse_size(self.field(r'Memory\s*Limit')),
+            "open_files": parse_count(self.field(r'Open\s*Files'))
+        }
+        self.detached = (self.field(r'Detach') or "").lower() in ("yes", "true")
+        parameters = self.field(r'Parameters')
+        self.parameters = [p.strip() for p in parameters.split(',') if p.strip()] if parameters else []
+
+    def field(self, pattern):
+        """Value of a docstring key (pattern is a regex for the key), or None"""
+        if not self.docstring:
+            return None
+        match = re.search(r'^\s*' + pattern + r':\s*(.+)$', self.docstring, re.IGNORECASE | re.M)
+        return match.group(1).strip() if match else None
+
+    def policy(self):
+        """Execution policy as JSON"""
+        return {
+            "timeout": self.timeout,
+            "max_concurrency": self.max_concurrency,
+            "debounce": self.debounce,
+            "priority": self.priority,
+            "runner": self.runner,
+            "max_delay": self.max_delay,
+            "resources": self.resources,
+            "limits": {k: v for k, v in self.limits.items() if v},
+            "detached": self.detached
+        }
+
+class ScriptIndex:
+    """ScriptInfo per script file, re-parsed only when the file changes"""
+
+    def __init__(self):
+        self.entries = {}  # path -> (mtime_ns, ScriptInfo)
+        self.lock = threading.Lock()
+        self.parses = 0
+        self.lookups = 0
+
+    def get(self, script_path):
+        """Metadata for a script, or None if it can't be read"""
+        script_path = Path(script_path)
+        try:
+            mtime = script_path.stat().st_mtime_ns
+        except OSError:
+            return None
+        key = str(script_path)
+        with self.lock:
+            self.lookups += 1
+            entry = self.entries.get(key)
+            if entry and entry[0] == mtime:
+                return entry[1]
+        try:
+            source = script_path.read_text(encoding='utf-8', errors='replace')
+        except OSError as e:
+            print(f"Error parsing {script_path}: {e}")
+            return None
+        info = ScriptInfo(script_path.stem, source)
+        with self.lock:
+            self.entries[key] = (mtime, info)
+            self.parses += 1
+        return info
+
+    def stats(self):
+        """How often the index saved a re-parse"""
+        return {"scripts": len(self.entries), "lookups": self.lookups, "parses": self.parses}
@@ -4,21 +4,34 @@ Description: Watch the RLCS 2024-2025 World Championships live on Twitch
 Icon: ⚽
 Color: #FF8400
 Activate: On Press
+Detach: yes
+Runner: in-process
 """
 
-import webbrowser
+import sys
+from pathlib import Path
 
-def main():
-    """Open RLCS in the default browser"""
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # webapp/, for launcher
+import launcher
+
+WINDOW_TITLE = "rocketleague - Twitch"  # Browser window title when the page is open
+
+def action():
+    """Open RLCS in the default browser, or switch to it if it's already open"""
     linkedin_url = "https://www.twitch.tv/rocketleague"
     
     try:
-        # Use webbrowser module - works on all platforms!
-        webbrowser.open(linkedin_url)
-        print("yay")
+        if launcher.shared().open_url(linkedin_url, window_title=WINDOW_TITLE) == "focused":
+            print("Already open - switched to it")
+        else:
+            print("yay")
         
     except Exception as e:
-        print(f"❌ Could not open LinkedIn: {e}")
+        print(f"❌ Could not open RLCS: {e}")
+
+def main():
+    """Open RLCS when run as a script"""
+    action()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,12 +4,26 @@ Description: Opens the system calculator application
 Icon: 🧮
 Color: #ffb347
 Activation: On Press
+Detach: yes
+Runner: in-process
 """
 
 import platform
-import subprocess
 import os
 import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # webapp/, for launcher
+import launcher
+
+# GUI calculators in order of preference (Linux)
+LINUX_CALCULATORS = [
+    "gnome-calculator",  # GNOME Calculator (Ubuntu default)
+    "kcalc",            # KDE Calculator
+    "galculator",       # Lightweight calculator
+    "qalculate-gtk",    # Advanced calculator
+    "xcalc",            # X11 calculator (fallback)
+]
 
 def safe_print(message):
     """Print with Windows-safe encoding"""
@@ -20,60 +34,40 @@ def safe_print(message):
         safe_message = message.encode('ascii', errors='replace').decode('ascii')
         print(safe_message)
 
-def main():
-    """Main calculator function - opens system calculator"""
+def report(result, name):
+    """Say whether a calculator was opened or an open one was brought forward"""
+    if result == "launched":
+        safe_print(f"SUCCESS: {name} opened successfully")
+    else:
+        safe_print(f"SUCCESS: {name} is already open")
+
+def action():
+    """Main calculator function - opens (or focuses) the system calculator"""
     system = platform.system()
+    apps = launcher.shared()
     
     try:
         if system == "Windows":
             # Windows Calculator
             safe_print("Calculator: Opening Windows Calculator...")
-            subprocess.Popen(["calc.exe"])
-            safe_print("SUCCESS: Windows Calculator opened successfully")
+            report(apps.launch("calculator", ["calc.exe"], window_title="Calculator"), "Windows Calculator")
             
         elif system == "Linux":
-            # Try common Linux calculators in order of preference
-            calculators = [
-                "gnome-calculator",  # GNOME Calculator (Ubuntu default)
-                "kcalc",            # KDE Calculator
-                "galculator",       # Lightweight calculator
-                "qalculate-gtk",    # Advanced calculator
-                "xcalc",            # X11 calculator (fallback)
-                "bc"                # Command-line calculator (last resort)
-            ]
-            
             safe_print("Calculator: Opening Linux Calculator...")
-            calculator_opened = False
-            
-            for calc in calculators:
-                try:
-                    # Check if calculator exists
-                    result = subprocess.run(["which", calc], 
-                                          capture_output=True, 
-                                          text=True)
-                    if result.returncode == 0:
-                        # Calculator found, try to open it
-                        if calc == "bc":
-                            # bc is command-line, open in terminal
-                            subprocess.Popen(["gnome-terminal", "--", "bc", "-l"])
-                        else:
-                            # GUI calculator
-                            subprocess.Popen([calc])
-                        
-                        safe_print(f"SUCCESS: {calc} opened successfully")
-                        calculator_opened = True
-                        break
-                        
-                except Exception as e:
-                    continue  # Try next calculator
-            
-            if not calculator_opened:
+            calc = apps.which(*LINUX_CALCULATORS)
+            if calc:
+                report(apps.launch("calculator", [calc], window_title="Calculator"), os.path.basename(calc))
+            elif apps.which("bc") and apps.which("gnome-terminal"):
+                # bc is command-line, open in terminal
+                report(apps.launch("calculator", ["gnome-terminal", "--", "bc", "-l"]), "bc")
+            else:
                 safe_print("ERROR: No calculator application found")
                 safe_print("TIP: Try installing: sudo apt install gnome-calculator")
                 
         elif system == "Darwin":  # macOS
             safe_print("Calculator: Opening macOS Calculator...")
-            subprocess.Popen(["open", "-a", "Calculator"])
+            # open -a brings an already running Calculator forward by itself
+            apps.spawn(["open", "-a", "Calculator"])
             safe_print("SUCCESS: macOS Calculator opened successfully")
             
         else:
@@ -101,5 +95,9 @@ def main():
         safe_print(f"ERROR: Error opening calculator: {e}")
         safe_print("TIP: Please install a calculator application")
 
+def main():
+    """Open the calculator when run as a script"""
+    action()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
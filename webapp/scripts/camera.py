@@ -4,6 +4,11 @@ Description: Takes a photo with the camera if available
 Icon: 📸
 Color: #FF6347
 Activate: On Press
+Max Delay: 3s
+Resources: camera
+Timeout: 20s
+Max Concurrency: 1
+Runner: warm pool
 """
 
 import subprocess
@@ -299,6 +304,17 @@ def take_photo():
     
     return None
 
+def prewarm():
+    """Load OpenCV ahead of time - the camera itself is only opened for a photo, so the light stays off between presses."""
+    try:
+        import cv2
+    except ImportError:
+        pass
+
+def action():
+    """Take a photo from the warm module."""
+    return take_photo()
+
 def main():
     """Main function to take a photo with the camera."""
     photo_path = take_photo()
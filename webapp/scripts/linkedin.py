@@ -4,21 +4,34 @@ Description: Opens LinkedIn in your default browser
 Icon: 💼
 Color: #86d4fd
 Activiation: On Press
+Detach: yes
+Runner: in-process
 """
 
-import webbrowser
+import sys
+from pathlib import Path
 
-def main():
-    """Open LinkedIn in the default browser"""
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # webapp/, for launcher
+import launcher
+
+WINDOW_TITLE = "LinkedIn"  # Browser window title when the page is open
+
+def action():
+    """Open LinkedIn in the default browser, or switch to it if it's already open"""
     linkedin_url = "https://www.linkedin.com"
     
     try:
-        # Use webbrowser module - works on all platforms!
-        webbrowser.open(linkedin_url)
-        print("yay")
+        if launcher.shared().open_url(linkedin_url, window_title=WINDOW_TITLE) == "focused":
+            print("Already open - switched to it")
+        else:
+            print("yay")
         
     except Exception as e:
         print(f"❌ Could not open LinkedIn: {e}")
 
+def main():
+    """Open LinkedIn when run as a script"""
+    action()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,12 +4,19 @@ Description: Opens Minecraft Bedrock Edition on Windows
 Icon: ⛏️
 Color: #008F26
 Activation: On Press
+Detach: yes
+Runner: in-process
 """
 
 import platform
-import subprocess
 import os
-import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # webapp/, for launcher
+import launcher
+
+WINDOW_TITLE = "Minecraft"
 
 def safe_print(message):
     """Print with Windows-safe encoding"""
@@ -20,9 +27,18 @@ def safe_print(message):
         safe_message = message.encode('ascii', errors='replace').decode('ascii')
         print(safe_message)
 
-def main():
-    """Main Minecraft function - opens Minecraft Bedrock Edition"""
+def launched(result, method):
+    """Report a launch attempt - True once Minecraft is up (or was already)"""
+    if result == "launched":
+        safe_print(f"SUCCESS: Minecraft launched via {method}")
+    else:
+        safe_print("SUCCESS: Minecraft is already running - brought it to the front")
+    return True
+
+def action():
+    """Main Minecraft function - opens Minecraft Bedrock Edition, or focuses it if it's running"""
     system = platform.system()
+    apps = launcher.shared()
     
     if system == "Windows":
         safe_print("Minecraft: Starting Minecraft Bedrock Edition...")
@@ -33,13 +49,11 @@ def main():
             # Method 1: Try the Microsoft Store URI protocol
             try:
                 safe_print("Attempting to launch via Microsoft Store...")
-                # This will open Minecraft Bedrock from Microsoft Store
-                subprocess.Popen([
-                    "start", 
-                    "minecraft://", 
-                    "/wait"
-                ], shell=True)
-                safe_print("SUCCESS: Minecraft launched via Store protocol")
+                # This will open Minecraft Bedrock from Microsoft Store. The shell that
+                # runs "start" exits at once, so there is no process to track: a running
+                # game is only found (and focused instead of relaunched) by window title
+                result = apps.launch("minecraft", "start minecraft://", window_title=WINDOW_TITLE, shell=True)
+                launched(result, "Store protocol")
                 return
             except Exception as e:
                 safe_print(f"Store protocol failed: {e}")
@@ -52,8 +66,7 @@ def main():
                     "-Command", 
                     "Start-Process 'shell:AppsFolder\\Microsoft.MinecraftUWP_8wekyb3d8bbwe!App'"
                 ]
-                subprocess.Popen(powershell_command)
-                safe_print("SUCCESS: Minecraft launched via PowerShell")
+                launched(apps.launch("minecraft", powershell_command, window_title=WINDOW_TITLE), "PowerShell")
                 return
             except Exception as e:
                 safe_print(f"PowerShell method failed: {e}")
@@ -79,8 +92,7 @@ def main():
                     
                     if os.path.exists(path):
                         safe_print(f"Found Minecraft at: {path}")
-                        subprocess.Popen([path])
-                        safe_print("SUCCESS: Minecraft launched via executable")
+                        launched(apps.launch("minecraft", [path], window_title=WINDOW_TITLE), "executable")
                         return
                         
             except Exception as e:
@@ -89,7 +101,7 @@ def main():
             # Method 4: Try Windows Run dialog
             try:
                 safe_print("Attempting to open via Windows Run dialog...")
-                subprocess.Popen(["start", "ms-windows-store://pdp/?productid=9NBLGGH2JHXJ"], shell=True)
+                apps.spawn("start ms-windows-store://pdp/?productid=9NBLGGH2JHXJ", shell=True)
                 safe_print("INFO: Opened Microsoft Store page for Minecraft")
                 safe_print("TIP: Click 'Launch' or 'Install' if not already installed")
                 return
@@ -118,5 +130,9 @@ def main():
         safe_print(f"ERROR: Unsupported operating system: {system}")
         safe_print("INFO: Minecraft Bedrock Edition is primarily available on Windows and mobile platforms")
 
+def main():
+    """Launch Minecraft when run as a script"""
+    action()
+
 if __name__ == "__main__":
     main()
@@ -4,12 +4,20 @@ Description: Clicks the mouse at current position
 Icon: 🖱️
 Color: #4169E1
 Activate: On Press
+Max Delay: 500ms
+Resources: input
+Timeout: 5s
+Runner: in-process
 """
 
 import subprocess
 import platform
 import os
 import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # webapp/, for input_backend
+import input_backend
 
 def click_mouse_windows():
     """Click mouse on Windows using multiple methods."""
@@ -203,9 +211,21 @@ def click_mouse():
     
     return False
 
+def prewarm():
+    """Open the resident injector once, so a click is a single in-process call."""
+    input_backend.shared().open()
+
+def action():
+    """Click through the resident injector, falling back to the per-run methods."""
+    service = input_backend.shared()
+    if service.open():
+        service.click()
+        return
+    click_mouse()
+
 def main():
     """Main function to perform mouse click."""
-    click_mouse()
+    action()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,11 +4,22 @@ Description: Play/pause music from any open music player
 Icon: 🎵
 Color: #DDA0DD
 Activation: On Press
+Timeout: 10s
+Debounce: 200ms
+Runner: warm pool
 """
 
 import platform
 import subprocess
-import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # webapp/, for media_control
+import media_control
+
+# ============ CONFIGURATION ============
+VOLUME_STEP = 0.05  # Player volume change per encoder detent (0-1 scale)
+# ======================================
 
 def safe_print(message):
     """Print with Windows-safe encoding"""
@@ -19,6 +30,16 @@ def safe_print(message):
         safe_message = message.encode('ascii', errors='replace').decode('ascii')
         print(safe_message)
 
+def prewarm():
+    """Connect to the session bus once, so presses are a single method call"""
+    if platform.system() == "Linux":
+        media_control.shared().start()
+
+def control(delta):
+    """Encoder control stream: change the playing player's volume"""
+    if platform.system() == "Linux":
+        media_control.shared().change_volume(delta * VOLUME_STEP)
+
 def main():
     """Main music control function - play/pause any open music player"""
     system = platform.system()
@@ -101,33 +122,18 @@ def main():
             safe_print("Music: Sending play/pause command...")
             
             try:
-                # Method 1: Use playerctl (most reliable for Linux)
-                subprocess.run(["playerctl", "play-pause"], timeout=5)
-                safe_print("SUCCESS: Play/pause command sent via playerctl")
-                return
-                
-            except FileNotFoundError:
-                safe_print("INFO: playerctl not found, trying alternative methods...")
-            except Exception as e:
-                safe_print(f"playerctl method failed: {e}")
-            
-            try:
-                # Method 2: Use dbus to control media players
-                subprocess.run([
-                    "dbus-send", 
-                    "--type=method_call", 
-                    "--dest=org.mpris.MediaPlayer2.spotify",
-                    "/org/mpris/MediaPlayer2", 
-                    "org.mpris.MediaPlayer2.Player.PlayPause"
-                ], timeout=5)
-                safe_print("SUCCESS: Play/pause sent to Spotify via dbus")
-                return
+                # Method 1: MPRIS call over the resident session-bus connection
+                player = media_control.shared().play_pause()
+                if player:
+                    safe_print(f"SUCCESS: Play/pause sent to {player.rsplit('.', 1)[-1]} via MPRIS")
+                    return
+                safe_print("INFO: No MPRIS media player found on the session bus")
                 
             except Exception as e:
-                safe_print(f"dbus Spotify method failed: {e}")
+                safe_print(f"MPRIS method failed: {e}")
             
             try:
-                # Method 3: Try XDoTool to send spacebar (universal play/pause)
+                # Method 2: Try XDoTool to send spacebar (universal play/pause)
                 subprocess.run(["xdotool", "key", "space"], timeout=3)
                 safe_print("SUCCESS: Spacebar sent via xdotool")
                 safe_print("INFO: This works if music player window is focused")
@@ -138,11 +144,7 @@ def main():
             except Exception as e:
                 safe_print(f"xdotool method failed: {e}")
             
-            # Installation suggestions for Linux
-            safe_print("TIP: Install playerctl for better music control:")
-            safe_print("     Ubuntu/Debian: sudo apt install playerctl")
-            safe_print("     Fedora: sudo dnf install playerctl")
-            safe_print("     Arch: sudo pacman -S playerctl")
+            safe_print("TIP: Start a player that supports MPRIS (Spotify, VLC, Rhythmbox, most browsers)")
             
         elif system == "Darwin":  # macOS
             safe_print("Music: Sending play/pause command...")
@@ -0,0 +1,165 @@
+"""
+Name: Play Sound
+Description: Plays a sound from the sounds/ directory, chosen by the slot's "file" argument
+Icon: 🔊
+Color: #FFD966
+Activate: On Press
+Parameters: file
+Runner: warm pool
+Max Delay: 1s
+Resources: audio
+Priority: background
+Timeout: 12s
+"""
+
+import json
+import platform
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+SOUNDS_DIR = Path(__file__).resolve().parent / "sounds"
+DEFAULT_SOUND = "boom.mp3"
+
+# Common Linux audio players in order of preference - {} is the sound path
+LINUX_PLAYERS = [
+    ["paplay", "{}"],                                 # PulseAudio
+    ["aplay", "{}"],                                  # ALSA
+    ["mpg123", "{}"],                                 # MP3 player
+    ["mpv", "--no-video", "{}"],                      # mpv
+    ["vlc", "--intf", "dummy", "--play-and-exit", "{}"],  # VLC
+    ["mplayer", "-really-quiet", "{}"],               # MPlayer
+    ["ffplay", "-nodisp", "-autoexit", "{}"],         # FFmpeg
+    ["cvlc", "--play-and-exit", "{}"],                # VLC command line
+    ["xdg-open", "{}"]                                # Default application
+]
+
+installed_players = None  # LINUX_PLAYERS found on PATH, looked up once per warm instance
+working_player = None  # The last player that played a sound, tried first next time
+
+def get_sound_path(file):
+    """Absolute path of a file in sounds/ - None if it doesn't exist or isn't a plain file name."""
+    if not file or Path(file).name != file:
+        return None
+    sound_path = SOUNDS_DIR / file
+    return str(sound_path) if sound_path.is_file() else None
+
+def play_sound_windows(sound_path):
+    """Play sound on Windows using multiple methods."""
+    methods = [
+        # Method 1: PowerShell with Windows Media Player
+        lambda: subprocess.run([
+            "powershell", "-Command",
+            f"Add-Type -AssemblyName presentationCore; "
+            f"$mediaPlayer = New-Object system.windows.media.mediaplayer; "
+            f"$mediaPlayer.open([uri]'{sound_path}'); "
+            f"$mediaPlayer.Play(); "
+            f"Start-Sleep -Seconds 2"
+        ], timeout=10),
+
+        # Method 2: Use Windows Media Player directly
+        lambda: subprocess.run(["wmplayer", "/play", "/close", sound_path], timeout=10),
+
+        # Method 3: PowerShell with SoundPlayer
+        lambda: subprocess.run([
+            "powershell", "-Command",
+            f"Add-Type -AssemblyName System.Windows.Forms; "
+            f"$sound = New-Object System.Media.SoundPlayer('{sound_path}'); "
+            f"$sound.PlaySync()"
+        ], timeout=10),
+
+        # Method 4: Use default associated program
+        lambda: subprocess.run(["start", "/min", sound_path], shell=True, timeout=10)
+    ]
+
+    for method in methods:
+        try:
+            method()
+            return True
+        except Exception:
+            continue
+
+    return False
+
+def play_sound_macos(sound_path):
+    """Play sound on macOS."""
+    methods = [
+        # Method 1: Use afplay (built-in)
+        lambda: subprocess.run(["afplay", sound_path], timeout=10),
+
+        # Method 2: Use open with default application
+        lambda: subprocess.run(["open", sound_path], timeout=10),
+
+        # Method 3: Use QuickTime Player
+        lambda: subprocess.run(["open", "-a", "QuickTime Player", sound_path], timeout=10)
+    ]
+
+    for method in methods:
+        try:
+            method()
+            return True
+        except Exception:
+            continue
+
+    return False
+
+def find_players():
+    """Resolve the installed Linux players once."""
+    global installed_players
+    if installed_players is None:
+        installed_players = []
+        for player in LINUX_PLAYERS:
+            path = shutil.which(player[0])
+            if path:
+                installed_players.append([path, *player[1:]])
+    return installed_players
+
+def play_sound_linux(sound_path):
+    """Play sound with the player that worked last time, else the first installed one that works."""
+    global working_player
+    players = find_players()
+    if working_player in players:
+        players = [working_player] + [p for p in players if p is not working_player]
+
+    for player in players:
+        try:
+            result = subprocess.run([sound_path if arg == "{}" else arg for arg in player],
+                                    timeout=10, capture_output=True)
+            if result.returncode == 0:
+                working_player = player
+                return True
+        except Exception:
+            continue
+
+    return False
+
+def prewarm():
+    """Look up the installed players before the first press."""
+    if platform.system().lower() == "linux":
+        find_players()
+
+def action(file=DEFAULT_SOUND):
+    """Play a sound file from sounds/ - the slot's "file" argument."""
+    sound_path = get_sound_path(file)
+    if not sound_path:
+        return f"Sound not found: {file}"
+
+    system = platform.system().lower()
+    if system == "windows":
+        played = play_sound_windows(sound_path)
+    elif system == "darwin":  # macOS
+        played = play_sound_macos(sound_path)
+    elif system == "linux":
+        played = play_sound_linux(sound_path)
+    else:
+        played = False
+    return f"Played {file}" if played else f"No player could play {file}"
+
+def main():
+    """Play the sound named by a JSON args argument, e.g. '{"file": "bruh.mp3"}'."""
+    args = json.loads(sys.argv[1]) if len(sys.argv) > 1 else {}
+    print(action(**args))
+
+if __name__ == "__main__":
+    main()
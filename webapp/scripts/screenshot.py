@@ -4,6 +4,12 @@ Description: Takes a screenshot of the screen
 Icon: 📷
 Color: #32CD32
 Activate: On Press
+Max Delay: 2s
+Resources: display
+Priority: critical
+Timeout: 10s
+Debounce: 300ms
+Runner: warm pool
 """
 
 import subprocess
@@ -18,6 +24,9 @@ SCREENSHOT_FORMAT = "png"       # File format: png, jpg, bmp
 TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"  # Timestamp format for filename
 # ======================================
 
+# Method that worked last time - tried first while the module stays loaded
+_cached_method = None
+
 def get_screenshot_path():
     """Get the path where screenshots should be saved."""
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -234,17 +243,42 @@ def take_screenshot():
     elif system == "linux":
         methods.append(screenshot_linux)
     
+    global _cached_method
+    if _cached_method:
+        methods.remove(_cached_method)
+        methods.insert(0, _cached_method)
+    
     # Try each method until one succeeds
     for method in methods:
         try:
             result = method()
             if result:
+                _cached_method = method
                 return result
         except Exception:
             continue
     
     return None
 
+def prewarm():
+    """Import the first available screenshot library so the first press doesn't pay for it."""
+    global _cached_method
+    if _cached_method:
+        return
+    for library, method in (("pyautogui", screenshot_pyautogui),
+                            ("PIL.ImageGrab", screenshot_pillow),
+                            ("mss", screenshot_mss)):
+        try:
+            __import__(library)
+            _cached_method = method
+            return
+        except Exception:
+            continue
+
+def action():
+    """Take a screenshot from the warm module, reusing the backend that worked last."""
+    return take_screenshot()
+
 def main():
     """Main function to take a screenshot."""
     screenshot_path = take_screenshot()
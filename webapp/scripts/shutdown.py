@@ -4,6 +4,10 @@ Description: Locks the computer
 Icon: 🔒
 Color: #FFFFFF
 Activation: On Press
+Priority: critical
+Timeout: 10s
+Max Concurrency: 1
+Debounce: 1s
 """
 
 import subprocess
@@ -0,0 +1,83 @@
+"""
+Name: Volume
+Description: Turn the encoder to change the system volume, press to mute
+Icon: 🔊
+Color: #20B2AA
+Activation: On Press
+"""
+
+import subprocess
+import platform
+
+# ============ CONFIGURATION ============
+STEP_PERCENT = 2  # Volume change per encoder detent
+# ======================================
+
+def run_first(commands):
+    """Run the first command that is available and succeeds."""
+    for cmd in commands:
+        try:
+            result = subprocess.run(cmd, capture_output=True, timeout=5)
+            if result.returncode == 0:
+                return True
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            continue
+    return False
+
+def change_volume(percent):
+    """Raise (positive) or lower (negative) the system volume by a percentage."""
+    system = platform.system().lower()
+    sign = "+" if percent > 0 else "-"
+    amount = abs(percent)
+
+    if system == "linux":
+        return run_first([
+            ["pactl", "set-sink-volume", "@DEFAULT_SINK@", f"{sign}{amount}%"],
+            ["amixer", "-q", "set", "Master", f"{amount}%{sign}"],
+        ])
+    elif system == "darwin":  # macOS
+        return run_first([[
+            "osascript", "-e",
+            f"set volume output volume ((output volume of (get volume settings)) {sign} {amount})"
+        ]])
+    elif system == "windows":
+        # Each volume key press is 2%
+        key = 175 if percent > 0 else 174
+        presses = max(1, amount // 2)
+        return run_first([[
+            "powershell", "-Command",
+            f"$w = New-Object -ComObject WScript.Shell; 1..{presses} | ForEach-Object {{ $w.SendKeys([char]{key}) }}"
+        ]])
+    return False
+
+def toggle_mute():
+    """Mute or unmute the system output."""
+    system = platform.system().lower()
+
+    if system == "linux":
+        return run_first([
+            ["pactl", "set-sink-mute", "@DEFAULT_SINK@", "toggle"],
+            ["amixer", "-q", "set", "Master", "toggle"],
+        ])
+    elif system == "darwin":  # macOS
+        return run_first([[
+            "osascript", "-e",
+            "set volume output muted (not (output muted of (get volume settings)))"
+        ]])
+    elif system == "windows":
+        return run_first([[
+            "powershell", "-Command",
+            "(New-Object -ComObject WScript.Shell).SendKeys([char]173)"
+        ]])
+    return False
+
+def control(delta):
+    """Encoder control stream: delta is the accumulated detents since the last frame."""
+    change_volume(delta * STEP_PERCENT)
+
+def main():
+    """Main function to toggle mute."""
+    toggle_mute()
+
+if __name__ == "__main__":
+    main()
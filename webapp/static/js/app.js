@@ -1,11 +1,16 @@
 // Global variables
 let modules = [];
 let currentLayout = {};
+let savedLayout = {};    // Layout as last confirmed by the server
+let layoutEtag = null;   // Version precondition for layout writes
+let activeLayer = null;  // "profile/layer" the grid is showing
 let sortableInstances = [];
 let socket = null;
 let bleConnected = false;
 let logsVisible = false;
 let buttonPressTimeout = null;
+let lastSeq = null;     // Cursor of the newest log/event we have seen
+let streamId = null;    // Server stream the cursor belongs to
 
 // Initialize the application
 document.addEventListener('DOMContentLoaded', async function() {
@@ -19,11 +24,16 @@ document.addEventListener('DOMContentLoaded', async function() {
 
 // Setup Socket.IO connection
 function setupSocketIO() {
-    socket = io();
+    // Only subscribe to the streams this page displays; logs are added when the log panel opens
+    socket = io({ query: { topics: 'buttons,status,layout' } });
     
     socket.on('connect', function() {
         console.log('Connected to server');
-        socket.emit('request_ble_status');
+        if (logsVisible) {
+            socket.emit('subscribe', { topics: ['logs'] });
+        }
+        // Only ask for what we missed while disconnected
+        socket.emit('request_ble_status', { since: lastSeq, stream: streamId });
     });
     
     socket.on('disconnect', function() {
@@ -35,15 +45,27 @@ function setupSocketIO() {
     });
     
     socket.on('button_press', function(data) {
+        trackSeq(data.seq);
         handleButtonPress(data);
     });
     
     socket.on('ble_log', function(data) {
+        trackSeq(data.seq);
         addLogEntry(data);
     });
     
     socket.on('ble_logs', function(data) {
-        updateLogs(data.logs);
+        applyLogBatch(data);
+    });
+    
+    socket.on('layout_changed', function(data) {
+        handleLayoutChanged(data);
+    });
+    
+    socket.on('layer_changed', function(data) {
+        // The grid shows the active layer, so switch along with it
+        showNotification(`Layer: ${data.profile} / ${data.layer_name}`);
+        loadLayout();
     });
 }
 
@@ -114,12 +136,13 @@ async function disconnectBLE() {
 
 async function checkBLEStatus() {
     try {
-        const response = await fetch('/api/ble/status');
+        const query = lastSeq !== null ? `?since=${lastSeq}&stream=${streamId}` : '';
+        const response = await fetch(`/api/ble/status${query}`);
         const status = await response.json();
         
         updateConnectionStatus(status.connected);
         if (status.logs) {
-            updateLogs(status.logs);
+            applyLogBatch(status);
         }
         if (status.last_button) {
             handleButtonPress(status.last_button);
@@ -243,6 +266,16 @@ function toggleLogs() {
     
     logsVisible = !logsVisible;
     
+    if (socket) {
+        if (logsVisible) {
+            socket.emit('subscribe', { topics: ['logs'] });
+            // Logs were not streamed while hidden, so ask for a fresh snapshot
+            socket.emit('request_ble_status', { since: null });
+        } else {
+            socket.emit('unsubscribe', { topics: ['logs'] });
+        }
+    }
+    
     if (logsVisible) {
         logsContainer.style.display = 'block';
         toggleBtn.textContent = 'Hide Logs';
@@ -279,6 +312,32 @@ function addLogEntry(logEntry) {
     }
 }
 
+function trackSeq(seq) {
+    if (typeof seq === 'number' && (lastSeq === null || seq > lastSeq)) {
+        lastSeq = seq;
+    }
+}
+
+// Apply a batch of logs from the server - either a full resync or only the missed entries
+function applyLogBatch(batch) {
+    if (batch.stream) {
+        streamId = batch.stream;
+    }
+    if (batch.resync) {
+        lastSeq = null;
+        updateLogs(batch.logs);
+    } else {
+        batch.logs.forEach(logEntry => {
+            addLogEntry(logEntry);
+        });
+    }
+    if (batch.gap) {
+        // The server dropped entries before this batch - fetch just that range
+        socket.emit('request_logs', { since: batch.gap.since, until: batch.gap.until, stream: streamId });
+    }
+    trackSeq(batch.seq);
+}
+
 function updateLogs(logs) {
     if (!logsVisible) return;
     
@@ -307,6 +366,9 @@ async function loadLayout() {
     try {
         const response = await fetch('/api/layout');
         currentLayout = await response.json();
+        savedLayout = { ...currentLayout };
+        layoutEtag = response.headers.get('ETag');
+        activeLayer = `${response.headers.get('X-Layout-Profile')}/${response.headers.get('X-Layout-Layer')}`;
         applyLayout();
     } catch (error) {
         console.error('Error loading layout:', error);
@@ -341,25 +403,44 @@ function isModuleInGrid(moduleId) {
     return Object.values(currentLayout).includes(moduleId);
 }
 
-// Create a draggable module element
-function createModuleElement(module) {
+// A slot binding with per-slot args, e.g. {"module": "play_sound", "args": {"file": "boom.mp3"}}
+function isModuleBinding(binding) {
+    return binding !== null && typeof binding === 'object' && 'module' in binding;
+}
+
+// Module id a slot binding runs, or null for layer actions and gesture maps
+function bindingModuleId(binding) {
+    if (isModuleBinding(binding)) {
+        return binding.module;
+    }
+    return typeof binding === 'string' && !binding.startsWith('@') ? binding : null;
+}
+
+// Create a draggable module element - a module binding keeps its args and display overrides
+function createModuleElement(module, binding = null) {
     const div = document.createElement('div');
     div.className = 'module-item';
     div.draggable = true;
     div.dataset.moduleId = module.id;
+    const name = binding?.name || module.name;
+    const icon = binding?.icon || module.icon;
+    const color = binding?.color || module.color;
+    if (binding) {
+        div.binding = binding;
+    }
     
     // Add unique identifier to help with tracking
-    div.setAttribute('data-module-name', module.name);
+    div.setAttribute('data-module-name', name);
     
     // Apply custom color if specified, otherwise use default pastel rotation
-    if (module.color) {
-        div.style.backgroundColor = module.color;
-        div.dataset.customColor = module.color;
+    if (color) {
+        div.style.backgroundColor = color;
+        div.dataset.customColor = color;
     }
     
     div.innerHTML = `
-        <div class="module-icon">${module.icon}</div>
-        <div class="module-name">${module.name}</div>
+        <div class="module-icon">${icon}</div>
+        <div class="module-name">${name}</div>
     `;
     
     // Add click event to show module details in sidebar overlay
@@ -383,7 +464,8 @@ function applyLayout() {
     });
     
     // Place modules according to layout
-    Object.entries(currentLayout).forEach(([slot, moduleId]) => {
+    Object.entries(currentLayout).forEach(([slot, binding]) => {
+        const moduleId = bindingModuleId(binding);
         if (moduleId) {
             console.log(`Looking for module ${moduleId} for slot ${slot}`);
             const module = modules.find(m => m.id === moduleId);
@@ -391,7 +473,7 @@ function applyLayout() {
                 console.log(`Found module ${moduleId}:`, module);
                 const slotElement = document.querySelector(`[data-slot="${slot}"] .module-container`);
                 if (slotElement) {
-                    const moduleElement = createModuleElement(module);
+                    const moduleElement = createModuleElement(module, isModuleBinding(binding) ? binding : null);
                     slotElement.appendChild(moduleElement);
                     console.log(`Placed module ${moduleId} in slot ${slot}`);
                 } else {
@@ -636,6 +718,11 @@ function updateSlotNumberVisibility() {
 }
 
 // Update layout based on current DOM state
+function isAdvancedBinding(binding) {
+    return (binding !== null && typeof binding === 'object' && !isModuleBinding(binding)) ||
+        (typeof binding === 'string' && binding.startsWith('@'));
+}
+
 function updateLayoutFromDOM() {
     const newLayout = {
         "000": null, "001": null, "010": null, "011": null,
@@ -646,7 +733,10 @@ function updateLayoutFromDOM() {
         const slotId = slot.dataset.slot;
         const moduleElement = slot.querySelector('.module-item');
         if (moduleElement) {
-            newLayout[slotId] = moduleElement.dataset.moduleId;
+            newLayout[slotId] = moduleElement.binding || moduleElement.dataset.moduleId;
+        } else if (isAdvancedBinding(savedLayout[slotId])) {
+            // Gesture maps and layer switches aren't drawn in the grid - keep them
+            newLayout[slotId] = savedLayout[slotId];
         }
     });
     
@@ -898,17 +988,8 @@ async function saveEditedModule(moduleId) {
     }
     
     try {
-        // Create updated module content
-        const colorLine = color !== '#e3f2fd' ? `Color: ${color}\n` : '';
-        const moduleContent = `"""
-Name: ${name}
-Description: ${description}
-Icon: ${icon}
-${colorLine}"""
-
-${code}`;
-        
-        // Send to backend to save the file
+        // Send to backend to save the file - it edits these keys in place and
+        // keeps the rest of the docstring (Timeout, Runner, Resources, ...)
         const response = await fetch(`/api/scripts/${moduleId}`, {
             method: 'PUT',
             headers: {
@@ -934,7 +1015,7 @@ ${code}`;
                     description: description,
                     icon: icon,
                     color: color !== '#e3f2fd' ? color : null,
-                    code: moduleContent
+                    code: result.content
                 };
                 
                 // Refresh UI - reload all modules to get the latest data
@@ -1069,7 +1150,7 @@ async function performDeleteModule(moduleId) {
             
             // Remove from any grid positions
             Object.keys(currentLayout).forEach(position => {
-                if (currentLayout[position] === moduleId) {
+                if (bindingModuleId(currentLayout[position]) === moduleId) {
                     currentLayout[position] = null;
                 }
             });
@@ -1133,26 +1214,57 @@ function setupEventListeners() {
 
 // Save current layout to backend (silent version without notification)
 async function saveLayoutSilently() {
+    // Only send the slots that changed, each guarded by the layout version we last saw
+    const changedSlots = Object.keys(currentLayout).filter(slot => currentLayout[slot] !== savedLayout[slot]);
+    
     try {
-        const response = await fetch('/api/layout', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify(currentLayout)
-        });
-        
-        const result = await response.json();
-        if (result.success) {
-            console.log('Layout auto-saved successfully');
-        } else {
-            console.error('Error auto-saving layout:', result.error);
+        for (const slot of changedSlots) {
+            const response = await fetch(`/api/layout/${slot}`, {
+                method: 'PATCH',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'If-Match': layoutEtag
+                },
+                body: JSON.stringify({ module: currentLayout[slot] || null })
+            });
+            
+            const result = await response.json();
+            if (response.status === 412) {
+                // Someone else edited the layout - take theirs and redraw
+                showNotification('Layout was changed elsewhere, reloading', 'error');
+                await loadLayout();
+                return;
+            }
+            if (!result.success) {
+                console.error('Error auto-saving layout:', result.error);
+                return;
+            }
+            layoutEtag = `"${result.etag}"`;
+            savedLayout[slot] = currentLayout[slot] || null;
         }
+        console.log('Layout auto-saved successfully');
     } catch (error) {
         console.error('Error auto-saving layout:', error);
     }
 }
 
+// Apply a layout diff pushed by the server without re-fetching the layout
+function handleLayoutChanged(data) {
+    if (layoutEtag === `"${data.etag}"`) {
+        return; // Our own change
+    }
+    // The ETag covers the whole document, so take it even for a layer we're not showing
+    layoutEtag = `"${data.etag}"`;
+    if (`${data.profile}/${data.layer}` !== activeLayer) {
+        return; // A layer we're not showing
+    }
+    Object.entries(data.changes).forEach(([slot, moduleId]) => {
+        currentLayout[slot] = moduleId;
+        savedLayout[slot] = moduleId;
+    });
+    applyLayout();
+}
+
 // Save current layout to backend (with notification)
 // Show notification dropdown from top-right
 function showNotification(message, type = 'success') {
@@ -1213,18 +1325,20 @@ function updateLivePreview() {
     });
     
     // Update preview buttons with current layout
-    Object.entries(currentLayout).forEach(([slotId, moduleId]) => {
+    Object.entries(currentLayout).forEach(([slotId, binding]) => {
         const previewButton = document.querySelector(`[data-preview="${slotId}"]`);
+        const moduleId = bindingModuleId(binding);
         if (previewButton && moduleId) {
             const module = modules.find(m => m.id === moduleId);
+            const overrides = isModuleBinding(binding) ? binding : {};
             if (module) {
-                previewButton.innerHTML = module.icon;
+                previewButton.innerHTML = overrides.icon || module.icon;
                 previewButton.style.fontSize = '10px';
                 previewButton.style.display = 'flex';
                 previewButton.style.alignItems = 'center';
                 previewButton.style.justifyContent = 'center';
-                if (module.color) {
-                    previewButton.style.backgroundColor = module.color;
+                if (overrides.color || module.color) {
+                    previewButton.style.backgroundColor = overrides.color || module.color;
                 } else {
                     previewButton.style.backgroundColor = '#007bff'; // default blue
                 }
@@ -0,0 +1,65 @@
+"""
+Warm pool worker process.
+
+Started by WarmProcessPool as `python warm_pool_host.py <script>`. Imports the
+script once, then runs its action() (or main()) each time a run request -
+one JSON line, {"args": {...}} - arrives on stdin, calling it with the slot's
+args and answering with one JSON line: {"output", "error", "return_code"}.
+Anything the script prints is captured into the reply.
+"""
+
+import contextlib
+import importlib.util
+import io
+import json
+import sys
+import traceback
+from pathlib import Path
+
+from process_groups import exit_status
+
+def main():
+    """Import the script and serve run requests until stdin closes"""
+    reply = sys.stdout
+    script_path = Path(sys.argv[1])
+    sys.path.insert(0, str(script_path.parent))
+
+    try:
+        spec = importlib.util.spec_from_file_location(f"otherhand_pool_{script_path.stem}", script_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        action = getattr(module, "action", None) or getattr(module, "main", None)
+        if not callable(action):
+            raise AttributeError(f"{script_path.stem} has no action() or main() function")
+        prewarm = getattr(module, "prewarm", None)
+        if callable(prewarm):
+            prewarm()
+    except Exception:
+        reply.write(json.dumps({"ready": False, "error": traceback.format_exc()}) + "\n")
+        reply.flush()
+        return 1
+
+    reply.write(json.dumps({"ready": True}) + "\n")
+    reply.flush()
+
+    for line in sys.stdin:
+        out, err = io.StringIO(), io.StringIO()
+        return_code = 0
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            try:
+                result = action(**json.loads(line).get("args", {}))
+                if result is not None:
+                    print(result)
+            except SystemExit as e:
+                return_code = exit_status(e.code)
+                if return_code and not isinstance(e.code, int):
+                    print(e.code, file=sys.stderr)  # sys.exit("message") prints the message
+            except Exception:
+                traceback.print_exc()
+                return_code = 1
+        reply.write(json.dumps({"output": out.getvalue(), "error": err.getvalue(), "return_code": return_code}) + "\n")
+        reply.flush()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
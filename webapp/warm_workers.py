@@ -0,0 +1,461 @@
+"""
+Warm module instances (in-process and pooled processes) and the hold-to-repeat worker.
+
+A script is imported once (and again only when its file changes) so repeated
+activations call straight into its action function instead of paying for a
+new Python process and its imports each time. A module's action is its
+action() function if it defines one, otherwise main(). Modules that declare
+"Runner: in-process" are run this way on every activation; everything else
+only for hold-to-repeat and encoder control.
+
+Modules with "Runner: warm pool" instead keep a worker process that has
+already imported them, so a run is isolated from the host like a subprocess
+but skips interpreter start-up and imports.
+"""
+
+import importlib.util
+import json
+import queue
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from process_groups import spawn_in_group, kill_group, exit_status
+
+class WarmModule:
+    """One imported script and what we know about its warm state"""
+
+    def __init__(self, module_id, mtime, module):
+        self.module_id = module_id
+        self.mtime = mtime
+        self.module = module
+        self.prewarmed = False  # prewarm() hook has run
+        self.last_used = time.monotonic()
+        self.in_use = 0
+
+class WarmModuleCache:
+    """Imported script modules, reloaded when the file changes and evicted least-recently-used.
+
+    Modules may define prewarm() to import heavy libraries and open resources
+    ahead of the first activation, and release() to close them on eviction.
+    """
+
+    def __init__(self, capacity=8):
+        self.capacity = capacity
+        self.modules = OrderedDict()  # module_id -> WarmModule, least recently used first
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.prewarms = 0
+        self.evictions = 0
+
+    def _entry(self, module_id, script_path):
+        """Import a script (or return the already imported copy) and mark it most recently used"""
+        script_path = Path(script_path)
+        mtime = script_path.stat().st_mtime_ns
+        with self.lock:
+            entry = self.modules.get(module_id)
+            if entry and entry.mtime == mtime:
+                self.modules.move_to_end(module_id)
+                entry.last_used = time.monotonic()
+                return entry, False
+            if entry:
+                self._release(self.modules.pop(module_id))
+
+            spec = importlib.util.spec_from_file_location(f"otherhand_script_{module_id}", script_path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)  # __name__ isn't "__main__", so the script doesn't run itself
+            entry = self.modules[module_id] = WarmModule(module_id, mtime, module)
+            self._evict_over_capacity()
+            return entry, True
+
+    def load(self, module_id, script_path):
+        """Import a script (or return the already imported copy)"""
+        return self._entry(module_id, script_path)[0].module
+
+    def is_warm(self, module_id):
+        """Whether an activation now would skip import and initialization"""
+        with self.lock:
+            entry = self.modules.get(module_id)
+            if not entry:
+                return False
+            return entry.prewarmed or not callable(getattr(entry.module, "prewarm", None))
+
+    def prewarm(self, module_id, script_path):
+        """Import a module and run its prewarm() hook - returns True if work was done"""
+        entry, imported = self._entry(module_id, script_path)
+        hook = getattr(entry.module, "prewarm", None)
+        if entry.prewarmed or not callable(hook):
+            return imported
+        hook()
+        entry.prewarmed = True
+        self.prewarms += 1
+        return True
+
+    def get_action(self, module_id, script_path):
+        """The callable a warm activation runs - counts a hit if the module was already warm"""
+        if self.is_warm(module_id):
+            self.hits += 1
+        else:
+            self.misses += 1
+        module = self.load(module_id, script_path)
+        action = getattr(module, "action", None) or getattr(module, "main", None)
+        if not callable(action):
+            raise AttributeError(f"{module_id} has no action() or main() function")
+        return action
+
+    def acquire(self, module_id):
+        """Pin a module while something is running it"""
+        with self.lock:
+            if module_id in self.modules:
+                self.modules[module_id].in_use += 1
+
+    def release(self, module_id):
+        """Unpin a module"""
+        with self.lock:
+            entry = self.modules.get(module_id)
+            if entry and entry.in_use:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def evict_idle(self, max_idle):
+        """Drop modules that haven't been used for max_idle seconds"""
+        cutoff = time.monotonic() - max_idle
+        with self.lock:
+            for module_id, entry in list(self.modules.items()):
+                if entry.last_used < cutoff and not entry.in_use:
+                    self._release(self.modules.pop(module_id))
+
+    def _evict_over_capacity(self):
+        """Drop least recently used modules that aren't running"""
+        for module_id, entry in list(self.modules.items()):
+            if len(self.modules) <= self.capacity:
+                break
+            if not entry.in_use:
+                self._release(self.modules.pop(module_id))
+
+    def _release(self, entry):
+        """Let an evicted module close what prewarm() opened"""
+        self.evictions += 1
+        hook = getattr(entry.module, "release", None)
+        if callable(hook):
+            try:
+                hook()
+            except Exception as e:
+                print(f"Error releasing {entry.module_id}: {e}")
+
+    def stats(self):
+        """Warm modules and the prewarm hit/miss ratio"""
+        with self.lock:
+            warm = [
+                {"module_id": e.module_id, "prewarmed": e.prewarmed, "in_use": e.in_use}
+                for e in reversed(self.modules.values())
+            ]
+        activations = self.hits + self.misses
+        return {
+            "capacity": self.capacity,
+            "warm": warm,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / activations, 3) if activations else 0.0,
+            "prewarms": self.prewarms,
+            "evictions": self.evictions
+        }
+
+class Prewarmer:
+    """Run prewarm jobs on one background thread, keeping only the latest hint"""
+
+    def __init__(self, name="prewarmer"):
+        self.name = name
+        self.pending = None
+        self.wakeup = threading.Condition()
+        self.thread = None
+        self.hints = 0
+        self.superseded = 0
+
+    def hint(self, job):
+        """Queue a prewarm job, replacing one that hasn't started yet"""
+        with self.wakeup:
+            self.hints += 1
+            if self.pending:
+                self.superseded += 1
+            self.pending = job
+            if not self.thread:
+                self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self.thread.start()
+            self.wakeup.notify()
+
+    def _run(self):
+        """Run the latest job whenever there is one"""
+        while True:
+            with self.wakeup:
+                while not self.pending:
+                    self.wakeup.wait()
+                job, self.pending = self.pending, None
+            try:
+                job()
+            except Exception as e:
+                print(f"Error prewarming: {e}")
+
+class PoolProcess:
+    """One warm pool worker process serving a single module"""
+
+    def __init__(self, proc, mtime):
+        self.proc = proc
+        self.mtime = mtime
+        self.idle_since = time.monotonic()
+        self.replies = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        """Forward reply lines to the queue - None means the process is gone"""
+        for line in self.proc.stdout:
+            try:
+                self.replies.put(json.loads(line))
+            except ValueError:
+                continue
+        self.replies.put(None)
+
+    def alive(self):
+        """Still running"""
+        return self.proc.poll() is None
+
+    def stop(self):
+        """Close stdin and kill whatever is left of the process group"""
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        kill_group(self.proc)
+
+class WarmProcessPool:
+    """Worker processes per module that import it once and then run it on request.
+
+    A worker left idle for max_idle seconds is stopped, so a module pressed
+    once doesn't keep a resident Python process until the server exits.
+    """
+
+    def __init__(self, host_script, python, idle_per_module=1, max_idle=300.0):
+        self.host_script = str(host_script)
+        self.python = python  # Callable returning the interpreter to start
+        self.idle_per_module = idle_per_module
+        self.max_idle = max_idle
+        self.idle = {}  # module_id -> [PoolProcess]
+        self.lock = threading.Lock()
+        self.evictions = 0
+        self.spawns = 0
+        self.runs = 0
+        self.timeouts = 0
+
+    def _checkout(self, module_id, script_path, limits, deadline):
+        """An idle worker for the current version of the script, or a freshly started one"""
+        self.evict_idle()
+        mtime = Path(script_path).stat().st_mtime_ns
+        stale = []
+        found = None
+        with self.lock:
+            workers = self.idle.get(module_id, [])
+            while workers:
+                worker = workers.pop()
+                if worker.alive() and worker.mtime == mtime:
+                    found = worker
+                    break
+                stale.append(worker)
+        for worker in stale:
+            worker.stop()
+        if found:
+            return found
+
+        proc = spawn_in_group(
+            [self.python(), self.host_script, str(script_path)], limits,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding="utf-8", errors="replace"
+        )
+        self.spawns += 1
+        worker = PoolProcess(proc, mtime)
+        ready = self._reply(worker, deadline)
+        if not ready.get("ready"):
+            worker.stop()
+            raise RuntimeError(f"{module_id} failed to load in the warm pool: {ready.get('error', '').strip()}")
+        return worker
+
+    def _reply(self, worker, deadline):
+        """Wait for the worker's next reply, killing it if the deadline passes"""
+        try:
+            reply = worker.replies.get(timeout=max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            worker.stop()
+            self.timeouts += 1
+            raise subprocess.TimeoutExpired(self.host_script, 0)
+        if reply is None:
+            raise RuntimeError("warm pool worker exited")
+        return reply
+
+    def run(self, module_id, script_path, timeout, limits=None, args=None):
+        """Run a module in a pooled worker with action(**args) - returns (return_code, stdout, stderr)"""
+        deadline = time.monotonic() + timeout
+        worker = self._checkout(module_id, script_path, limits, deadline)
+        worker.proc.stdin.write(json.dumps({"args": args or {}}) + "\n")
+        worker.proc.stdin.flush()
+        reply = self._reply(worker, deadline)
+        self.runs += 1
+        self._checkin(module_id, worker)
+        return reply.get("return_code", 0), reply.get("output", ""), reply.get("error", "")
+
+    def prewarm(self, module_id, script_path, timeout, limits=None):
+        """Start a worker ahead of the first run - returns True if one was started"""
+        with self.lock:
+            if self.idle.get(module_id):
+                return False
+        self._checkin(module_id, self._checkout(module_id, script_path, limits, time.monotonic() + timeout))
+        return True
+
+    def _checkin(self, module_id, worker):
+        """Keep a finished worker for the next run, or stop it if enough are idle"""
+        with self.lock:
+            workers = self.idle.setdefault(module_id, [])
+            if len(workers) < self.idle_per_module:
+                worker.idle_since = time.monotonic()
+                workers.append(worker)
+                return
+        worker.stop()
+
+    def evict_idle(self, max_idle=None):
+        """Stop workers that have been idle longer than max_idle seconds (default: the pool's)"""
+        cutoff = time.monotonic() - (self.max_idle if max_idle is None else max_idle)
+        with self.lock:
+            expired = [w for ws in self.idle.values() for w in ws if w.idle_since < cutoff]
+            for module_id, workers in list(self.idle.items()):
+                workers[:] = [w for w in workers if w.idle_since >= cutoff]
+                if not workers:
+                    del self.idle[module_id]
+            self.evictions += len(expired)
+        for worker in expired:
+            worker.stop()
+
+    def stop_all(self):
+        """Stop every idle worker"""
+        with self.lock:
+            workers = [w for ws in self.idle.values() for w in ws]
+            self.idle = {}
+        for worker in workers:
+            worker.stop()
+
+    def stats(self):
+        """Idle workers per module and run counters"""
+        with self.lock:
+            idle = {module_id: len(ws) for module_id, ws in self.idle.items() if ws}
+        return {"idle": idle, "spawns": self.spawns, "runs": self.runs, "timeouts": self.timeouts,
+                "evictions": self.evictions}
+
+class RepeatWorker:
+    """Call an action at a steady rate on one thread until stopped.
+
+    Ticks are scheduled against the start time rather than chained sleeps, so
+    the rate doesn't drift. If the action overruns, the ticks that were missed
+    are skipped and counted instead of being run back to back.
+    """
+
+    def __init__(self, module_id, action, interval_ms, max_seconds=60, on_finish=None):
+        self.module_id = module_id
+        self.action = action
+        self.interval = interval_ms / 1000.0
+        self.max_seconds = max_seconds
+        self.on_finish = on_finish
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"repeat-{module_id}", daemon=True)
+        self.ticks = 0
+        self.missed = 0
+        self.errors = 0
+        self.lateness_total = 0.0
+        self.lateness_max = 0.0
+        self.started_at = None
+        self.stopped_at = None
+        self.stop_reason = None
+
+    def start(self):
+        """Start ticking (the first tick runs immediately)"""
+        self.thread.start()
+        return self
+
+    def stop(self, reason="released"):
+        """Stop after the current tick"""
+        if not self.stop_reason:
+            self.stop_reason = reason
+        self.stop_event.set()
+
+    def _run(self):
+        """Tick loop - on_finish always runs, however the loop ends"""
+        try:
+            self._tick_loop()
+        finally:
+            self.stopped_at = time.perf_counter()
+            if self.on_finish:
+                self.on_finish(self)
+
+    def _tick_loop(self):
+        """Run the action on schedule until stopped"""
+        self.started_at = time.perf_counter()
+        consecutive_errors = 0
+        n = 0
+        while not self.stop_event.is_set():
+            target = self.started_at + n * self.interval
+            wait = target - time.perf_counter()
+            if wait > 0 and self.stop_event.wait(wait):
+                break
+
+            now = time.perf_counter()
+            if now - self.started_at > self.max_seconds:
+                self.stop("max duration reached")
+                break
+
+            lateness = now - target
+            if lateness >= self.interval:
+                skipped = int(lateness // self.interval)
+                self.missed += skipped
+                n += skipped
+                lateness -= skipped * self.interval
+            self.lateness_total += lateness
+            self.lateness_max = max(self.lateness_max, lateness)
+
+            try:
+                self.action()
+                consecutive_errors = 0
+            except SystemExit as e:
+                # Scripts written as programs call sys.exit() - that ends the repeat, not the thread silently
+                self.ticks += 1
+                code = exit_status(e.code)
+                if code:
+                    self.errors += 1
+                self.stop(f"action exited ({code})")
+                break
+            except Exception as e:
+                self.errors += 1
+                consecutive_errors += 1
+                if consecutive_errors >= 3:
+                    self.stop(f"action failed: {e}")
+                    break
+            self.ticks += 1
+            n += 1
+
+    def stats(self):
+        """Achieved rate vs target, missed ticks and timing jitter"""
+        end = self.stopped_at or time.perf_counter()
+        elapsed = max(end - (self.started_at or end), 1e-9)
+        target_rate = 1.0 / self.interval
+        scheduled = self.ticks + self.missed
+        return {
+            "module_id": self.module_id,
+            "interval_ms": round(self.interval * 1000, 3),
+            "ticks": self.ticks,
+            "missed_ticks": self.missed,
+            "errors": self.errors,
+            "duration_s": round(elapsed, 3),
+            "target_rate_hz": round(target_rate, 3),
+            "achieved_rate_hz": round(self.ticks / elapsed, 3) if self.ticks else 0.0,
+            "rate_accuracy": round(self.ticks / scheduled, 4) if scheduled else 1.0,
+            "mean_lateness_ms": round(self.lateness_total / self.ticks * 1000, 3) if self.ticks else 0.0,
+            "max_lateness_ms": round(self.lateness_max * 1000, 3),
+            "stop_reason": self.stop_reason
+        }